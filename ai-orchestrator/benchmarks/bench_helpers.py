@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks and a memory check for the /chat stream helpers.
+
+Times the per-event helpers in main.py and graph._infer_store_from_messages
+on fake messages of realistic size. Reports ops/sec and p99 for each one and
+measures session memory after N turns with tracemalloc. Results are compared
+with benchmarks/baseline.json. The exit status is 1 when a result is worse
+than the baseline by more than the tolerance.
+
+    python benchmarks/bench_helpers.py [--tolerance 0.5] [--update-baseline]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage  # noqa: E402
+
+import main  # noqa: E402
+from graph import _infer_store_from_messages  # noqa: E402
+from session_store import SessionStore  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+SESSIONS = 20
+TURNS = 30
+
+PLAN = """I'll handle the Diwali sale for store nike.
+
+Step-by-step plan:
+- Inspect the current coupons
+- Create a 20% coupon DIWALI20
+- Update prices on the festive collection
+- Announce the sale with a banner
+- Create a popup that links to the collection
+
+Starting with the coupons."""
+
+PRODUCT = {
+    "id": 101, "name": "Runner Pro 2", "sku": "RUN-PRO-2", "type": "simple", "status": "publish",
+    "price": "89.00", "regular_price": "99.00", "sale_price": "89.00", "stock_status": "instock",
+    "stock_quantity": 14,
+}
+
+
+def _turn(n: int) -> list:
+    call_id = f"call-{n}"
+    return [
+        HumanMessage(content=f"Show the first 20 products in store nike and mark the ones on sale ({n})"),
+        AIMessage(content="", tool_calls=[{"name": "list_products", "args": {"store_name": "nike", "per_page": 20}, "id": call_id}]),
+        ToolMessage(content=json.dumps([dict(PRODUCT, id=PRODUCT["id"] + i) for i in range(20)]), name="list_products", tool_call_id=call_id),
+        AIMessage(content="Here are the first 20 products. Seven of them are on sale: " + ", ".join(f"#{101 + i}" for i in range(7)) + "."),
+    ]
+
+
+HISTORY = [m for n in range(15) for m in _turn(n)]
+TOOL_CALL = {"name": "update_product", "args": {"store_name": "nike", "id": 101, "sale_price": "79.00"}}
+EVENT = {"type": "tool_result", "name": "list_products", "content": HISTORY[2].content}
+
+
+def _progress_meta() -> dict:
+    meta = {}
+    main._set_task_plan(meta, main._extract_tasks_from_content(PLAN))
+    return meta
+
+
+CASES: dict[str, tuple[Callable[[], object], int]] = {
+    "extract_tasks_from_content": (lambda: main._extract_tasks_from_content(PLAN), 20000),
+    "emit_task_progress_event": ((lambda meta: lambda: main._emit_task_progress_event(meta, 2, "completed"))(_progress_meta()), 50000),
+    "is_mutating_tool_call": (lambda: main._is_mutating_tool_call(TOOL_CALL), 100000),
+    "trim_messages": (lambda: main._trim_messages(HISTORY), 2000),
+    "ndjson_line": (lambda: main._ndjson_line(EVENT), 20000),
+    "infer_store_from_messages": (lambda: _infer_store_from_messages(HISTORY), 20000),
+}
+
+
+def time_case(fn: Callable[[], object], n: int) -> dict:
+    for _ in range(min(n // 10, 1000)):
+        fn()
+    timings = []
+    clock = time.perf_counter_ns
+    gc.disable()
+    try:
+        for _ in range(n):
+            started = clock()
+            fn()
+            timings.append(clock() - started)
+    finally:
+        gc.enable()
+    timings.sort()
+    return {
+        "ops_per_sec": round(n / (sum(timings) / 1e9)),
+        "p99_us": round(timings[int(len(timings) * 0.99) - 1] / 1000, 3),
+    }
+
+
+async def _grow_sessions(store: SessionStore) -> None:
+    for s in range(SESSIONS):
+        key = f"bench-{s}"
+        history, meta = await main._load_session(key)
+        for n in range(TURNS):
+            turn = _turn(n)
+            await main._save_session(key, history, turn, meta)
+            history = store.get(key, [])
+
+
+def session_memory() -> dict:
+    """Traced bytes held per session after TURNS turns (with history compaction)."""
+    store = SessionStore()
+    with patch.object(main, "SESSIONS", store), \
+            patch.object(main, "CHECKPOINTER", None), \
+            patch.object(main, "AI_HISTORY_SUMMARY", False):
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        asyncio.run(_grow_sessions(store))
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        messages = store.stats()["messages"]
+    return {"session_bytes": round((after - before) / SESSIONS), "messages_per_session": messages // SESSIONS}
+
+
+def run() -> dict:
+    with patch("builtins.print"):
+        helpers = {name: time_case(fn, n) for name, (fn, n) in CASES.items()}
+        memory = session_memory()
+    return {"helpers": helpers, "memory": memory}
+
+
+def regressions(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    found = []
+    for name, base in (baseline.get("helpers") or {}).items():
+        current = results["helpers"].get(name)
+        if current is None:
+            continue
+        if current["ops_per_sec"] < base["ops_per_sec"] * (1 - tolerance):
+            found.append(f"{name}: {current['ops_per_sec']} ops/sec, baseline {base['ops_per_sec']}")
+        if current["p99_us"] > base["p99_us"] * (1 + tolerance):
+            found.append(f"{name}: p99 {current['p99_us']}us, baseline {base['p99_us']}us")
+    base_bytes = (baseline.get("memory") or {}).get("session_bytes")
+    if base_bytes and results["memory"]["session_bytes"] > base_bytes * (1 + tolerance):
+        found.append(f"session memory: {results['memory']['session_bytes']} bytes, baseline {base_bytes}")
+    return found
+
+
+def main_cli() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed fractional regression (default 0.5)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    results = run()
+    print(f"{'helper':<28} {'ops/sec':>12} {'p99 us':>10}")
+    for name, r in results["helpers"].items():
+        print(f"{name:<28} {r['ops_per_sec']:>12} {r['p99_us']:>10.3f}")
+    memory = results["memory"]
+    print(f"session memory: {memory['session_bytes']} bytes/session after {TURNS} turns "
+          f"({memory['messages_per_session']} messages kept)")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as handle:
+            json.dump(results, handle, indent=2, sort_keys=True)
+            handle.write("\n")
+        print(f"baseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("no baseline; run with --update-baseline to create one")
+        return 0
+    with open(args.baseline) as handle:
+        found = regressions(results, json.load(handle), args.tolerance)
+    for line in found:
+        print(f"REGRESSION {line}")
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Per-step cost of /chat streaming as session history grows.
+
+Runs one tool-calling turn (agent -> tools -> agent) against sessions of
+increasing length with a fake model and fake WP-CLI, and reports the mean
+time per graph step for the "updates" stream used by main._stream_events and
+for the previous "values" stream.
+
+    python benchmarks/bench_stream_steps.py [--repeat N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import os
+import sys
+import time
+from unittest.mock import AsyncMock, patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel  # noqa: E402
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage  # noqa: E402
+
+import main  # noqa: E402
+from history import compact  # noqa: E402
+from rate_limiter import LLMRateLimiter  # noqa: E402
+from session_store import SessionStore  # noqa: E402
+from tool_cache import TOOL_CACHE  # noqa: E402
+
+HISTORY_SIZES = [0, 60, 240, 960, 3840]
+STEPS_PER_TURN = 3
+
+
+def _history(size: int) -> list:
+    messages = []
+    for n in range(size // 4):
+        call_id = f"h{n}"
+        messages += [
+            HumanMessage(content=f"list coupons in store nike ({n})"),
+            AIMessage(content="", tool_calls=[{"name": "list_coupons", "args": {"store_name": "nike"}, "id": call_id}]),
+            ToolMessage(content='[{"id": 1, "code": "DIWALI"}]', name="list_coupons", tool_call_id=call_id),
+            AIMessage(content="There is one coupon: DIWALI."),
+        ]
+    return messages
+
+
+def _model():
+    def replies():
+        while True:
+            yield AIMessage(content="", tool_calls=[{"name": "list_coupons", "args": {"store_name": "nike"}, "id": "c1"}])
+            yield AIMessage(content="There is one coupon: DIWALI.")
+    return GenericFakeChatModel(messages=replies())
+
+
+async def _updates_turn(history: list) -> None:
+    main.SESSIONS["bench"] = list(history)
+    async for _ in main._stream_events("list coupons in store nike", "bench"):
+        pass
+
+
+async def _values_turn(history: list) -> None:
+    # The previous implementation: full state snapshot per step, only messages[-1] used.
+    state = {"messages": history + [HumanMessage(content="list coupons in store nike")]}
+    last_messages = state["messages"]
+    async for event in main.GRAPH.astream(state, stream_mode="values", config={"recursion_limit": 50}):
+        messages = event.get("messages", [])
+        last_messages = messages
+        _ = messages[-1]
+    main.SESSIONS["bench"] = main._trim_messages(last_messages)
+
+
+async def _measure(turn, history: list, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        TOOL_CACHE.clear()
+        await turn(history)
+    return (time.perf_counter() - started) / (repeat * STEPS_PER_TURN)
+
+
+async def run(repeat: int) -> list[tuple[int, float, float]]:
+    rows = []
+    with patch("graph.get_model", side_effect=lambda *_: model), \
+            patch("graph.STORE_DIRECTORY.astores", new_callable=AsyncMock, return_value=[{"name": "nike"}]), \
+            patch("tool_registry.aresolve_store", new_callable=AsyncMock, return_value=("store-nike", "wp-0")), \
+            patch("tool_registry.arun_wp_cli_command", new_callable=AsyncMock, return_value='[{"id": 1}]'), \
+            patch("graph.LLM_LIMITER", LLMRateLimiter(10 ** 9, 10 ** 12)), \
+            patch.object(main, "MAX_SESSION_MESSAGES", 10 ** 6), \
+            patch.object(main, "FAST_PATH_ENABLED", False), \
+            patch.object(main, "compact", functools.partial(compact, max_tokens=10 ** 9, keep_tokens=10 ** 9)), \
+            patch.object(main, "SESSIONS", SessionStore(session_max_bytes=10 ** 12, max_bytes=10 ** 12)), \
+            patch("builtins.print"):
+        for size in HISTORY_SIZES:
+            history = _history(size)
+            rows.append((
+                size,
+                await _measure(_updates_turn, history, repeat),
+                await _measure(_values_turn, history, repeat),
+            ))
+    return rows
+
+
+model = _model()
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    rows = asyncio.run(run(args.repeat))
+    print(f"{'history':>8} {'updates ms/step':>16} {'values ms/step':>15}")
+    for size, updates, values in rows:
+        print(f"{size:>8} {updates * 1000:>16.3f} {values * 1000:>15.3f}")
+
+
+if __name__ == "__main__":
+    main_cli()
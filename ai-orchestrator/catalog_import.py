@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Bulk catalog import for AI Orchestrator.
+Streams WooCommerce product rows from a CSV into a pod-side importer over exec
+stdin, in bounded chunks, and reports the importer's per-batch progress.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import csv
+import io
+import json
+import os
+import re
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import AsyncIterable, Callable, Iterable, Iterator, Optional
+
+from wp_session import RESPONSE_MARKER, ExecChannel
+
+# ---- Config ----
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "100"))
+IMPORT_CHUNK_ROWS = int(os.getenv("IMPORT_CHUNK_ROWS", "50"))
+# Longest wait for the next progress line before the import is abandoned.
+IMPORT_IDLE_SECONDS = float(os.getenv("IMPORT_IDLE_SECONDS", "300"))
+UPLOAD_DIR = os.getenv("AI_UPLOAD_DIR", "") or os.path.join(tempfile.gettempdir(), "urumi-uploads")
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(50 * 1024 * 1024)))
+# Uploads are deleted once imported; ones never imported are pruned after this long.
+UPLOAD_TTL_SECONDS = float(os.getenv("UPLOAD_TTL_SECONDS", "3600"))
+# csv_path is resolved inside this directory; unset disables csv_path entirely.
+AI_IMPORT_DIR = os.getenv("AI_IMPORT_DIR", "")
+
+END_OF_ROWS = "__END__"
+MAX_REPORTED_ERRORS = 20
+
+# Reads one JSON product per stdin line until END_OF_ROWS, saves them through the
+# WooCommerce CRUD classes in transactions of `batch_size`, and prints the
+# running totals as a marker-prefixed JSON line after every batch.
+IMPORT_PHP = r"""
+$marker = '__URUMI_WPCLI__';
+$batch_size = %(batch_size)d;
+$with_images = %(images)s;
+$totals = ['processed' => 0, 'created' => 0, 'updated' => 0, 'failed' => 0, 'errors' => []];
+$term_ids = [];
+if ($with_images) {
+    require_once ABSPATH . 'wp-admin/includes/media.php';
+    require_once ABSPATH . 'wp-admin/includes/file.php';
+    require_once ABSPATH . 'wp-admin/includes/image.php';
+}
+wp_defer_term_counting(true);
+
+$category_ids = function ($paths) use (&$term_ids) {
+    $ids = [];
+    foreach ((array) $paths as $path) {
+        $parent = 0;
+        foreach (array_map('trim', explode('>', $path)) as $name) {
+            if ($name === '') {
+                continue;
+            }
+            $key = $parent . '/' . $name;
+            if (!isset($term_ids[$key])) {
+                $term = term_exists($name, 'product_cat', $parent);
+                if (!$term) {
+                    $term = wp_insert_term($name, 'product_cat', ['parent' => $parent]);
+                }
+                $term_ids[$key] = is_wp_error($term) ? 0 : (int) $term['term_id'];
+            }
+            $parent = $term_ids[$key];
+        }
+        if ($parent) {
+            $ids[] = $parent;
+        }
+    }
+    return $ids;
+};
+
+$save = function ($row) use ($category_ids, $with_images) {
+    $existing = !empty($row['sku']) ? wc_get_product_id_by_sku($row['sku']) : 0;
+    $product = wc_get_product_object($row['type'] ?? 'simple', $existing);
+    $product->set_name($row['name']);
+    foreach (['status', 'description', 'short_description', 'sku', 'regular_price', 'sale_price', 'stock_status'] as $field) {
+        if (isset($row[$field]) && $row[$field] !== '') {
+            $product->{"set_$field"}($row[$field]);
+        }
+    }
+    if (isset($row['stock_quantity'])) {
+        $product->set_manage_stock(true);
+        $product->set_stock_quantity((int) $row['stock_quantity']);
+    }
+    if (!empty($row['categories'])) {
+        $product->set_category_ids($category_ids($row['categories']));
+    }
+    if (!empty($row['attributes'])) {
+        $attributes = [];
+        foreach ($row['attributes'] as $spec) {
+            $attribute = new WC_Product_Attribute();
+            $attribute->set_name($spec['name']);
+            $attribute->set_options($spec['options']);
+            $attribute->set_visible(!empty($spec['visible']));
+            $attribute->set_variation(!empty($spec['variation']));
+            $attributes[] = $attribute;
+        }
+        $product->set_attributes($attributes);
+    }
+    if ($with_images && !$existing && !empty($row['images'])) {
+        $image_ids = [];
+        foreach ($row['images'] as $src) {
+            $id = media_sideload_image($src, 0, null, 'id');
+            if (!is_wp_error($id)) {
+                $image_ids[] = $id;
+            }
+        }
+        if ($image_ids) {
+            $product->set_image_id(array_shift($image_ids));
+            $product->set_gallery_image_ids($image_ids);
+        }
+    }
+    $product->save();
+    return $existing ? 'updated' : 'created';
+};
+
+$flush = function (&$batch) use (&$totals, $save, $marker) {
+    global $wpdb;
+    $wpdb->query('START TRANSACTION');
+    foreach ($batch as $row) {
+        try {
+            $totals[$save($row)]++;
+        } catch (Throwable $e) {
+            $totals['failed']++;
+            if (count($totals['errors']) < %(max_errors)d) {
+                $totals['errors'][] = ['name' => $row['name'] ?? '', 'error' => $e->getMessage()];
+            }
+        }
+        $totals['processed']++;
+    }
+    $wpdb->query('COMMIT');
+    $batch = [];
+    echo $marker . json_encode($totals) . "\n";
+};
+
+$batch = [];
+while (($line = fgets(STDIN)) !== false) {
+    $line = trim($line);
+    if ($line === '__END__') {
+        break;
+    }
+    $row = json_decode($line, true);
+    if (!is_array($row) || empty($row['name'])) {
+        continue;
+    }
+    $batch[] = $row;
+    if (count($batch) >= $batch_size) {
+        $flush($batch);
+    }
+}
+if ($batch) {
+    $flush($batch);
+}
+wp_defer_term_counting(false);
+$totals['done'] = true;
+echo $marker . json_encode($totals) . "\n";
+"""
+
+
+class CatalogImportError(RuntimeError):
+    """Raised when the pod-side importer stops answering or exits early."""
+
+
+def import_php(batch_size: int = IMPORT_BATCH_SIZE, images: bool = True) -> str:
+    return IMPORT_PHP % {
+        "batch_size": batch_size,
+        "images": "true" if images else "false",
+        "max_errors": MAX_REPORTED_ERRORS,
+    }
+
+
+# ---- CSV sources ----
+
+@contextlib.contextmanager
+def open_csv(
+    csv_path: Optional[str] = None,
+    csv_content: Optional[str] = None,
+    upload_id: Optional[str] = None,
+) -> Iterator[Iterable[str]]:
+    """Yields the CSV as an iterable of lines; files are read lazily, never loaded whole."""
+    sources = [s for s in (csv_path, csv_content, upload_id) if s]
+    if len(sources) != 1:
+        raise ValueError("Provide exactly one of csv_path, csv_content or upload_id")
+    if csv_content:
+        yield io.StringIO(csv_content)
+        return
+    path = import_path(csv_path) if csv_path else upload_path(upload_id)
+    with path.open(newline="", encoding="utf-8-sig") as handle:
+        yield handle
+
+
+def import_path(csv_path: str) -> Path:
+    """csv_path resolved inside AI_IMPORT_DIR; the model chooses the path, so nothing outside it is readable."""
+    if not AI_IMPORT_DIR:
+        raise ValueError("csv_path is disabled (AI_IMPORT_DIR is not set); use upload_id or csv_content")
+    root = os.path.realpath(AI_IMPORT_DIR)
+    path = os.path.realpath(os.path.join(root, csv_path))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"csv_path must be inside {AI_IMPORT_DIR}")
+    return Path(path)
+
+
+def upload_path(upload_id: str) -> Path:
+    if not re.fullmatch(r"[A-Za-z0-9_-]+", upload_id or ""):
+        raise ValueError(f"Invalid upload id: {upload_id}")
+    path = Path(UPLOAD_DIR) / f"{upload_id}.csv"
+    if not path.is_file():
+        raise FileNotFoundError(f"Upload {upload_id} not found")
+    return path
+
+
+# ---- Uploads ----
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+async def save_upload(chunks: AsyncIterable[bytes], max_bytes: int = MAX_UPLOAD_BYTES) -> tuple[str, int]:
+    """Writes a request body to UPLOAD_DIR off the event loop; returns (upload_id, bytes)."""
+    await asyncio.to_thread(prune_uploads)
+    upload_id = uuid.uuid4().hex
+    path = Path(UPLOAD_DIR) / f"{upload_id}.csv"
+    await asyncio.to_thread(os.makedirs, UPLOAD_DIR, exist_ok=True)
+    handle = await asyncio.to_thread(path.open, "wb")
+    size = 0
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(f"Upload exceeds MAX_UPLOAD_BYTES ({max_bytes})")
+            await asyncio.to_thread(handle.write, chunk)
+    except BaseException:
+        await asyncio.to_thread(handle.close)
+        path.unlink(missing_ok=True)
+        raise
+    await asyncio.to_thread(handle.close)
+    return upload_id, size
+
+
+def remove_upload(upload_id: str) -> None:
+    with contextlib.suppress(ValueError, OSError):
+        upload_path(upload_id).unlink()
+
+
+def prune_uploads(ttl: float = UPLOAD_TTL_SECONDS) -> int:
+    """Deletes uploads older than `ttl` seconds; returns how many were removed."""
+    cutoff = time.time() - ttl
+    removed = 0
+    with contextlib.suppress(FileNotFoundError):
+        for entry in os.scandir(UPLOAD_DIR):
+            with contextlib.suppress(OSError):
+                if entry.name.endswith(".csv") and entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+                    removed += 1
+    return removed
+
+
+# ---- Row mapping (same columns as the chart's products.sh generator) ----
+
+def product_from_row(row: dict) -> Optional[dict]:
+    """Maps a WooCommerce export row to the importer's product shape; None for rows without a name."""
+    def value(key: str) -> str:
+        return (row.get(key) or "").strip()
+
+    name = value("Name")
+    if not name:
+        return None
+
+    product_type = value("Type") or "simple"
+    if product_type == "variation":
+        # Variations need their parent's id; import them as simple products like products.sh does.
+        product_type = "simple"
+
+    product = {
+        "name": name,
+        "type": product_type,
+        "status": "publish" if value("Published") == "1" else "draft",
+    }
+    for key, column in (
+        ("sku", "SKU"),
+        ("regular_price", "Regular price"),
+        ("sale_price", "Sale price"),
+        ("description", "Description"),
+        ("short_description", "Short description"),
+    ):
+        if value(column):
+            product[key] = value(column)
+
+    if value("Stock").lstrip("-").isdigit():
+        product["stock_quantity"] = int(value("Stock"))
+    if value("In stock?") in {"0", "1"}:
+        product["stock_status"] = "instock" if value("In stock?") == "1" else "outofstock"
+
+    categories = [c.strip() for c in value("Categories").split(",") if c.strip()]
+    if categories:
+        product["categories"] = categories
+
+    images = [u.strip() for u in value("Images").split(",") if u.strip()]
+    if images:
+        product["images"] = images
+
+    attributes = []
+    for i in range(1, 4):
+        attr_name = value(f"Attribute {i} name")
+        attr_values = value(f"Attribute {i} value(s)")
+        if attr_name and attr_values:
+            attributes.append({
+                "name": attr_name,
+                "visible": value(f"Attribute {i} visible") != "0",
+                "variation": True,
+                "options": [x.strip() for x in attr_values.split(",")],
+            })
+    if attributes:
+        product["attributes"] = attributes
+    return product
+
+
+def iter_products(lines: Iterable[str]) -> Iterator[dict]:
+    for row in csv.DictReader(lines):
+        product = product_from_row(row)
+        if product is not None:
+            yield product
+
+
+# ---- Streaming driver ----
+
+def run_import(
+    channel: ExecChannel,
+    products: Iterable[dict],
+    on_progress: Optional[Callable[[dict], None]] = None,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    chunk_rows: int = IMPORT_CHUNK_ROWS,
+    idle_timeout: float = IMPORT_IDLE_SECONDS,
+) -> dict:
+    """
+    Feeds products to a channel running IMPORT_PHP and returns the final totals.
+    At most `window` rows are in flight beyond what the pod has reported as
+    processed, so neither side buffers more than a couple of batches.
+    """
+    window = max(2 * batch_size, batch_size + chunk_rows)
+    sent = 0
+    totals: dict = {"processed": 0}
+
+    def accept(reply: dict) -> None:
+        totals.clear()
+        totals.update(reply)
+        if on_progress:
+            on_progress({**reply, "sent": sent})
+
+    chunk: list[str] = []
+    for product in products:
+        chunk.append(json.dumps(product))
+        if len(chunk) < chunk_rows:
+            continue
+        while sent - totals["processed"] >= window:
+            accept(_read_progress(channel, idle_timeout))
+        channel.send("\n".join(chunk))
+        sent += len(chunk)
+        chunk = []
+        while (reply := _read_progress(channel, 0)) is not None:
+            accept(reply)
+
+    if chunk:
+        channel.send("\n".join(chunk))
+        sent += len(chunk)
+    channel.send(END_OF_ROWS)
+    while not totals.get("done"):
+        accept(_read_progress(channel, idle_timeout))
+    totals.pop("done", None)
+    return {**totals, "sent": sent}
+
+
+def _read_progress(channel: ExecChannel, timeout: float) -> Optional[dict]:
+    """Next progress reply; None only for a non-blocking read (timeout 0) with nothing queued."""
+    while True:
+        line = channel.readline(timeout)
+        if line is None:
+            if timeout <= 0:
+                return None
+            raise CatalogImportError(f"Import made no progress for {timeout}s")
+        if line == "":
+            raise CatalogImportError("Import ended unexpectedly")
+        if not line.startswith(RESPONSE_MARKER):
+            continue
+        try:
+            reply = json.loads(line[len(RESPONSE_MARKER):])
+        except ValueError:
+            continue
+        if isinstance(reply, dict) and "processed" in reply:
+            return reply
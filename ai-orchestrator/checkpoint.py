@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Durable session checkpoints for AI Orchestrator.
+Persists chat history and task state outside the process so any worker or
+replica can continue a session. Each turn appends only its new messages.
+"""
+
+from __future__ import annotations
+
+import abc
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from langchain_core.messages import message_to_dict, messages_from_dict
+
+# ---- Config ----
+# AI_CHECKPOINT_URL is read by open_checkpointer(), e.g. sqlite:///data/sessions.db (relative)
+# or sqlite:////var/lib/urumi/sessions.db (absolute). Unset keeps sessions in process memory only.
+AI_CHECKPOINT_TTL_SECONDS = float(os.getenv("AI_CHECKPOINT_TTL_SECONDS", str(7 * 24 * 3600)))
+# Expired sessions are pruned once every this many saved turns.
+AI_CHECKPOINT_PRUNE_EVERY = int(os.getenv("AI_CHECKPOINT_PRUNE_EVERY", "200"))
+
+# Meta keys that describe the local copy and are never persisted.
+LOCAL_META_KEYS = {"checkpoint_head"}
+
+
+@dataclass
+class Checkpoint:
+    messages: list
+    meta: dict
+    head: int
+
+
+def dump_message(message) -> str:
+    """Compact JSON for one message; empty fields are left out and restored as defaults."""
+    record = message_to_dict(message)
+    data = {k: v for k, v in record["data"].items() if k == "content" or v not in (None, "", [], {})}
+    return json.dumps({"type": record["type"], "data": data}, separators=(",", ":"), default=str)
+
+
+def load_messages(rows: list[str]) -> list:
+    return messages_from_dict([json.loads(row) for row in rows])
+
+
+def dump_meta(meta: dict) -> str:
+    return json.dumps({k: v for k, v in meta.items() if k not in LOCAL_META_KEYS}, separators=(",", ":"))
+
+
+class CheckpointBackend(abc.ABC):
+    """Interface for session checkpoint stores; `head` is the sequence number of the newest message."""
+
+    @abc.abstractmethod
+    def load(self, session_id: str, known_head: Optional[int] = None) -> Optional[Checkpoint]:
+        """Stored session, or None when it is unknown or still at `known_head`."""
+
+    @abc.abstractmethod
+    def save_turn(self, session_id: str, messages: list, meta: dict, keep: int) -> tuple[int, int]:
+        """Appends a turn's messages, keeps the newest `keep`, returns (previous head, new head)."""
+
+    @abc.abstractmethod
+    def save_meta(self, session_id: str, meta: dict) -> None:
+        """Replaces the task state of an existing session."""
+
+    @abc.abstractmethod
+    def delete(self, session_id: str) -> None:
+        """Removes the session and its messages."""
+
+    @abc.abstractmethod
+    def prune(self, max_age_seconds: float) -> int:
+        """Deletes sessions idle for longer than `max_age_seconds`; returns how many."""
+
+    def stats(self) -> dict:
+        return {}
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteCheckpointer(CheckpointBackend):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS sessions (
+        session_id TEXT PRIMARY KEY,
+        meta TEXT NOT NULL,
+        head INTEGER NOT NULL,
+        updated REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS messages (
+        session_id TEXT NOT NULL,
+        seq INTEGER NOT NULL,
+        data TEXT NOT NULL,
+        PRIMARY KEY (session_id, seq)
+    ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = AI_CHECKPOINT_TTL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.saves = 0
+
+    def _db(self) -> sqlite3.Connection:
+        # Opened on first use so importing main never touches the filesystem.
+        if self._conn is None:
+            if self.path != ":memory:" and os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            if self.path != ":memory:":
+                # WAL lets readers in other workers proceed while one worker writes.
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def load(self, session_id: str, known_head: Optional[int] = None) -> Optional[Checkpoint]:
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT head, meta FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None or row[0] == known_head:
+                return None
+            rows = db.execute(
+                "SELECT data FROM messages WHERE session_id = ? ORDER BY seq", (session_id,)
+            ).fetchall()
+            self.loads += 1
+        return Checkpoint(messages=load_messages([r[0] for r in rows]), meta=json.loads(row[1]), head=row[0])
+
+    def save_turn(self, session_id: str, messages: list, meta: dict, keep: int) -> tuple[int, int]:
+        records = [dump_message(m) for m in messages]
+        with self._lock:
+            db = self._db()
+            # IMMEDIATE takes the write lock up front, so two workers never reuse a sequence number.
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute("SELECT head FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+                previous = row[0] if row else 0
+                head = previous + len(records)
+                db.executemany(
+                    "INSERT INTO messages (session_id, seq, data) VALUES (?, ?, ?)",
+                    [(session_id, previous + i + 1, record) for i, record in enumerate(records)],
+                )
+                db.execute("DELETE FROM messages WHERE session_id = ? AND seq <= ?", (session_id, head - keep))
+                db.execute(
+                    "INSERT OR REPLACE INTO sessions (session_id, meta, head, updated) VALUES (?, ?, ?, ?)",
+                    (session_id, dump_meta(meta), head, time.time()),
+                )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            self.saves += 1
+            saves = self.saves
+        if AI_CHECKPOINT_PRUNE_EVERY and saves % AI_CHECKPOINT_PRUNE_EVERY == 0:
+            self.prune(self.ttl_seconds)
+        return previous, head
+
+    def save_meta(self, session_id: str, meta: dict) -> None:
+        with self._lock:
+            self._db().execute(
+                "UPDATE sessions SET meta = ?, updated = ? WHERE session_id = ?",
+                (dump_meta(meta), time.time(), session_id),
+            )
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def prune(self, max_age_seconds: float) -> int:
+        cutoff = time.time() - max_age_seconds
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute(
+                    "DELETE FROM messages WHERE session_id IN (SELECT session_id FROM sessions WHERE updated < ?)",
+                    (cutoff,),
+                )
+                removed = db.execute("DELETE FROM sessions WHERE updated < ?", (cutoff,)).rowcount
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return removed
+
+    def stats(self) -> dict:
+        return {"backend": "sqlite", "path": self.path, "loads": self.loads, "saves": self.saves}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def open_checkpointer(url: Optional[str] = None) -> Optional[CheckpointBackend]:
+    """Backend for `url` (default AI_CHECKPOINT_URL), or None when checkpointing is disabled."""
+    if url is None:
+        # Read lazily so a .env loaded after import still applies.
+        url = os.getenv("AI_CHECKPOINT_URL", "").strip()
+    if not url:
+        return None
+    if url.startswith("sqlite:///"):
+        return SQLiteCheckpointer(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported AI_CHECKPOINT_URL scheme: {url.split(':', 1)[0]}")
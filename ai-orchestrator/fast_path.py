@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Deterministic fast path for AI Orchestrator.
+Answers simple read requests ("list products in store nike") by calling the
+tool directly and formatting a templated reply, without an LLM round trip.
+Anything that does not match a known pattern exactly goes to the agent.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+from store_directory import STORE_DIRECTORY
+from tool_registry import ALL_TOOLS
+from tool_scheduler import observed
+
+# ---- Config ----
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "1").strip().lower() in {"1", "true", "yes"}
+
+_VERB = r"(?:list|show|get|display|fetch|view|what are)(?:\s+me)?(?:\s+(?:all|the|my|current))*"
+_STORE = (
+    r"(?:\s+(?:in|for|from|of|on|at)\s+(?:the\s+)?"
+    r"(?:store\s+(?P<store>[a-z0-9-]+)|(?P<store_before>[a-z0-9-]+)\s+store|(?P<store_bare>[a-z0-9-]+)))?"
+)
+_END = r"\s*[?.!]*"
+
+
+def _list_pattern(noun: str) -> re.Pattern:
+    return re.compile(rf"{_VERB}\s+{noun}{_STORE}{_END}", re.I)
+
+
+def _get_pattern(noun: str) -> re.Pattern:
+    return re.compile(rf"{_VERB}\s+{noun}\s+(?:#|id\s+|number\s+)?(?P<id>\d+){_STORE}{_END}", re.I)
+
+
+def _text(value) -> str:
+    return "" if value in (None, "") else str(value)
+
+
+def _join(*parts) -> str:
+    return " - ".join(p for p in (_text(x) for x in parts) if p)
+
+
+def _product(p: dict) -> str:
+    sku = f"SKU {p['sku']}" if p.get("sku") else ""
+    stock = _text(p.get("stock_status"))
+    if p.get("stock_quantity") is not None:
+        stock = f"{stock} ({p['stock_quantity']})".strip()
+    return _join(f"#{p.get('id')} {_text(p.get('name'))}".strip(), sku, _text(p.get("price")), stock, p.get("status"))
+
+
+def _order(o: dict) -> str:
+    total = f"{_text(o.get('total'))} {_text(o.get('currency'))}".strip()
+    return _join(f"#{o.get('number') or o.get('id')}", o.get("status"), total, o.get("date_created"))
+
+
+def _customer(c: dict) -> str:
+    name = f"{_text(c.get('first_name'))} {_text(c.get('last_name'))}".strip()
+    email = f"<{c['email']}>" if c.get("email") else ""
+    return _join(f"#{c.get('id')} {name}".strip(), email, c.get("username"))
+
+
+def _coupon(c: dict) -> str:
+    amount = _text(c.get("amount"))
+    if amount and c.get("discount_type") == "percent":
+        amount += "%"
+    used = f"used {c['usage_count']}x" if c.get("usage_count") is not None else ""
+    return _join(_text(c.get("code")), amount, c.get("discount_type"), f"expires {c['date_expires']}" if c.get("date_expires") else "", used)
+
+
+def _popup(p: dict) -> str:
+    return _join(f"#{p.get('ID')} {_text(p.get('post_title'))}".strip(), p.get("post_status"))
+
+
+@dataclass(frozen=True)
+class Intent:
+    name: str
+    tool: str
+    pattern: re.Pattern
+    label: str
+    describe: Callable[[dict], str]
+    single: bool = False
+
+
+INTENTS = [
+    Intent("list_products", "list_products", _list_pattern(r"products?"), "Products", _product),
+    Intent("get_product", "get_product", _get_pattern(r"product"), "Product", _product, single=True),
+    Intent("list_orders", "list_orders", _list_pattern(r"orders?"), "Orders", _order),
+    Intent("get_order", "get_order", _get_pattern(r"order"), "Order", _order, single=True),
+    Intent("list_customers", "list_customers", _list_pattern(r"customers?"), "Customers", _customer),
+    Intent("get_customer", "get_customer", _get_pattern(r"customer"), "Customer", _customer, single=True),
+    Intent("list_coupons", "list_coupons", _list_pattern(r"(?:coupons?|discount codes?)"), "Coupons", _coupon),
+    Intent("list_popups", "list_popups", _list_pattern(r"popups?"), "Popups", _popup),
+]
+
+
+def match_intent(text: str) -> Optional[tuple[Intent, Optional[str], dict]]:
+    """(intent, named store or None, extra tool args) for a request matching a read pattern."""
+    text = " ".join((text or "").split())
+    for intent in INTENTS:
+        m = intent.pattern.fullmatch(text)
+        if m:
+            store = m.group("store") or m.group("store_before") or m.group("store_bare")
+            args = {"id": int(m.group("id"))} if intent.single else {}
+            return intent, store.lower() if store else None, args
+    return None
+
+
+def render(intent: Intent, store: str, data: Any) -> str:
+    if intent.single:
+        return f"{intent.label} in store {store}: {intent.describe(data)}"
+    if not data:
+        return f"No {intent.label.lower()} found in store {store}."
+    lines = [f"{intent.label} in store {store} ({len(data)} shown):"]
+    lines += [f"- {intent.describe(item)}" for item in data]
+    return "\n".join(lines)
+
+
+class FastPath:
+    def __init__(self, tools: Optional[list] = None):
+        self._tools = {t.name: t for t in (tools if tools is not None else ALL_TOOLS)}
+        self._lock = threading.Lock()
+        self.attempts = 0
+        self.hits = 0
+        self.misses = {"no_match": 0, "store": 0, "tool_error": 0}
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    async def answer(self, user_input: str) -> Optional[list]:
+        """[tool call, tool result, final reply] messages, or None to hand the request to the agent."""
+        started = time.perf_counter()
+        with self._lock:
+            self.attempts += 1
+        matched = match_intent(user_input)
+        if matched is None:
+            return self._miss("no_match")
+        intent, store, extra = matched
+        store = await self._store(store)
+        if store is None:
+            return self._miss("store")
+
+        call = {"name": intent.tool, "args": {"store_name": store, **extra}, "id": f"fast-{uuid.uuid4().hex[:12]}"}
+        try:
+            # Same tool span and latency metric as calls the agent makes (tool_scheduler.py).
+            with observed(call) as result:
+                output = await self._tools[intent.tool].ainvoke(call["args"])
+                result["output"] = ToolMessage(content=output, name=intent.tool, tool_call_id=call["id"])
+            data = json.loads(output)
+            if not isinstance(data, dict if intent.single else list):
+                raise ValueError("unexpected output")
+            reply = render(intent, store, data)
+        except Exception:
+            # WP-CLI errors and odd output get the agent's judgement.
+            return self._miss("tool_error")
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.hits += 1
+            self.latency_total += elapsed
+            self.latency_max = max(self.latency_max, elapsed)
+        return [
+            AIMessage(content="", tool_calls=[call]),
+            result["output"],
+            AIMessage(content=reply),
+        ]
+
+    async def _store(self, named: Optional[str]) -> Optional[str]:
+        if named:
+            return named if await STORE_DIRECTORY.amatch(named) else None
+        # Without a store name, only a single-store setup is unambiguous.
+        stores = await STORE_DIRECTORY.astores()
+        if isinstance(stores, list) and len(stores) == 1:
+            return str(stores[0].get("name") or stores[0].get("id") or "") or None
+        return None
+
+    def _miss(self, reason: str) -> None:
+        with self._lock:
+            self.misses[reason] += 1
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": FAST_PATH_ENABLED,
+            "attempts": self.attempts,
+            "hits": self.hits,
+            "misses": dict(self.misses),
+            "hit_ratio": round(self.hits / self.attempts, 4) if self.attempts else None,
+            "mean_latency_ms": round(1000 * self.latency_total / self.hits, 3) if self.hits else None,
+            "max_latency_ms": round(1000 * self.latency_max, 3),
+        }
+
+
+FAST_PATH = FastPath()
@@ -3,52 +3,70 @@ from __future__ import annotations
 import json
 import os
 import re
-import requests
 import logging
 import sys
 import asyncio
+import time
+import uuid
 from typing import Annotated, TypedDict, Literal
 
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, RemoveMessage, ToolMessage
 from langgraph.graph import END, StateGraph, START
 from langgraph.graph.message import add_messages
-from langgraph.prebuilt import ToolNode
 
 from tools import get_store_pod_info
+from store_directory import STORE_DIRECTORY
 from tool_registry import ALL_TOOLS
+from tool_scheduler import StoreScheduledToolNode
+from rate_limiter import LLM_LIMITER
+from model_cache import MODEL_CACHE
+from metrics import observe_llm_call
+from tracing import span
+from prompt import build_prompt
+from tool_selection import REQUEST_TOOLS, TOOL_GROUPS, TOOL_SELECTION_ENABLED, TOOL_SELECTOR
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-SYSTEM_PROMPT = """
-You are a deterministic store orchestration agent.
+class MessageList(list):
+    """Message history that remembers its message ids."""
 
-Rules:
-- Always inspect before mutating.
-- Never hallucinate tool arguments.
-- Use exact tool names.
-- If store not specified and multiple exist, request clarification.
-"""
+    def __init__(self, messages=(), ids=None):
+        super().__init__(messages)
+        self.ids = set(ids) if ids is not None else {m.id for m in self}
 
-class AgentState(TypedDict):
-    messages: Annotated[list[BaseMessage], add_messages]
 
-def get_model(store_name: str | None = None):
-    endpoint = os.getenv("AZURE_OPENAI_ENDPOINT", "")
-    api_key = os.getenv("AZURE_OPENAI_API_KEY", "")
-    deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT", "")
+def append_messages(left, right):
+    """add_messages for the usual step: only new messages are appended.
+
+    Avoids re-coercing and re-indexing the whole history on every graph step.
+    Replacements, removals and non-message inputs go through add_messages.
+    """
+    if not isinstance(right, list):
+        right = [right]
+    if not left and isinstance(right, MessageList):
+        return MessageList(right, right.ids)
+    ids = getattr(left, "ids", None)
+    if ids is None or any(
+        not isinstance(m, BaseMessage) or isinstance(m, RemoveMessage) or m.id in ids for m in right
+    ):
+        return MessageList(add_messages(left, right))
+    for m in right:
+        if m.id is None:
+            m.id = str(uuid.uuid4())
+    return MessageList(left + right, ids | {m.id for m in right})
 
-    model = ChatOpenAI(
-        base_url=endpoint,
-        api_key=api_key,
-        model=deployment,
-        temperature=1,
-    )
 
-    return model.bind_tools(ALL_TOOLS)
+class AgentState(TypedDict):
+    messages: Annotated[list[BaseMessage], append_messages]
+    # Tool groups bound to the model; seeded with the session's groups (tool_selection.py).
+    tool_groups: list[str]
+
+def get_model(store_name: str | None = None, tools: list | None = None):
+    # Client, connection pool and tool schemas are built once per tool set and reused (model_cache.py).
+    return MODEL_CACHE.get(ALL_TOOLS if tools is None else tools)
 
 STORE_RE = re.compile(r"\bstore\s+([a-z0-9-]+)\b", re.I)
 STORE_IN_RE = re.compile(r"\bin\s+([a-z0-9-]+)\s+store\b", re.I)
@@ -68,43 +86,41 @@ def _infer_store_from_messages(messages: list[BaseMessage]) -> str | None:
             return m.group(1).lower()
     return None
 
+def select_tools_node(state: AgentState):
+    if not TOOL_SELECTION_ENABLED:
+        return {"tool_groups": list(TOOL_GROUPS)}
+    return {"tool_groups": TOOL_SELECTOR.select(state["messages"], state.get("tool_groups") or ())}
+
 async def agent_node(state: AgentState):
-    messages = state["messages"]
-    
-    # Fetch available stores to provide context to the LLM
-    api = os.getenv("ORCH_API_BASE", "http://localhost:8080").rstrip("/")
-    stores_context = ""
-    try:
-        resp = requests.get(f"{api}/api/stores", timeout=5)
-        if resp.status_code == 200:
-            stores = resp.json()
-            if isinstance(stores, list) and stores:
-                store_names = [s.get("name") or s.get("id") for s in stores]
-                stores_context = f"\n\nCURRENT SYSTEM STATE: The following stores are available: {', '.join(store_names)}. "
-                if len(stores) == 1:
-                    stores_context += f"Automatically use store '{store_names[0]}' for all operations unless the user explicitly names a different one."
-                else:
-                    stores_context += "You must identify which store the user is referring to. If it is ambiguous, ask for clarification from the available list."
-    except Exception as e:
-        logger.warning(f"Could not fetch stores for context: {e}")
-
-    # Ensure the first message is a SystemMessage with the latest context
-    if not messages or not isinstance(messages[0], SystemMessage):
-        messages = [SystemMessage(content=SYSTEM_PROMPT + stores_context)] + messages
-    else:
-        messages[0] = SystemMessage(content=SYSTEM_PROMPT + stores_context)
-    
-    inferred = _infer_store_from_messages(messages)
-    if inferred:
-        hint = SystemMessage(content=f"Current focus: Store '{inferred}'. Please ensure all tool calls use this store name.")
-        # Remove any existing hints to avoid clutter
-        messages = [messages[0], hint] + [m for m in messages[1:] if not (isinstance(m, SystemMessage) and "Current focus" in str(m.content))]
-
-    model = get_model(inferred)
-    response = await model.ainvoke(messages)
-    if response.tool_calls:
-        await asyncio.sleep(0.5)
-    return {"messages": [response]}
+    with span("agent") as agent_span:
+        messages = state["messages"]
+        # Widen the bound tool set if the model asked for more groups earlier in this turn.
+        tool_groups = TOOL_SELECTOR.widen(state.get("tool_groups") or list(TOOL_GROUPS), messages)
+
+        # Store list and focus go after the conversation so the prefix stays cacheable (prompt.py).
+        stores = await STORE_DIRECTORY.astores()
+        inferred = _infer_store_from_messages(messages)
+        messages = build_prompt(messages, stores, inferred)
+
+        tools = TOOL_SELECTOR.tools_for(tool_groups)
+        TOOL_SELECTOR.record(tools)
+        model = get_model(inferred, tools)
+        agent_span.set(store=inferred or "", tools=len(tools), messages=len(messages))
+        started = time.perf_counter()
+        with span("llm.call") as llm_span:
+            try:
+                response = await LLM_LIMITER.ainvoke(model, messages)
+            except Exception:
+                observe_llm_call(time.perf_counter() - started, error=True)
+                raise
+            usage = getattr(response, "usage_metadata", None) or {}
+            llm_span.set(
+                input_tokens=usage.get("input_tokens", 0),
+                output_tokens=usage.get("output_tokens", 0),
+                tool_calls=len(getattr(response, "tool_calls", None) or []),
+            )
+        observe_llm_call(time.perf_counter() - started, response)
+        return {"messages": [response], "tool_groups": tool_groups}
 
 def should_continue(state: AgentState) -> Literal["tools", "__end__"]:
     messages = state["messages"]
@@ -115,12 +131,14 @@ def should_continue(state: AgentState) -> Literal["tools", "__end__"]:
 
 def build_graph():
     workflow = StateGraph(AgentState)
+    workflow.add_node("select_tools", select_tools_node)
     workflow.add_node("agent", agent_node)
     
-    # Lazy ToolNode that fetches tools on each call if needed
-    workflow.add_node("tools", ToolNode(ALL_TOOLS))
+    # Reads run concurrently; mutations are ordered per store (tool_scheduler.py)
+    workflow.add_node("tools", StoreScheduledToolNode(ALL_TOOLS + [REQUEST_TOOLS]))
         
-    workflow.add_edge(START, "agent")
+    workflow.add_edge(START, "select_tools")
+    workflow.add_edge("select_tools", "agent")
     workflow.add_conditional_edges("agent", should_continue)
     workflow.add_edge("tools", "agent")
     return workflow.compile()
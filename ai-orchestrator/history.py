@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Session history compaction for AI Orchestrator.
+Trims history to a token budget without splitting a tool call from its
+results, and folds the dropped turns into a rolling summary in the background.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable, Optional
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from rate_limiter import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# ---- Config ----
+# Compaction starts when the history goes over AI_HISTORY_MAX_TOKENS and trims it to
+# AI_HISTORY_KEEP_TOKENS, so the summary is refreshed every few turns, not on every turn.
+AI_HISTORY_MAX_TOKENS = int(os.getenv("AI_HISTORY_MAX_TOKENS", "6000"))
+AI_HISTORY_KEEP_TOKENS = int(os.getenv("AI_HISTORY_KEEP_TOKENS", "4000"))
+AI_HISTORY_SUMMARY = os.getenv("AI_HISTORY_SUMMARY", "1").strip().lower() in {"1", "true", "yes"}
+AI_HISTORY_SUMMARY_MAX_TOKENS = int(os.getenv("AI_HISTORY_SUMMARY_MAX_TOKENS", "400"))
+# Tool output longer than this is cut before it is sent to the summarizer.
+AI_HISTORY_SUMMARY_TOOL_CHARS = int(os.getenv("AI_HISTORY_SUMMARY_TOOL_CHARS", "600"))
+
+SUMMARY_ID = "history-summary"
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a conversation between a store operator and an agent "
+    "that manages WooCommerce stores. Merge the previous summary with the new messages. Keep "
+    "store names, product/order/coupon IDs, SKUs, prices, decisions and open questions. Drop "
+    f"pleasantries and raw tool output. Reply with the summary only, under {AI_HISTORY_SUMMARY_MAX_TOKENS} tokens."
+)
+
+
+def is_summary(message) -> bool:
+    return isinstance(message, SystemMessage) and message.id == SUMMARY_ID
+
+
+def summary_message(text: str) -> SystemMessage:
+    return SystemMessage(content=f"Summary of the earlier conversation:\n{text}", id=SUMMARY_ID)
+
+
+def message_groups(messages: list) -> list[list]:
+    """Splits history into units that must be kept or dropped together.
+
+    An AI message with tool calls and the tool results that follow it form one
+    group; every other message is a group of its own. Tool results without
+    their call are left out.
+    """
+    groups: list[list] = []
+    for message in messages:
+        if isinstance(message, ToolMessage):
+            if groups and isinstance(groups[-1][0], AIMessage) and groups[-1][0].tool_calls:
+                groups[-1].append(message)
+            continue
+        groups.append([message])
+    return groups
+
+
+def compact(
+    messages: list,
+    max_tokens: int = AI_HISTORY_MAX_TOKENS,
+    keep_tokens: int = AI_HISTORY_KEEP_TOKENS,
+    max_messages: Optional[int] = None,
+) -> tuple[list, list]:
+    """(kept, dropped) history; whole groups are dropped from the front.
+
+    Nothing is dropped while the history is within `max_tokens` (and
+    `max_messages`). Past that, it is cut down to `keep_tokens`. The newest
+    group is always kept.
+    """
+    groups = message_groups(messages)
+    costs = [estimate_tokens(group) for group in groups]
+    total = sum(costs)
+    count = sum(len(group) for group in groups)
+    over_messages = max_messages is not None and count > max_messages
+    if total <= max_tokens and not over_messages and count == len(messages):
+        return messages, []
+
+    budget = keep_tokens if total > max_tokens else total
+    limit = max_messages if max_messages is not None else count
+    start = 0
+    while start < len(groups) - 1 and (total > budget or count > limit):
+        total -= costs[start]
+        count -= len(groups[start])
+        start += 1
+    kept = [m for group in groups[start:] for m in group]
+    dropped = [m for group in groups[:start] for m in group]
+    return kept, dropped
+
+
+def transcript(messages: list) -> str:
+    lines = []
+    for message in messages:
+        content = message.content if isinstance(message.content, str) else str(message.content)
+        if isinstance(message, HumanMessage):
+            lines.append(f"User: {content}")
+        elif isinstance(message, ToolMessage):
+            if len(content) > AI_HISTORY_SUMMARY_TOOL_CHARS:
+                content = content[:AI_HISTORY_SUMMARY_TOOL_CHARS] + " ..."
+            lines.append(f"Tool {message.name or ''} returned: {content}")
+        elif isinstance(message, AIMessage):
+            if content:
+                lines.append(f"Agent: {content}")
+            for call in message.tool_calls or []:
+                lines.append(f"Agent called {call['name']}({call['args']})")
+    return "\n".join(lines)
+
+
+async def summarize_messages(previous: Optional[str], messages: list) -> str:
+    """Previous summary plus `messages`, condensed by the chat model."""
+    # Imported here so compaction can be used without a configured model.
+    from model_cache import MODEL_CACHE
+    from rate_limiter import LLM_LIMITER
+
+    model = MODEL_CACHE.get([]).bind(max_tokens=AI_HISTORY_SUMMARY_MAX_TOKENS)
+    prompt = [
+        SystemMessage(content=SUMMARY_PROMPT),
+        HumanMessage(content=f"Previous summary:\n{previous or '(none)'}\n\nNew messages:\n{transcript(messages)}"),
+    ]
+    response = await LLM_LIMITER.ainvoke(model, prompt)
+    return str(response.content).strip()
+
+
+class HistorySummarizer:
+    """Folds dropped history into `meta["summary"]` off the request path.
+
+    One task runs per session at a time; messages dropped while it runs are
+    folded in by the same task afterwards.
+    """
+
+    def __init__(self, summarize: Callable[[Optional[str], list], Awaitable[str]] = summarize_messages):
+        self._summarize = summarize
+        self._pending: dict[str, list] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self.summaries = 0
+        self.failures = 0
+
+    def submit(
+        self,
+        key: str,
+        meta: dict,
+        dropped: list,
+        on_done: Optional[Callable[[str, dict], Awaitable[None]]] = None,
+    ) -> None:
+        if not dropped:
+            return
+        self._pending.setdefault(key, []).extend(dropped)
+        task = self._tasks.get(key)
+        if task is None or task.done():
+            self._tasks[key] = asyncio.get_running_loop().create_task(self._run(key, meta, on_done))
+
+    async def _run(self, key: str, meta: dict, on_done) -> None:
+        try:
+            while self._pending.get(key):
+                batch = self._pending.pop(key)
+                try:
+                    meta["summary"] = await self._summarize(meta.get("summary"), batch)
+                    self.summaries += 1
+                except Exception as exc:
+                    # The previous summary stays; the dropped messages are lost.
+                    self.failures += 1
+                    logger.warning(f"History summary failed for session {key}: {exc}")
+                    continue
+                if on_done is not None:
+                    await on_done(key, meta)
+        finally:
+            self._pending.pop(key, None)
+            self._tasks.pop(key, None)
+
+    async def drain(self) -> None:
+        """Waits for running summaries (tests and shutdown)."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks.values()), return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "summaries": self.summaries,
+            "failures": self.failures,
+            "running": sum(1 for t in self._tasks.values() if not t.done()),
+        }
+
+
+SUMMARIZER = HistorySummarizer()
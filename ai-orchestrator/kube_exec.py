@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Native Kubernetes exec transport for AI Orchestrator.
+Runs `pods/exec` through a long-lived API client instead of forking `kubectl`.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import quote
+
+from kubernetes import client as k8s_client
+from kubernetes import config as k8s_config
+from kubernetes import watch as k8s_watch
+from kubernetes.client.rest import ApiException
+from kubernetes.stream import ws_client
+
+# ---- Config ----
+KUBE_POOL_MAXSIZE = int(os.getenv("KUBE_POOL_MAXSIZE", "16"))
+
+
+@dataclass
+class ExecResult:
+    returncode: int
+    stdout: str
+    stderr: str
+
+
+class KubeExecTransport:
+    """
+    Holds one authenticated API client for the lifetime of the process.
+    REST calls share its urllib3 connection pool; each exec opens a websocket
+    on the same configuration without reloading kubeconfig or credentials.
+    """
+
+    def __init__(self, api_client: k8s_client.ApiClient):
+        self.api_client = api_client
+        self.configuration = api_client.configuration
+        self.core = k8s_client.CoreV1Api(api_client)
+
+    @classmethod
+    def from_kubeconfig(cls, config_file: str | None = None, context: str | None = None) -> "KubeExecTransport":
+        configuration = k8s_client.Configuration()
+        if not config_file and os.getenv("KUBERNETES_SERVICE_HOST"):
+            k8s_config.load_incluster_config(client_configuration=configuration)
+        else:
+            k8s_config.load_kube_config(
+                config_file=config_file,
+                context=context,
+                client_configuration=configuration,
+            )
+        configuration.connection_pool_maxsize = KUBE_POOL_MAXSIZE
+        return cls(k8s_client.ApiClient(configuration))
+
+    def exec(self, namespace: str, pod: str, command: list[str], timeout: int = 30) -> ExecResult:
+        """Runs `command` in the pod and waits for it to exit."""
+        ws = self._open(namespace, pod, command)
+        stdout: list[str] = []
+        stderr: list[str] = []
+        status = ""
+        try:
+            deadline = time.monotonic() + timeout
+            while ws.is_open():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"Command timed out after {timeout}s")
+                ws.update(timeout=min(remaining, 1.0))
+                stdout.append(ws.read_channel(ws_client.STDOUT_CHANNEL))
+                stderr.append(ws.read_channel(ws_client.STDERR_CHANNEL))
+                status += ws.read_channel(ws_client.ERROR_CHANNEL)
+        finally:
+            ws.close()
+        returncode, message = _parse_exec_status(status)
+        if message:
+            stderr.append(message)
+        return ExecResult(returncode, "".join(stdout), "".join(stderr))
+
+    def open_stream(self, namespace: str, pod: str, command: list[str]) -> "ExecStream":
+        """Starts `command` with stdin attached and returns a line-oriented stream."""
+        return ExecStream(self._open(namespace, pod, command, stdin=True))
+
+    def list_pods(self, namespace: str, label_selector: str) -> dict:
+        """Lists pods over the pooled REST connection, shaped like `kubectl get -o json`."""
+        pods = self.core.list_namespaced_pod(namespace, label_selector=label_selector)
+        return self.api_client.sanitize_for_serialization(pods)
+
+    def watch_pods(self, label_selector: str, timeout_seconds: int = 300):
+        """List-then-watch pods in all namespaces; yields pod_registry watch events."""
+        listing = self.core.list_pod_for_all_namespaces(label_selector=label_selector)
+        data = self.api_client.sanitize_for_serialization(listing)
+        yield "RESET", data.get("items", [])
+        stream = k8s_watch.Watch().stream(
+            self.core.list_pod_for_all_namespaces,
+            label_selector=label_selector,
+            resource_version=listing.metadata.resource_version,
+            timeout_seconds=timeout_seconds,
+        )
+        for event in stream:
+            yield event["type"], event["raw_object"]
+
+    def _open(self, namespace: str, pod: str, command: list[str], stdin: bool = False) -> ws_client.WSClient:
+        url = (
+            f"{self.configuration.host}/api/v1/namespaces/{quote(namespace)}"
+            f"/pods/{quote(pod)}/exec"
+        )
+        query = [
+            ("command", list(command)),
+            ("stdin", "true" if stdin else "false"),
+            ("stdout", "true"),
+            ("stderr", "true"),
+            ("tty", "false"),
+        ]
+        headers = {}
+        token = self.configuration.get_api_key_with_prefix("authorization")
+        if token:
+            headers["authorization"] = token
+        try:
+            return ws_client.WSClient(
+                self.configuration,
+                ws_client.get_websocket_url(url, query),
+                headers,
+                capture_all=False,
+            )
+        except ApiException:
+            raise
+        except Exception as exc:
+            # Normalise socket/handshake failures so callers see one error type.
+            raise ApiException(status=0, reason=str(exc)) from exc
+
+
+class ExecStream:
+    """Interactive exec session; same send/readline/alive/close shape as wp_session.ProcessChannel."""
+
+    def __init__(self, ws: ws_client.WSClient):
+        self._ws = ws
+
+    def send(self, line: str) -> None:
+        self._ws.write_stdin(line + "\n")
+
+    def readline(self, timeout: float) -> Optional[str]:
+        if not self._ws.is_open():
+            return ""
+        line = self._ws.readline_stdout(timeout=max(timeout, 0))
+        if line:
+            return line + "\n"
+        return "" if not self._ws.is_open() else None
+
+    def alive(self) -> bool:
+        return self._ws.is_open()
+
+    def close(self) -> None:
+        self._ws.close()
+
+
+def _parse_exec_status(raw: str) -> tuple[int, str]:
+    """Decodes the v1.Status frame the API server sends on the error channel."""
+    try:
+        status = json.loads(raw) if raw.strip() else {}
+    except ValueError:
+        return 1, raw.strip()
+    if not status or status.get("status") == "Success":
+        return 0, ""
+    causes = (status.get("details") or {}).get("causes") or []
+    for cause in causes:
+        if cause.get("reason") == "ExitCode":
+            try:
+                return int(cause.get("message")), ""
+            except (TypeError, ValueError):
+                break
+    return 1, str(status.get("message") or "exec failed")
+
+
+_TRANSPORT: Optional[KubeExecTransport] = None
+_TRANSPORT_LOCK = threading.Lock()
+
+
+def get_transport(config_file: str | None = None, context: str | None = None) -> KubeExecTransport:
+    """Returns the process-wide transport, creating it on first use."""
+    global _TRANSPORT
+    if _TRANSPORT is None:
+        with _TRANSPORT_LOCK:
+            if _TRANSPORT is None:
+                _TRANSPORT = KubeExecTransport.from_kubeconfig(config_file, context)
+    return _TRANSPORT
+
+
+def set_transport(transport: Optional[KubeExecTransport]) -> None:
+    """Overrides the process-wide transport (tests, fake API servers)."""
+    global _TRANSPORT
+    with _TRANSPORT_LOCK:
+        _TRANSPORT = transport
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Fake cluster services for the load-test harness.
+One HTTP server that stands in for the Azure OpenAI deployment (an
+OpenAI-compatible /v1/chat/completions with scripted tool calls) and for the
+orchestrator's /api/stores. Runs as its own process so it does not share the
+event loop or the GIL with the service under test.
+
+    python loadtest/fake_cluster.py --port 8099 [--token-seconds 0.01]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass
+class FakeConfig:
+    stores: list[str] = field(default_factory=lambda: ["nike", "adidas", "puma"])
+    # Time before the first output token (prompt processing), then per output token.
+    first_token_seconds: float = 0.2
+    token_seconds: float = 0.01
+    # Share of completions answered with a 429.
+    error_rate: float = 0.0
+
+
+CONFIG = FakeConfig()
+STATS = {"completions": 0, "streamed": 0, "rate_limited": 0, "tool_calls": 0, "unbound_tools": 0, "store_lists": 0}
+
+# Scripted turns: the first scenario whose pattern matches the user message
+# decides which tools the "model" calls, one per step, before its final reply.
+SCENARIOS = [
+    (re.compile(r"stock|inventory", re.I), [("list_products", {"per_page": 20})]),
+    (re.compile(r"price|discount .*product", re.I), [
+        ("get_product", {"id": 101}),
+        ("update_product", {"id": 101, "sale_price": "79.00"}),
+    ]),
+    (re.compile(r"coupon|promo", re.I), [
+        ("list_coupons", {}),
+        ("create_coupon", {"code": "LOAD10", "amount": "10", "discount_type": "percent"}),
+    ]),
+    (re.compile(r"order", re.I), [("list_orders", {"status": "processing"})]),
+    (re.compile(r"customer|shopper", re.I), [("list_customers", {})]),
+    (re.compile(r"popup", re.I), [("list_popups", {})]),
+]
+_STORE_RE = re.compile(r"\bstore\s+([a-z0-9-]+)", re.I)
+
+app = FastAPI()
+
+
+@app.get("/healthz")
+def healthz():
+    return {"status": "ok"}
+
+
+@app.get("/stats")
+def stats():
+    return STATS
+
+
+@app.get("/api/stores")
+def stores():
+    STATS["store_lists"] += 1
+    return [{"id": name, "name": name, "namespace": f"store-{name}", "status": "Ready"} for name in CONFIG.stores]
+
+
+def _text(content) -> str:
+    if isinstance(content, list):
+        return " ".join(str(part.get("text", "")) for part in content if isinstance(part, dict))
+    return str(content or "")
+
+
+def _next_step(messages: list, tools: set[str]) -> tuple[Optional[dict], str]:
+    """(tool call or None, reply text) for the conversation so far."""
+    user_index = max((i for i, m in enumerate(messages) if m.get("role") == "user"), default=-1)
+    if user_index < 0:
+        return None, "How can I help with your stores?"
+    request = _text(messages[user_index].get("content"))
+    done = sum(1 for m in messages[user_index + 1:] if m.get("role") == "tool")
+    store = _STORE_RE.search(request)
+    store_name = store.group(1).lower() if store else CONFIG.stores[0]
+
+    plan = next((steps for pattern, steps in SCENARIOS if pattern.search(request)), [])
+    if done < len(plan):
+        name, args = plan[done]
+        if name not in tools:
+            STATS["unbound_tools"] += 1
+            return None, f"I cannot do that right now: {name} is not available."
+        STATS["tool_calls"] += 1
+        return {"id": f"call_{uuid.uuid4().hex[:24]}", "name": name, "args": {"store_name": store_name, **args}}, ""
+    if not plan:
+        return None, f"Store {store_name} is running normally. Tell me what you would like to change."
+    return None, f"Done. I ran {len(plan)} step(s) on store {store_name} and everything succeeded."
+
+
+def _usage(body: dict, completion_tokens: int) -> dict:
+    prompt_tokens = len(json.dumps(body.get("messages") or [])) // 4 + len(json.dumps(body.get("tools") or [])) // 4
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "prompt_tokens_details": {"cached_tokens": 0},
+    }
+
+
+def _tokens(text: str) -> list[str]:
+    return re.findall(r"\S+\s*|\s+", text) or [""]
+
+
+@app.post("/v1/chat/completions")
+async def completions(request: Request):
+    body = await request.json()
+    STATS["completions"] += 1
+    if CONFIG.error_rate and random.random() < CONFIG.error_rate:
+        STATS["rate_limited"] += 1
+        return JSONResponse(
+            {"error": {"code": "429", "message": "Rate limit is exceeded (fake)."}},
+            status_code=429,
+            headers={"retry-after-ms": "200"},
+        )
+
+    tools = {t.get("function", {}).get("name") for t in body.get("tools") or []}
+    call, reply = _next_step(body.get("messages") or [], tools)
+    arguments = json.dumps(call["args"]) if call else ""
+    pieces = _tokens(arguments if call else reply)
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:16]}"
+    model = body.get("model") or "fake"
+    created = int(time.time())
+    usage = _usage(body, len(pieces))
+    await asyncio.sleep(CONFIG.first_token_seconds)
+
+    if not body.get("stream"):
+        await asyncio.sleep(CONFIG.token_seconds * len(pieces))
+        message = {"role": "assistant", "content": reply or None}
+        if call:
+            message["tool_calls"] = [{"id": call["id"], "type": "function", "function": {"name": call["name"], "arguments": arguments}}]
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if call else "stop"}],
+            "usage": usage,
+        }
+
+    STATS["streamed"] += 1
+    include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+
+    def chunk(delta: dict, finish_reason: Optional[str] = None, **extra) -> str:
+        payload = {
+            "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}], **extra,
+        }
+        return f"data: {json.dumps(payload)}\n\n"
+
+    async def events():
+        if call:
+            yield chunk({"role": "assistant", "tool_calls": [
+                {"index": 0, "id": call["id"], "type": "function", "function": {"name": call["name"], "arguments": ""}},
+            ]})
+        else:
+            yield chunk({"role": "assistant", "content": ""})
+        for piece in pieces:
+            await asyncio.sleep(CONFIG.token_seconds)
+            if call:
+                yield chunk({"tool_calls": [{"index": 0, "function": {"arguments": piece}}]})
+            else:
+                yield chunk({"content": piece})
+        yield chunk({}, "tool_calls" if call else "stop")
+        if include_usage:
+            payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                       "choices": [], "usage": usage}
+            yield f"data: {json.dumps(payload)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake OpenAI and /api/stores server for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--stores", default=",".join(CONFIG.stores))
+    parser.add_argument("--first-token-seconds", type=float, default=CONFIG.first_token_seconds)
+    parser.add_argument("--token-seconds", type=float, default=CONFIG.token_seconds)
+    parser.add_argument("--error-rate", type=float, default=CONFIG.error_rate)
+    args = parser.parse_args()
+
+    CONFIG.stores = [s.strip() for s in args.stores.split(",") if s.strip()]
+    CONFIG.first_token_seconds = args.first_token_seconds
+    CONFIG.token_seconds = args.token_seconds
+    CONFIG.error_rate = args.error_rate
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
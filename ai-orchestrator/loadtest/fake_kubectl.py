@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Fake `kubectl` for the load-test harness.
+Answers the commands tools.py runs (`get pods`, `exec <pod> -- wp ...`) with
+canned WordPress/WooCommerce output, after a configurable delay. Calls can fail
+or find their pod restarted. Restarts rename the namespace's pod, so the
+orchestrator has to look it up again, just as it would on a real cluster.
+
+Settings come from the environment:
+    FAKE_KUBECTL_LATENCY       mean seconds per call (uniform +-50%), default 0.05
+    FAKE_KUBECTL_ERROR_RATE    share of execs that fail, default 0
+    FAKE_KUBECTL_RESTART_RATE  share of execs that find their pod restarted, default 0
+    FAKE_KUBECTL_STATE         directory for pod generations and the call log
+    FAKE_STORES                comma-separated store names for `get pods -A`
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import os
+import random
+import sys
+import time
+
+LATENCY = float(os.getenv("FAKE_KUBECTL_LATENCY", "0.05"))
+ERROR_RATE = float(os.getenv("FAKE_KUBECTL_ERROR_RATE", "0"))
+RESTART_RATE = float(os.getenv("FAKE_KUBECTL_RESTART_RATE", "0"))
+STATE_DIR = os.getenv("FAKE_KUBECTL_STATE", "")
+STORES = [s for s in os.getenv("FAKE_STORES", "nike,adidas,puma").split(",") if s]
+
+
+def _record(kind: str) -> None:
+    if STATE_DIR:
+        with open(os.path.join(STATE_DIR, "calls.log"), "a") as handle:
+            handle.write(kind + "\n")
+
+
+def _generations() -> dict:
+    try:
+        with open(os.path.join(STATE_DIR, "pods.json")) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
+
+def _restart(namespace: str) -> None:
+    generations = _generations()
+    generations[namespace] = generations.get(namespace, 0) + 1
+    tmp = os.path.join(STATE_DIR, f"pods.{os.getpid()}.json")
+    with open(tmp, "w") as handle:
+        json.dump(generations, handle)
+    os.replace(tmp, os.path.join(STATE_DIR, "pods.json"))
+
+
+def _pod_name(namespace: str) -> str:
+    return f"wordpress-{namespace}-{_generations().get(namespace, 0)}"
+
+
+def _pod(namespace: str) -> dict:
+    return {
+        "metadata": {"name": _pod_name(namespace), "namespace": namespace,
+                     "labels": {"app.kubernetes.io/component": "wordpress"}},
+        "status": {"phase": "Running", "conditions": [{"type": "Ready", "status": "True"}]},
+    }
+
+
+def _product(i: int) -> dict:
+    return {"id": 100 + i, "name": f"Runner Pro {i}", "sku": f"RUN-{i:03d}", "type": "simple", "status": "publish",
+            "price": "89.00", "regular_price": "99.00", "sale_price": "89.00" if i % 3 == 0 else "",
+            "stock_status": "instock" if i % 5 else "outofstock", "stock_quantity": (i * 7) % 40}
+
+
+def _order(i: int) -> dict:
+    return {"id": 5000 + i, "number": str(5000 + i), "status": "processing", "total": f"{49 + i * 3}.00",
+            "currency": "INR", "date_created": "2026-10-01T10:00:00", "customer_id": 20 + i}
+
+
+def _coupon(i: int) -> dict:
+    return {"id": 300 + i, "code": f"SAVE{i * 5}", "amount": str(i * 5), "discount_type": "percent",
+            "date_expires": None, "usage_count": i}
+
+
+def _customer(i: int) -> dict:
+    return {"id": 20 + i, "email": f"shopper{i}@example.com", "first_name": "Shopper", "last_name": str(i),
+            "username": f"shopper{i}"}
+
+
+def _popup(i: int) -> dict:
+    return {"ID": 700 + i, "post_title": f"Popup {i}", "post_status": "publish"}
+
+
+RESOURCES = {"product": _product, "shop_order": _order, "shop_coupon": _coupon, "customer": _customer}
+
+
+def _format(items, options: dict) -> str:
+    fields = options.get("fields")
+    if fields:
+        keep = fields.split(",")
+        items = [{k: item.get(k) for k in keep} for item in items] if isinstance(items, list) else {k: items.get(k) for k in keep}
+    if options.get("format") == "csv" and isinstance(items, list):
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=list(items[0]) if items else [])
+        writer.writeheader()
+        writer.writerows(items)
+        return out.getvalue()
+    return json.dumps(items)
+
+
+def wp(args: list[str]) -> str:
+    """Canned output for a WP-CLI command line."""
+    words = [a for a in args if not a.startswith("--")]
+    options = dict(a[2:].split("=", 1) for a in args if a.startswith("--") and "=" in a)
+    flags = {a[2:] for a in args if a.startswith("--") and "=" not in a}
+    if words[:1] == ["wc"] and len(words) >= 3 and words[1] in RESOURCES:
+        make, action = RESOURCES[words[1]], words[2]
+        if action == "list":
+            return _format([make(i) for i in range(1, int(options.get("per_page", 10)) + 1)], options)
+        if action in ("get", "update"):
+            item = make(1)
+            item["id"] = int(words[3]) if len(words) > 3 and words[3].isdigit() else item["id"]
+            return _format(item, options) if action == "get" else f"Success: Updated {words[1]} {item['id']}."
+        if action == "create":
+            return "4242" if "porcelain" in flags else "Success: Created 4242."
+        if action == "delete":
+            return f"Success: Deleted {words[1]} {words[3] if len(words) > 3 else ''}."
+    if words[:2] == ["post", "list"]:
+        return _format([_popup(i) for i in range(1, 6)], options)
+    if words[:3] == ["post", "meta", "get"]:
+        return json.dumps({"triggers": [], "cookies": []})
+    if words[:2] == ["post", "create"]:
+        return "701" if "porcelain" in flags else "Success: Created post 701."
+    return "Success: Done."
+
+
+def main(argv: list[str]) -> int:
+    if argv[:1] == ["--context"]:
+        argv = argv[2:]
+    if argv[:2] == ["config", "get-contexts"]:
+        print("k3d-loadtest")
+        return 0
+
+    time.sleep(random.uniform(0.5, 1.5) * LATENCY)
+    namespace = argv[1] if argv[:1] == ["-n"] else None
+    rest = argv[2:] if namespace else argv
+
+    if rest[:2] == ["get", "pods"]:
+        _record("get_pods")
+        names = [namespace] if namespace else [f"store-{s}" for s in STORES]
+        print(json.dumps({"items": [_pod(ns) for ns in names]}))
+        return 0
+
+    if rest[:1] == ["exec"] and namespace:
+        pod = rest[1]
+        if pod != _pod_name(namespace) or random.random() < RESTART_RATE:
+            if pod == _pod_name(namespace):
+                _restart(namespace)
+            _record("restart")
+            sys.stderr.write(f'Error from server (NotFound): pods "{pod}" not found\n')
+            return 1
+        if random.random() < ERROR_RATE:
+            _record("error")
+            sys.stderr.write("error: command terminated with exit code 1 (fake failure)\n")
+            return 1
+        _record("exec")
+        command = rest[rest.index("--") + 1:]
+        start = next((i + 1 for i, part in enumerate(command) if part == "wp" or part.endswith("/wp")), 0)
+        print(wp(command[start:]))
+        return 0
+
+    sys.stderr.write(f"fake kubectl: unsupported command {' '.join(argv)}\n")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
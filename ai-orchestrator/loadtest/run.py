@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Offline load test for /chat.
+
+Serves main.APP with uvicorn and drives N concurrent sessions through it.
+Nothing outside this machine is used. Three stand-ins replace the real
+backends:
+  - the model: loadtest/fake_cluster.py, an OpenAI-compatible server with
+    scripted tool calls and configurable token latency;
+  - the cluster: loadtest/fake_kubectl.py, installed as KUBECTL_BIN, with
+    configurable latency, error and pod-restart rates;
+  - the store list: /api/stores on the same fake server.
+Reports turn latency percentiles, time to first event, events/sec and error
+counts.
+
+    python loadtest/run.py --sessions 20 --turns 5 [--json results.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Optional
+from unittest.mock import patch
+
+import httpx
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+# One message per scripted scenario in fake_cluster.SCENARIOS, plus a chat turn.
+PROMPTS = [
+    "Which products in store {store} are running low on stock?",
+    "Put product 101 in store {store} on sale: lower the price to 79.",
+    "Create a 10% promo coupon for store {store} unless one exists.",
+    "Are there processing orders waiting in store {store}?",
+    "How many customers does store {store} have?",
+    "Which popups are live on store {store}?",
+    "How is store {store} doing today?",
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(values: list[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 4)
+
+
+def _summary(values: list[float]) -> dict:
+    return {
+        "p50": _percentile(values, 0.50),
+        "p90": _percentile(values, 0.90),
+        "p99": _percentile(values, 0.99),
+        "max": round(max(values), 4) if values else None,
+    }
+
+
+def _kubectl_wrapper(state_dir: str) -> str:
+    """An executable that runs fake_kubectl.py with this interpreter."""
+    path = os.path.join(state_dir, "kubectl")
+    with open(path, "w") as handle:
+        handle.write(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.join(HERE, "fake_kubectl.py")}" "$@"\n')
+    os.chmod(path, 0o755)
+    return path
+
+
+def configure_environment(args, state_dir: str, fake_port: int) -> None:
+    """Points the orchestrator at the stand-ins; must run before main is imported."""
+    fake = f"http://127.0.0.1:{fake_port}"
+    os.environ.update({
+        "AZURE_OPENAI_ENDPOINT": f"{fake}/v1",
+        "AZURE_OPENAI_API_KEY": "loadtest",
+        "AZURE_OPENAI_DEPLOYMENT": "fake-gpt",
+        "ORCH_API_BASE": fake,
+        "KUBECTL_BIN": _kubectl_wrapper(state_dir),
+        "KUBECTL_CONTEXT": "",
+        "WP_EXEC_BACKEND": "kubectl",
+        "WP_CLI_SESSIONS": "0",
+        # The fake kubectl has no watch stream; pods are found with `get pods`.
+        "POD_WATCH_ENABLED": "0",
+        "FAST_PATH_ENABLED": "1" if args.fast_path else "0",
+        "FAKE_KUBECTL_LATENCY": str(args.kubectl_latency),
+        "FAKE_KUBECTL_ERROR_RATE": str(args.kubectl_error_rate),
+        "FAKE_KUBECTL_RESTART_RATE": str(args.restart_rate),
+        "FAKE_KUBECTL_STATE": state_dir,
+        "FAKE_STORES": args.stores,
+    })
+    os.environ.pop("AI_CHECKPOINT_URL", None)
+
+
+def start_fake_cluster(args, port: int) -> subprocess.Popen:
+    proc = subprocess.Popen([
+        sys.executable, os.path.join(HERE, "fake_cluster.py"), "--port", str(port), "--stores", args.stores,
+        "--first-token-seconds", str(args.first_token_seconds), "--token-seconds", str(args.token_seconds),
+        "--error-rate", str(args.llm_error_rate),
+    ])
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/healthz", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("fake cluster did not start")
+
+
+class Recorder:
+    def __init__(self):
+        self.turn_seconds: list[float] = []
+        self.first_event_seconds: list[float] = []
+        self.events: Counter = Counter()
+        self.errors: Counter = Counter()
+
+    def record_event(self, event: dict) -> None:
+        kind = event.get("type", "?")
+        self.events[kind] += 1
+        if kind == "error":
+            self.errors["error_events"] += 1
+        elif kind == "tool_result":
+            content = str(event.get("content") or "")
+            if content.startswith("Error") or '"ok": false' in content:
+                self.errors["tool_errors"] += 1
+
+
+async def run_turn(client: httpx.AsyncClient, recorder: Recorder, session_id: str, message: str, stream_tokens: bool) -> None:
+    started = time.perf_counter()
+    first = None
+    final = False
+    buffer = ""
+    try:
+        async with client.stream("POST", "/chat", json={
+            "message": message, "session_id": session_id, "stream_tokens": stream_tokens,
+        }) as response:
+            if response.status_code != 200:
+                recorder.errors[f"http_{response.status_code}"] += 1
+                return
+            async for text in response.aiter_text():
+                if first is None:
+                    first = time.perf_counter() - started
+                buffer += text
+                # Events are separated by a literal "\n" (see main._ndjson_line).
+                *lines, buffer = buffer.split("\\n")
+                for line in lines:
+                    if line.strip():
+                        event = json.loads(line)
+                        final = final or event.get("type") == "final"
+                        recorder.record_event(event)
+    except httpx.HTTPError as exc:
+        recorder.errors[type(exc).__name__] += 1
+        return
+    recorder.turn_seconds.append(time.perf_counter() - started)
+    if first is not None:
+        recorder.first_event_seconds.append(first)
+    if not final:
+        recorder.errors["no_final"] += 1
+
+
+async def drive(args, port: int) -> tuple[Recorder, float, dict]:
+    stores = args.stores.split(",")
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.sessions, max_keepalive_connections=args.sessions)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=args.timeout, limits=limits) as client:
+        async def session(n: int) -> None:
+            for turn in range(args.turns):
+                prompt = PROMPTS[(n + turn) % len(PROMPTS)].format(store=stores[n % len(stores)])
+                await run_turn(client, recorder, f"loadtest-{n}", prompt, args.stream_tokens)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(session(n) for n in range(args.sessions)))
+        elapsed = time.perf_counter() - started
+        service_stats = (await client.get("/stats")).json()
+    return recorder, elapsed, service_stats
+
+
+async def serve_and_drive(args, port: int) -> tuple[Recorder, float, dict]:
+    import uvicorn
+
+    import main
+
+    server = uvicorn.Server(uvicorn.Config(main.APP, host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        if serving.done():
+            serving.result()
+        await asyncio.sleep(0.05)
+    try:
+        return await drive(args, port)
+    finally:
+        server.should_exit = True
+        await serving
+
+
+def _kubectl_calls(state_dir: str) -> dict:
+    try:
+        with open(os.path.join(state_dir, "calls.log")) as handle:
+            return dict(Counter(line.strip() for line in handle))
+    except OSError:
+        return {}
+
+
+def main_cli() -> int:
+    parser = argparse.ArgumentParser(description="Offline /chat load test with a fake model and cluster")
+    parser.add_argument("--sessions", type=int, default=10, help="concurrent sessions")
+    parser.add_argument("--turns", type=int, default=5, help="turns per session")
+    parser.add_argument("--stores", default="nike,adidas,puma")
+    parser.add_argument("--stream-tokens", action="store_true", help="request token events")
+    parser.add_argument("--fast-path", action="store_true", help="leave the deterministic fast path on")
+    parser.add_argument("--first-token-seconds", type=float, default=0.2, help="fake model latency before output")
+    parser.add_argument("--token-seconds", type=float, default=0.01, help="fake model latency per output token")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="share of completions answered with 429")
+    parser.add_argument("--kubectl-latency", type=float, default=0.05, help="mean seconds per kubectl call")
+    parser.add_argument("--kubectl-error-rate", type=float, default=0.0)
+    parser.add_argument("--restart-rate", type=float, default=0.0, help="share of execs that hit a restarted pod")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-turn HTTP timeout")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="orch-loadtest-") as state_dir:
+        fake_port, port = _free_port(), _free_port()
+        configure_environment(args, state_dir, fake_port)
+        fake = start_fake_cluster(args, fake_port)
+        try:
+            # The service logs every step; keep the report readable.
+            logging.getLogger("httpx").setLevel(logging.WARNING)
+            with patch("builtins.print"):
+                recorder, elapsed, service_stats = asyncio.run(serve_and_drive(args, port))
+            fake_stats = httpx.get(f"http://127.0.0.1:{fake_port}/stats").json()
+        finally:
+            fake.terminate()
+            fake.wait()
+        kubectl_calls = _kubectl_calls(state_dir)
+
+    turns = len(recorder.turn_seconds)
+    events = sum(recorder.events.values())
+    results = {
+        "sessions": args.sessions,
+        "turns": turns,
+        "elapsed_seconds": round(elapsed, 3),
+        "turns_per_sec": round(turns / elapsed, 3) if elapsed else None,
+        "events_per_sec": round(events / elapsed, 3) if elapsed else None,
+        "turn_seconds": _summary(recorder.turn_seconds),
+        "first_event_seconds": _summary(recorder.first_event_seconds),
+        "events": dict(recorder.events),
+        "errors": dict(recorder.errors),
+        "fake_model": fake_stats,
+        "fake_kubectl": kubectl_calls,
+        "service": service_stats,
+    }
+
+    print(f"{turns} turns from {args.sessions} sessions in {results['elapsed_seconds']}s "
+          f"({results['turns_per_sec']} turns/s, {results['events_per_sec']} events/s)")
+    for name in ("turn_seconds", "first_event_seconds"):
+        s = results[name]
+        print(f"{name:<20} p50 {s['p50']}  p90 {s['p90']}  p99 {s['p99']}  max {s['max']}")
+    print(f"events: {results['events']}")
+    print(f"errors: {results['errors'] or 'none'}")
+    limiter = service_stats.get("llm_rate_limiter") or {}
+    print(f"llm limiter: {limiter.get('waits')} waits, {limiter.get('wait_seconds')}s waiting, "
+          f"{limiter.get('throttled')} throttled, {limiter.get('retries')} retries")
+    print(f"fake model: {fake_stats}")
+    print(f"fake kubectl: {kubectl_calls}")
+    if args.json:
+        with open(args.json, "w") as handle:
+            json.dump(results, handle, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
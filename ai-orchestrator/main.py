@@ -5,16 +5,33 @@ POST /chat streams intermediate steps and final response as NDJSON.
 """
 
 from __future__ import annotations
-from fastapi import FastAPI, HTTPException
+import asyncio
+import hmac
+import json
+import os
+import re
+import uuid
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, ToolMessage
 from pydantic import BaseModel, Field
 from graph import build_graph
-import os
-import json
-import uuid
-import re
+from catalog_import import MAX_UPLOAD_BYTES, UploadTooLarge, save_upload
+from store_directory import STORE_DIRECTORY
+from tool_cache import TOOL_CACHE, is_mutating_tool
+from rate_limiter import LLM_LIMITER
+from model_cache import MODEL_CACHE
+from session_store import SessionStore
+from checkpoint import open_checkpointer
+from tool_selection import TOOL_SELECTOR
+from fast_path import FAST_PATH, FAST_PATH_ENABLED
+from prompt import PROMPT_CACHE
+from history import AI_HISTORY_SUMMARY, SUMMARIZER, compact, summary_message
+import metrics
+import tracing
+import profiling
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -31,24 +48,61 @@ APP.add_middleware(
 )
 
 GRAPH = build_graph()
-SESSIONS: dict[str, list] = {}
-SESSION_META: dict[str, dict] = {}
+# Histories and task state per session_id; idle and least recently used sessions are evicted.
+SESSIONS = SessionStore()
+metrics.track_sessions(lambda: len(SESSIONS))
 MAX_SESSION_MESSAGES = int(os.getenv("AI_SESSION_MAX", "60"))
+# If set, POST /uploads requires "Authorization: Bearer <token>".
+AI_UPLOAD_TOKEN = os.getenv("AI_UPLOAD_TOKEN", "")
+# Durable copy of SESSIONS shared by all workers (AI_CHECKPOINT_URL); None runs in-memory only.
+CHECKPOINTER = open_checkpointer()
 
 
 def _session_meta(session_key: str) -> dict:
-    meta = SESSION_META.get(session_key)
-    if meta is None:
-        meta = {
+    meta = SESSIONS.meta(session_key)
+    if not meta:
+        meta.update({
             "tasks": [],
             "statuses": [],
             "active_index": None,
             "completed": 0,
-        }
-        SESSION_META[session_key] = meta
+        })
     return meta
 
 
+async def _load_session(session_key: str) -> tuple[list, dict]:
+    """History and task state, reloaded from the checkpoint if another worker moved the session on."""
+    meta = _session_meta(session_key)
+    if CHECKPOINTER is not None:
+        saved = await asyncio.to_thread(CHECKPOINTER.load, session_key, meta.get("checkpoint_head"))
+        if saved is not None:
+            SESSIONS[session_key] = saved.messages
+            meta.clear()
+            meta.update(saved.meta)
+            meta["checkpoint_head"] = saved.head
+    return SESSIONS.get(session_key, []), meta
+
+
+async def _save_session(session_key: str, history: list, turn: list, meta: dict) -> None:
+    kept, dropped = compact(history + turn, max_messages=MAX_SESSION_MESSAGES)
+    SESSIONS[session_key] = kept
+    if dropped and AI_HISTORY_SUMMARY:
+        # The summary is written after the response; the next turn uses whichever summary is ready.
+        SUMMARIZER.submit(session_key, meta, dropped, on_done=_save_summary)
+    if CHECKPOINTER is None:
+        return
+    # Only the turn's messages are written; the checkpoint drops what compact() dropped.
+    # SESSIONS may have evicted or byte-trimmed its copy, which must not shrink the durable one.
+    previous, head = await asyncio.to_thread(CHECKPOINTER.save_turn, session_key, turn, meta, len(kept))
+    # If another worker wrote in between, the local copy is behind: reload on the next turn.
+    meta["checkpoint_head"] = head if previous == (meta.get("checkpoint_head") or 0) else None
+
+
+async def _save_summary(session_key: str, meta: dict) -> None:
+    if CHECKPOINTER is not None:
+        await asyncio.to_thread(CHECKPOINTER.save_meta, session_key, meta)
+
+
 def _set_task_plan(meta: dict, tasks: list[str]) -> None:
     safe_tasks = [str(t).strip() for t in tasks if str(t).strip()]
     meta["tasks"] = safe_tasks
@@ -137,121 +191,190 @@ def _next_pending_task(meta: dict) -> int | None:
 def _is_mutating_tool_call(call: dict) -> bool:
     if not isinstance(call, dict):
         return False
-    name = str(call.get("name") or "").lower()
-    
-    # Dynamic MCP tools are named prefix_toolname (e.g., woo_create_product)
-    # We consider it a mutation if the core tool name starts with a write prefix
-    prefixes = ["create", "update", "delete", "send", "import", "set", "flush", "activate"]
-    return any(f"_{p}_" in f"_{name}_" or name.split('_')[-1].startswith(p) for p in prefixes)
+    return is_mutating_tool(str(call.get("name") or ""))
 
 
 class ChatRequest(BaseModel):
     message: str = Field(..., min_length=3)
     session_id: str | None = None
+    # Opt-in: emit `token` and `tool_call_delta` events while the model generates.
+    stream_tokens: bool = False
+    # Opt-in: end the turn with a `timing` event that breaks down where the time went.
+    timing: bool = False
 
 
-def _ndjson_line(payload: dict) -> str:
+def _ndjson_line(payload: dict, trace_id: str | None = None) -> str:
+    if trace_id:
+        payload = {**payload, "trace_id": trace_id}
     return json.dumps(payload) + "\\n"
 
 def _trim_messages(messages: list) -> list:
-    if len(messages) <= MAX_SESSION_MESSAGES:
-        return messages
-    return messages[-MAX_SESSION_MESSAGES:]
+    # Token budget and AI_SESSION_MAX, never splitting a tool call from its results (history.py).
+    return compact(messages, max_messages=MAX_SESSION_MESSAGES)[0]
 
 
-async def _stream_events(user_input: str, session_id: str | None):
-    try:
-        print(f"DEBUG: Starting stream for input: {user_input}", flush=True)
-        session_key = session_id or str(uuid.uuid4())
-        history = SESSIONS.get(session_key, [])
-        meta = _session_meta(session_key)
-        state = {"messages": history + [HumanMessage(content=user_input)]}
-        last_messages = state["messages"]
-        # LangGraph "values" mode emits the full state after each node execution.
-        # We look at the last message to determine what just happened.
-        async for event in GRAPH.astream(
-            state,
-            stream_mode="values",
-            config={"recursion_limit": 50},
-        ):
-            print(f"DEBUG: Received event keys: {list(event.keys())}", flush=True)
-            messages = event.get("messages", [])
-            if not messages:
-                print("DEBUG: No messages in event", flush=True)
-                continue
-            last_messages = messages
-            
-            last = messages[-1]
-            print(f"DEBUG: Last message type: {type(last)}", flush=True)
-            
-            if isinstance(last, ToolMessage):
-                # A tool just finished executing
-                payload = {
-                    "type": "tool_result",
-                    "name": last.name,
-                    "content": last.content,
-                }
-                print(f"DEBUG: Yielding tool_result: {payload}", flush=True)
-                yield _ndjson_line(payload)
-
-                # Update task progress for mutating tool calls.
-                try:
-                    parsed = json.loads(last.content)
-                except Exception:
-                    parsed = None
-                if isinstance(parsed, dict):
-                    if meta.get("tasks"):
+def _message_delta_events(chunk, metadata: dict) -> list[dict]:
+    """`token` / `tool_call_delta` events for one streamed chunk from the agent node."""
+    if not isinstance(chunk, AIMessageChunk) or (metadata or {}).get("langgraph_node") != "agent":
+        return []
+    events = []
+    if isinstance(chunk.content, str) and chunk.content:
+        events.append({"type": "token", "content": chunk.content})
+    for delta in chunk.tool_call_chunks or []:
+        events.append({
+            "type": "tool_call_delta",
+            "index": delta.get("index"),
+            "id": delta.get("id"),
+            "name": delta.get("name"),
+            "args": delta.get("args") or "",
+        })
+    return events
+
+
+def _message_events(message, meta: dict):
+    """NDJSON payloads for one message a graph node just produced."""
+    if isinstance(message, ToolMessage):
+        # A tool just finished executing
+        payload = {
+            "type": "tool_result",
+            "name": message.name,
+            "content": message.content,
+        }
+        print(f"DEBUG: Yielding tool_result: {payload}", flush=True)
+        yield payload
+
+        # Update task progress for mutating tool calls.
+        try:
+            parsed = json.loads(message.content)
+        except Exception:
+            parsed = None
+        if isinstance(parsed, dict):
+            if meta.get("tasks"):
+                idx = meta.get("active_index")
+                if idx is not None:
+                    status = "completed" if parsed.get("ok") is not False else "failed"
+                    event = _emit_task_progress_event(meta, idx, status)
+                    if event:
+                        yield event
+                    meta["active_index"] = None
+    elif isinstance(message, AIMessage):
+        if (message.content or "").strip() and not meta.get("tasks"):
+            extracted = _extract_tasks_from_content(message.content or "")
+            if extracted:
+                _set_task_plan(meta, extracted)
+                plan_event = _emit_task_plan_event(meta)
+                if plan_event:
+                    yield plan_event
+        # The LLM just spoke
+        if message.tool_calls:
+            # It wants to call a tool
+            payload = {
+                "type": "tool_call",
+                "content": [
+                    {
+                        "name": tc.get("name"),
+                        "args": tc.get("args") or tc.get("arguments"),
+                    }
+                    for tc in message.tool_calls
+                ],
+            }
+            print(f"DEBUG: Yielding tool_call: {payload}", flush=True)
+            yield payload
+            if meta.get("tasks"):
+                for call in payload.get("content") or []:
+                    if _is_mutating_tool_call(call):
                         idx = meta.get("active_index")
+                        if idx is None:
+                            idx = _next_pending_task(meta)
                         if idx is not None:
-                            status = "completed" if parsed.get("ok") is not False else "failed"
-                            event = _emit_task_progress_event(meta, idx, status)
+                            meta["active_index"] = idx
+                            event = _emit_task_progress_event(meta, idx, "in_progress")
                             if event:
-                                yield _ndjson_line(event)
-                            meta["active_index"] = None
-            elif isinstance(last, AIMessage):
-                if (last.content or "").strip() and not meta.get("tasks"):
-                    extracted = _extract_tasks_from_content(last.content or "")
-                    if extracted:
-                        _set_task_plan(meta, extracted)
-                        plan_event = _emit_task_plan_event(meta)
-                        if plan_event:
-                            yield _ndjson_line(plan_event)
-                # The LLM just spoke
-                if last.tool_calls:
-                    # It wants to call a tool
-                    payload = {
-                        "type": "tool_call",
-                        "content": [
-                            {
-                                "name": tc.get("name"),
-                                "args": tc.get("args") or tc.get("arguments"),
-                            }
-                            for tc in last.tool_calls
-                        ],
-                    }
-                    print(f"DEBUG: Yielding tool_call: {payload}", flush=True)
-                    yield _ndjson_line(payload)
-                    if meta.get("tasks"):
-                        for call in payload.get("content") or []:
-                            if _is_mutating_tool_call(call):
-                                idx = meta.get("active_index")
-                                if idx is None:
-                                    idx = _next_pending_task(meta)
-                                if idx is not None:
-                                    meta["active_index"] = idx
-                                    event = _emit_task_progress_event(meta, idx, "in_progress")
-                                    if event:
-                                        yield _ndjson_line(event)
-                                break
-                else:
-                    # Final response (or clarification question)
-                    payload = {"type": "final", "content": last.content}
-                    print(f"DEBUG: Yielding final: {payload}", flush=True)
-                    yield _ndjson_line(payload)
-        SESSIONS[session_key] = _trim_messages(last_messages)
+                                yield event
+                        break
+        else:
+            # Final response (or clarification question)
+            payload = {"type": "final", "content": message.content}
+            print(f"DEBUG: Yielding final: {payload}", flush=True)
+            yield payload
+
+
+async def _stream_events(
+    user_input: str,
+    session_id: str | None,
+    stream_tokens: bool = False,
+    timing: bool = False,
+    profiler: profiling.RequestProfile | None = None,
+):
+    metrics.EVENT_LOOP_LAG_MONITOR.ensure_started()
+    metrics.INFLIGHT_STREAMS.inc()
+    # Spans for the LLM, pod lookups, kubectl attempts and tools nest under this one (tracing.py).
+    trace = tracing.start_trace("chat.turn", stream_tokens=stream_tokens)
+    if profiler is not None:
+        profiler.start(trace.trace_id)
+    try:
+        print(f"DEBUG: Starting stream for input: {user_input}", flush=True)
+        session_key = session_id or str(uuid.uuid4())
+        trace.root.set(session_id=session_key)
+        history, meta = await _load_session(session_key)
+        turn = [HumanMessage(content=user_input)]
+        # Simple reads ("list products in store nike") are answered without the LLM (fast_path.py).
+        fast = await FAST_PATH.answer(user_input) if FAST_PATH_ENABLED else None
+        trace.root.set(fast_path=fast is not None)
+        if fast is not None:
+            for message in fast:
+                turn.append(message)
+                for payload in _message_events(message, meta):
+                    yield _ndjson_line(payload, trace.trace_id)
+        else:
+            # Turns compacted out of the history are carried by the rolling summary.
+            context = [summary_message(meta["summary"])] if meta.get("summary") else []
+            # The session's tool groups only widen so the bound tools stay a cacheable prefix.
+            state = {"messages": context + history + turn, "tool_groups": meta.get("tool_groups") or []}
+            # LangGraph "updates" mode emits only what each node returned, so a step
+            # costs O(new messages) no matter how long the session is. The turn's
+            # messages are collected here and appended to the history at the end.
+            # "custom" carries progress that long-running tools report while they run.
+            # "messages" (opt-in) streams model output token by token.
+            stream_mode = ["updates", "custom"] + (["messages"] if stream_tokens else [])
+            async for mode, event in GRAPH.astream(
+                state,
+                stream_mode=stream_mode,
+                config={"recursion_limit": 50},
+            ):
+                if mode == "messages":
+                    for payload in _message_delta_events(*event):
+                        yield _ndjson_line(payload, trace.trace_id)
+                    continue
+                if mode == "custom":
+                    if isinstance(event, dict) and event.get("type") == "tool_progress":
+                        yield _ndjson_line(event, trace.trace_id)
+                    continue
+                for node, update in event.items():
+                    if (update or {}).get("tool_groups"):
+                        meta["tool_groups"] = update["tool_groups"]
+                    messages = (update or {}).get("messages") or []
+                    print(f"DEBUG: Received {len(messages)} message(s) from {node}", flush=True)
+                    for message in messages:
+                        turn.append(message)
+                        for payload in _message_events(message, meta):
+                            yield _ndjson_line(payload, trace.trace_id)
+            PROMPT_CACHE.record_turn(session_key, turn)
+        await _save_session(session_key, history, turn, meta)
     except Exception as exc:
         print(f"DEBUG: Exception in stream: {exc}", flush=True)
-        yield _ndjson_line({"type": "error", "content": str(exc)})
+        trace.root.set_error(exc)
+        yield _ndjson_line({"type": "error", "content": str(exc)}, trace.trace_id)
+    finally:
+        if profiler is not None:
+            profiler.stop()
+        metrics.INFLIGHT_STREAMS.dec()
+        trace.finish()
+    # Reached after a final or error event; a client disconnect skips these.
+    if timing:
+        yield _ndjson_line(trace.timing_event(), trace.trace_id)
+    if profiler is not None:
+        yield _ndjson_line(await asyncio.to_thread(profiler.write), trace.trace_id)
 
 
 @APP.get("/healthz")
@@ -259,11 +382,56 @@ def healthz():
     return {"status": "ok"}
 
 
+@APP.get("/metrics")
+async def prometheus_metrics():
+    metrics.EVENT_LOOP_LAG_MONITOR.ensure_started()
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+
+@APP.get("/stats")
+def stats():
+    return {
+        "tool_cache": TOOL_CACHE.stats(),
+        "store_directory": STORE_DIRECTORY.stats(),
+        "llm_rate_limiter": LLM_LIMITER.stats(),
+        "model_cache": MODEL_CACHE.stats(),
+        "sessions": SESSIONS.stats(),
+        "history_summaries": SUMMARIZER.stats(),
+        "tool_selection": TOOL_SELECTOR.stats(),
+        "fast_path": FAST_PATH.stats(),
+        "prompt_cache": PROMPT_CACHE.stats(),
+        "checkpoint": CHECKPOINTER.stats() if CHECKPOINTER is not None else None,
+        "tracing": tracing.EXPORTER.stats(),
+    }
+
+
+@APP.post("/uploads")
+async def upload(request: Request):
+    """Stores a raw CSV request body for import_products_csv; returns its upload_id."""
+    if AI_UPLOAD_TOKEN and not hmac.compare_digest(
+        request.headers.get("authorization", ""), f"Bearer {AI_UPLOAD_TOKEN}"
+    ):
+        raise HTTPException(status_code=401, detail="invalid upload token")
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"upload exceeds {MAX_UPLOAD_BYTES} bytes")
+    try:
+        upload_id, size = await save_upload(request.stream())
+    except UploadTooLarge as exc:
+        raise HTTPException(status_code=413, detail=str(exc))
+    return {"upload_id": upload_id, "bytes": size}
+
+
 @APP.post("/chat")
-async def chat(req: ChatRequest):
+async def chat(req: ChatRequest, request: Request):
     if not req.message.strip():
         raise HTTPException(status_code=400, detail="message is required")
+    # Debug-gated (AI_DEBUG_PROFILING); untagged requests only pay for this check (profiling.py).
+    profiler = profiling.RequestProfile() if profiling.requested(request.headers, request.query_params) else None
     return StreamingResponse(
-        _stream_events(req.message, req.session_id),
+        _stream_events(req.message, req.session_id, req.stream_tokens, req.timing, profiler),
         media_type="application/x-ndjson",
+        # A disconnected client may leave the stream unfinished; this still frees the profiler.
+        background=BackgroundTask(profiler.stop) if profiler is not None else None,
     )
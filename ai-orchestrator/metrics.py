@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Prometheus metrics for AI Orchestrator.
+LLM and tool latency histograms, kubectl retry counters, session and stream
+gauges, and event-loop lag, served on GET /metrics. Recording a sample costs a
+few microseconds, so the hooks stay on in production.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Callable, Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import gc_collector, platform_collector, process_collector
+
+from store_directory import STORE_DIRECTORY
+
+# ---- Config ----
+EVENT_LOOP_LAG_INTERVAL_SECONDS = float(os.getenv("EVENT_LOOP_LAG_INTERVAL_SECONDS", "0.5"))
+
+REGISTRY = CollectorRegistry()
+process_collector.ProcessCollector(registry=REGISTRY)
+platform_collector.PlatformCollector(registry=REGISTRY)
+gc_collector.GCCollector(registry=REGISTRY)
+
+_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+_TOKEN_BUCKETS = (64, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536)
+
+LLM_CALL_SECONDS = Histogram(
+    "orch_llm_call_seconds", "Model call latency, including rate-limiter waits and retries.",
+    ["outcome"], buckets=_LATENCY_BUCKETS, registry=REGISTRY,
+)
+LLM_TOKENS = Histogram(
+    "orch_llm_tokens", "Tokens per model call.", ["kind"], buckets=_TOKEN_BUCKETS, registry=REGISTRY,
+)
+TOOL_SECONDS = Histogram(
+    "orch_tool_seconds", "Tool call latency.", ["tool", "store", "outcome"], buckets=_LATENCY_BUCKETS, registry=REGISTRY,
+)
+KUBECTL_RETRIES = Counter(
+    "orch_kubectl_retries_total", "kubectl/exec attempts retried after a transient error or timeout.", ["reason"],
+    registry=REGISTRY,
+)
+KUBECTL_TIMEOUTS = Counter(
+    "orch_kubectl_timeouts_total", "kubectl/exec attempts that timed out.", registry=REGISTRY,
+)
+ACTIVE_SESSIONS = Gauge("orch_active_sessions", "Sessions held in memory.", registry=REGISTRY)
+INFLIGHT_STREAMS = Gauge("orch_inflight_streams", "/chat streams currently open.", registry=REGISTRY)
+EVENT_LOOP_LAG = Histogram(
+    "orch_event_loop_lag_seconds", "How late the event loop ran a timer that was due.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5), registry=REGISTRY,
+)
+EVENT_LOOP_LAG_LAST = Gauge("orch_event_loop_lag_last_seconds", "Most recent event-loop lag sample.", registry=REGISTRY)
+
+
+def observe_llm_call(seconds: float, response=None, error: bool = False) -> None:
+    LLM_CALL_SECONDS.labels("error" if error else "ok").observe(seconds)
+    usage = getattr(response, "usage_metadata", None) or {}
+    if usage.get("input_tokens"):
+        LLM_TOKENS.labels("input").observe(usage["input_tokens"])
+    if usage.get("output_tokens"):
+        LLM_TOKENS.labels("output").observe(usage["output_tokens"])
+    cached = (usage.get("input_token_details") or {}).get("cache_read")
+    if cached:
+        LLM_TOKENS.labels("cached").observe(cached)
+
+
+def tool_outcome(message) -> str:
+    """"ok", or "error" for WP-CLI "Error:" text and {"ok": false} reports."""
+    if getattr(message, "status", None) == "error":
+        return "error"
+    content = getattr(message, "content", "")
+    if isinstance(content, str) and (content.startswith("Error") or '"ok": false' in content[:200]):
+        return "error"
+    return "ok"
+
+
+def observe_tool_call(call: dict, seconds: float, message=None, error: bool = False) -> None:
+    # Store names come from the model; only known namespaces become label values.
+    store_name = str((call.get("args") or {}).get("store_name") or "")
+    store = (STORE_DIRECTORY.cached_key(store_name) or "unknown") if store_name.strip() else "none"
+    outcome = "error" if error else tool_outcome(message)
+    TOOL_SECONDS.labels(str(call.get("name") or "unknown"), store, outcome).observe(seconds)
+
+
+class EventLoopLagMonitor:
+    """Sleeps `interval` seconds in a loop and records how late each wake-up was."""
+
+    def __init__(self, interval: float = EVENT_LOOP_LAG_INTERVAL_SECONDS):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def ensure_started(self) -> None:
+        """Starts the sampler on the running loop; a no-op if it already runs there."""
+        if self.interval <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._task.get_loop() is loop:
+            return
+        self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        clock = time.perf_counter
+        while True:
+            due = clock() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, clock() - due)
+            EVENT_LOOP_LAG.observe(lag)
+            EVENT_LOOP_LAG_LAST.set(lag)
+
+
+EVENT_LOOP_LAG_MONITOR = EventLoopLagMonitor()
+
+
+def track_sessions(count: Callable[[], float]) -> None:
+    ACTIVE_SESSIONS.set_function(count)
+
+
+def render() -> tuple[bytes, str]:
+    """Exposition body and content type for GET /metrics."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
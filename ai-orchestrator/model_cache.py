@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Bound chat model cache for AI Orchestrator.
+Builds the ChatOpenAI client and the OpenAI tool schemas once per (endpoint,
+deployment, tool set) instead of on every turn. All models share one
+keep-alive HTTP pool per event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Optional, Sequence
+
+import httpx
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from langchain_openai import ChatOpenAI
+
+# ---- Config ----
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "50"))
+LLM_HTTP_KEEPALIVE_SECONDS = float(os.getenv("LLM_HTTP_KEEPALIVE_SECONDS", "120"))
+LLM_HTTP_TIMEOUT_SECONDS = float(os.getenv("LLM_HTTP_TIMEOUT_SECONDS", "120"))
+# Tool selection can produce many tool-group combinations; keep the most recent ones.
+MODEL_CACHE_MAX_ENTRIES = int(os.getenv("MODEL_CACHE_MAX_ENTRIES", "32"))
+
+
+def toolset_hash(tools: Sequence[Any]) -> str:
+    """Cheap identity of a tool set: names, descriptions and schema classes, not the schemas."""
+    digest = hashlib.sha256()
+    for tool in tools:
+        schema = getattr(tool, "args_schema", None)
+        digest.update(f"{tool.name}\0{tool.description}\0{getattr(schema, '__qualname__', schema)}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+@dataclass
+class _Entry:
+    schemas: list[dict]
+    model: Any = None
+    http_client: Optional[httpx.AsyncClient] = None
+    builds: int = field(default=0)
+
+
+class ModelCache:
+    """LRU of bound models; every entry shares one keep-alive HTTP pool per event loop."""
+
+    def __init__(self, max_entries: int = MODEL_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, _Entry] = OrderedDict()
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._http_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, tools: Sequence[Any]):
+        """ChatOpenAI bound to `tools`, reused while settings, tools and event loop are unchanged."""
+        endpoint = os.getenv("AZURE_OPENAI_ENDPOINT", "")
+        api_key = os.getenv("AZURE_OPENAI_API_KEY", "")
+        deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT", "")
+        key = (endpoint, deployment, hashlib.sha256(api_key.encode()).hexdigest(), toolset_hash(tools))
+        loop = _running_loop()
+
+        with self._lock:
+            http_client = self._loop_client(loop)
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _Entry(schemas=[convert_to_openai_tool(t) for t in tools])
+                self._entries[key] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            self._entries.move_to_end(key)
+            if entry.model is not None and entry.http_client is http_client:
+                self.hits += 1
+                return entry.model
+            self.misses += 1
+            model = ChatOpenAI(
+                base_url=endpoint,
+                api_key=api_key,
+                model=deployment,
+                temperature=1,
+                http_async_client=http_client,
+                # Retries and 429 backoff are handled by the shared limiter (rate_limiter.py).
+                max_retries=0,
+                include_response_headers=True,
+            )
+            # Schemas are already in OpenAI format, so bind them directly.
+            entry.model = model.bind(tools=entry.schemas) if entry.schemas else model
+            entry.http_client = http_client
+            entry.builds += 1
+            return entry.model
+
+    def _loop_client(self, loop: Optional[asyncio.AbstractEventLoop]) -> httpx.AsyncClient:
+        # Caller holds self._lock. The async pool belongs to the loop that opened it,
+        # so a new loop gets a new pool and the old one is closed.
+        if self._http_client is not None and self._http_loop is loop:
+            return self._http_client
+        if self._http_client is not None:
+            close_later(self._http_client, self._http_loop, loop)
+        self._http_client = httpx.AsyncClient(
+            timeout=LLM_HTTP_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=LLM_HTTP_KEEPALIVE_SECONDS,
+            ),
+        )
+        self._http_loop = loop
+        return self._http_client
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"models": len(self._entries), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def close_later(
+    client: httpx.AsyncClient,
+    owner: Optional[asyncio.AbstractEventLoop],
+    current: Optional[asyncio.AbstractEventLoop],
+) -> None:
+    """Closes a replaced pool on its own loop if that loop still runs, else on the current one."""
+    if owner is not None and owner.is_running() and not owner.is_closed():
+        asyncio.run_coroutine_threadsafe(_aclose_quietly(client), owner)
+    elif current is not None:
+        current.create_task(_aclose_quietly(client))
+
+
+async def _aclose_quietly(client: httpx.AsyncClient) -> None:
+    # Connections opened on a loop that has since closed can fail to shut down cleanly.
+    with contextlib.suppress(Exception):
+        await client.aclose()
+
+
+MODEL_CACHE = ModelCache()
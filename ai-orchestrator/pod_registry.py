@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Watch-driven registry of WordPress pods for AI Orchestrator.
+Keeps a namespace -> ready pod map current from a Kubernetes pod watch, so pod
+lookups are dictionary reads and waiting for a pod is an event, not a poll loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ---- Config ----
+POD_WATCH_ENABLED = os.getenv("POD_WATCH_ENABLED", "1").strip().lower() in {"1", "true", "yes"}
+POD_WATCH_SELECTOR = "app.kubernetes.io/component=wordpress"
+STORE_NAMESPACE_PREFIX = os.getenv("STORE_NAMESPACE_PREFIX", "store-")
+POD_WATCH_SYNC_SECONDS = float(os.getenv("POD_WATCH_SYNC_SECONDS", "10"))
+
+# A watch source yields ("RESET", [pod, ...]) after each (re)list, then
+# ("ADDED" | "MODIFIED" | "DELETED", pod) events. Pods are API-shaped dicts.
+WatchEvent = Tuple[str, object]
+WatchSource = Callable[[], Iterable[WatchEvent]]
+
+
+def pod_is_ready(pod: dict) -> bool:
+    meta = pod.get("metadata") or {}
+    if meta.get("deletionTimestamp"):
+        return False
+    status = pod.get("status") or {}
+    if status.get("phase") != "Running":
+        return False
+    for condition in status.get("conditions") or []:
+        if condition.get("type") == "Ready":
+            return condition.get("status") == "True"
+    return True
+
+
+class PodRegistry:
+    """
+    Background watcher that tracks the ready WordPress pod per store namespace.
+    `on_change(namespace, pod_or_None)` fires whenever a namespace's ready pod changes.
+    """
+
+    def __init__(self, source: WatchSource, on_change: Optional[Callable[[str, Optional[str]], None]] = None):
+        self._source = source
+        self._on_change = on_change
+        # namespace -> {pod name: (ready, creationTimestamp)}
+        self._pods: Dict[str, Dict[str, Tuple[bool, str]]] = {}
+        self._ready: Dict[str, str] = {}
+        self._cond = threading.Condition()
+        self._async_waiters: Dict[str, list[tuple[asyncio.AbstractEventLoop, asyncio.Future]]] = {}
+        self._synced = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.healthy = False
+
+    # ---- lifecycle ----
+
+    def start(self) -> "PodRegistry":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="pod-registry", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        failures = 0
+        while not self._stop.is_set():
+            events = 0
+            try:
+                for kind, payload in self._source():
+                    if self._stop.is_set():
+                        return
+                    events += 1
+                    if kind == "RESET":
+                        self._reset(payload)
+                        failures = 0
+                    else:
+                        self._apply(kind, payload)
+            except Exception as exc:
+                logger.warning(f"Pod watch failed: {exc}")
+                failures += 1
+                self._mark_unhealthy()
+                self._stop.wait(min(30, 2 ** min(failures, 5)))
+                continue
+            # The API server closes watches after its timeout (~5 min); that is not a
+            # failure, so reconnect at once and keep serving the current map. A stream
+            # that ends without a single event is paced so it cannot spin.
+            if not events:
+                self._stop.wait(1)
+
+    # ---- reads ----
+
+    def get(self, namespace: str) -> Optional[str]:
+        """Ready pod for the namespace, or None. O(1)."""
+        return self._ready.get(namespace)
+
+    def wait_for(self, namespace: str, timeout: float) -> Optional[str]:
+        """Blocks until the namespace has a ready pod. None if it times out or the watch is down."""
+        if not self._wait_synced():
+            return None
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                pod = self._ready.get(namespace)
+                if pod or not self.healthy:
+                    return pod
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    async def await_ready(self, namespace: str, timeout: float) -> Optional[str]:
+        """Async version of wait_for; resolved from the watch thread via call_soon_threadsafe."""
+        if not self._synced.is_set():
+            await asyncio.to_thread(self._wait_synced)
+        if not self.healthy:
+            return None
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._cond:
+            pod = self._ready.get(namespace)
+            if pod:
+                return pod
+            self._async_waiters.setdefault(namespace, []).append((loop, future))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            with self._cond:
+                waiters = self._async_waiters.get(namespace) or []
+                if (loop, future) in waiters:
+                    waiters.remove((loop, future))
+
+    def _wait_synced(self) -> bool:
+        self._synced.wait(POD_WATCH_SYNC_SECONDS)
+        return self.healthy
+
+    # ---- updates ----
+
+    def _reset(self, pods: Iterable[dict]) -> None:
+        with self._cond:
+            previous = dict(self._ready)
+            self._pods = {}
+            for pod in pods:
+                self._store_pod(pod)
+            self._ready = {}
+            for namespace in self._pods:
+                self._recompute(namespace)
+            self.healthy = True
+            changed = {
+                ns for ns in set(previous) | set(self._ready)
+                if previous.get(ns) != self._ready.get(ns)
+            }
+            self._notify(changed)
+        self._synced.set()
+
+    def _apply(self, kind: str, pod: dict) -> None:
+        namespace = (pod.get("metadata") or {}).get("namespace") or ""
+        if not namespace.startswith(STORE_NAMESPACE_PREFIX):
+            return
+        with self._cond:
+            before = self._ready.get(namespace)
+            if kind == "DELETED":
+                name = (pod.get("metadata") or {}).get("name")
+                self._pods.get(namespace, {}).pop(name, None)
+            else:
+                self._store_pod(pod)
+            self._recompute(namespace)
+            if self._ready.get(namespace) != before:
+                self._notify({namespace})
+
+    def _store_pod(self, pod: dict) -> None:
+        meta = pod.get("metadata") or {}
+        namespace = meta.get("namespace") or ""
+        name = meta.get("name")
+        if not name or not namespace.startswith(STORE_NAMESPACE_PREFIX):
+            return
+        self._pods.setdefault(namespace, {})[name] = (pod_is_ready(pod), str(meta.get("creationTimestamp") or ""))
+
+    def _recompute(self, namespace: str) -> None:
+        ready = [(created, name) for name, (ok, created) in self._pods.get(namespace, {}).items() if ok]
+        if ready:
+            # Prefer the newest ready pod during rollouts.
+            self._ready[namespace] = max(ready)[1]
+        else:
+            self._ready.pop(namespace, None)
+
+    def _notify(self, namespaces: set[str]) -> None:
+        # Caller holds self._cond.
+        self._cond.notify_all()
+        for namespace in namespaces:
+            pod = self._ready.get(namespace)
+            if pod:
+                for loop, future in self._async_waiters.pop(namespace, []):
+                    loop.call_soon_threadsafe(_resolve, future, pod)
+            if self._on_change:
+                try:
+                    self._on_change(namespace, pod)
+                except Exception as exc:
+                    logger.warning(f"Pod registry callback failed: {exc}")
+
+    def _mark_unhealthy(self) -> None:
+        with self._cond:
+            self.healthy = False
+            self._cond.notify_all()
+            waiters, self._async_waiters = self._async_waiters, {}
+        for items in waiters.values():
+            for loop, future in items:
+                loop.call_soon_threadsafe(_resolve, future, None)
+        self._synced.set()
+
+
+def _resolve(future: asyncio.Future, value: Optional[str]) -> None:
+    if not future.done():
+        future.set_result(value)
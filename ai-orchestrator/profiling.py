@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+On-demand request profiling for AI Orchestrator.
+With AI_DEBUG_PROFILING on, a /chat request tagged with the X-Debug-Profile
+header or ?profile=1 runs under cProfile. The profile covers graph execution,
+tool calls and stream serialisation. It is written as a pstats .prof file,
+and its path is returned in a final `profile` event. Untagged requests only
+pay for the flag check.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import tempfile
+import threading
+import time
+from typing import Mapping, Optional
+
+# ---- Config ----
+AI_DEBUG_PROFILING = os.getenv("AI_DEBUG_PROFILING", "0").strip().lower() in {"1", "true", "yes"}
+# If set, the header/query value must match it.
+AI_DEBUG_PROFILING_TOKEN = os.getenv("AI_DEBUG_PROFILING_TOKEN", "")
+AI_PROFILE_DIR = os.getenv("AI_PROFILE_DIR", "") or os.path.join(tempfile.gettempdir(), "urumi-profiles")
+PROFILE_HEADER = "x-debug-profile"
+PROFILE_TOP_FUNCTIONS = 10
+
+# cProfile hooks the whole thread, so one request is profiled at a time.
+_ACTIVE = threading.Lock()
+
+
+def requested(headers: Mapping[str, str], query: Mapping[str, str]) -> bool:
+    """Whether a request asks to be profiled and is allowed to."""
+    if not AI_DEBUG_PROFILING:
+        return False
+    value = headers.get(PROFILE_HEADER) or query.get("profile")
+    if not value or value.strip().lower() in {"0", "false", "no"}:
+        return False
+    if AI_DEBUG_PROFILING_TOKEN:
+        return hmac.compare_digest(value.strip(), AI_DEBUG_PROFILING_TOKEN)
+    return True
+
+
+class RequestProfile:
+    """cProfile around one request. Other coroutines on the loop while it runs are included too."""
+
+    def __init__(self, name: str = "", directory: str = ""):
+        self.name = name
+        self.directory = directory or AI_PROFILE_DIR
+        self.profiler: Optional[cProfile.Profile] = None
+        self.started = 0.0
+        self.elapsed = 0.0
+        self.stopped = False
+
+    def start(self, name: str = "") -> "RequestProfile":
+        self.name = name or self.name
+        if not _ACTIVE.acquire(blocking=False):
+            return self
+        self.started = time.perf_counter()
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+        return self
+
+    def stop(self) -> None:
+        """Stops profiling; call it on the thread that started it. Safe to call more than once."""
+        if self.profiler is None or self.stopped:
+            return
+        self.stopped = True
+        self.profiler.disable()
+        self.elapsed = time.perf_counter() - self.started
+        _ACTIVE.release()
+
+    def write(self) -> dict:
+        """Saves the .prof file and returns the `profile` event; may run on a worker thread after stop()."""
+        if self.profiler is None:
+            return {"type": "profile", "error": "another request is being profiled"}
+        path = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{self.name}.prof")
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self.profiler.dump_stats(path)
+        except OSError as exc:
+            return {"type": "profile", "error": f"could not write profile: {exc}"}
+        return {
+            "type": "profile",
+            "path": path,
+            "format": "pstats",
+            "duration_ms": round(self.elapsed * 1000, 3),
+            "top": top_functions(self.profiler),
+        }
+
+
+def top_functions(profiler: cProfile.Profile, limit: int = PROFILE_TOP_FUNCTIONS) -> list[dict]:
+    """The functions with the most cumulative time, for a quick look without opening the file."""
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, line, function), (_, calls, _, cumulative, _) in stats.stats.items():
+        rows.append({
+            "function": f"{os.path.basename(filename)}:{line}({function})",
+            "calls": calls,
+            "cumulative_ms": round(cumulative * 1000, 3),
+        })
+    rows.sort(key=lambda row: -row["cumulative_ms"])
+    return rows[:limit]
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Prompt assembly for AI Orchestrator.
+Lays out model input so the provider's prompt cache can reuse it: the system
+prompt, summary and history form a byte-stable prefix, and context that changes
+between calls (store list, current store) goes last. Also tallies the cached
+prompt tokens reported by the API.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import deque
+from typing import Optional
+
+from langchain_core.messages import AIMessage, SystemMessage
+
+from history import is_summary
+
+SYSTEM_PROMPT = """
+You are a deterministic store orchestration agent.
+
+Rules:
+- Always inspect before mutating.
+- Never hallucinate tool arguments.
+- Use exact tool names.
+- If store not specified and multiple exist, request clarification.
+- The last system message describes the current system state; it overrides earlier ones.
+"""
+
+# One instance, so the prefix is the same object and the same bytes on every call.
+SYSTEM_MESSAGE = SystemMessage(content=SYSTEM_PROMPT)
+
+
+def volatile_context(stores: Optional[list], focus: Optional[str]) -> str:
+    """Store list and current store: the parts of the prompt that change between turns."""
+    parts = []
+    if isinstance(stores, list) and stores:
+        names = sorted(str(s.get("name") or s.get("id")) for s in stores)
+        text = f"CURRENT SYSTEM STATE: The following stores are available: {', '.join(names)}. "
+        if len(names) == 1:
+            text += f"Automatically use store '{names[0]}' for all operations unless the user explicitly names a different one."
+        else:
+            text += "You must identify which store the user is referring to. If it is ambiguous, ask for clarification from the available list."
+        parts.append(text)
+    if focus:
+        parts.append(f"Current focus: Store '{focus}'. Please ensure all tool calls use this store name.")
+    return "\n\n".join(parts)
+
+
+def build_prompt(messages: list, stores: Optional[list] = None, focus: Optional[str] = None) -> list:
+    """System prompt, rolling summary and conversation, then the volatile context last."""
+    summaries = [m for m in messages if is_summary(m)]
+    conversation = [m for m in messages if not isinstance(m, SystemMessage)]
+    context = volatile_context(stores, focus)
+    tail = [SystemMessage(content=context)] if context else []
+    return [SYSTEM_MESSAGE, *summaries, *conversation, *tail]
+
+
+class PromptCacheStats:
+    """Prompt and cached-token counts from the model responses of each turn."""
+
+    def __init__(self, recent: int = 50):
+        self._lock = threading.Lock()
+        self.turns = 0
+        self.calls = 0
+        self.input_tokens = 0
+        self.cached_tokens = 0
+        self.recent: deque = deque(maxlen=recent)
+
+    def record_turn(self, session_id: str, messages: list) -> Optional[dict]:
+        """Sums usage over the turn's model responses; None if there were none."""
+        calls = input_tokens = cached_tokens = 0
+        for message in messages:
+            usage = getattr(message, "usage_metadata", None) if isinstance(message, AIMessage) else None
+            if not usage:
+                continue
+            calls += 1
+            input_tokens += usage.get("input_tokens") or 0
+            cached_tokens += (usage.get("input_token_details") or {}).get("cache_read") or 0
+        if not calls:
+            return None
+        turn = {"session_id": session_id, "calls": calls, "input_tokens": input_tokens, "cached_tokens": cached_tokens}
+        with self._lock:
+            self.turns += 1
+            self.calls += calls
+            self.input_tokens += input_tokens
+            self.cached_tokens += cached_tokens
+            self.recent.append(turn)
+        return turn
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "turns": self.turns,
+                "calls": self.calls,
+                "input_tokens": self.input_tokens,
+                "cached_tokens": self.cached_tokens,
+                "cache_hit_ratio": round(self.cached_tokens / self.input_tokens, 4) if self.input_tokens else None,
+                "recent_turns": list(self.recent),
+            }
+
+
+PROMPT_CACHE = PromptCacheStats()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Process-wide LLM rate limiter for AI Orchestrator.
+Token buckets for requests and tokens shared by every session, calibrated from
+the x-ratelimit-* headers Azure OpenAI returns and paused by Retry-After on 429s,
+so calls only wait when the deployment is actually near its quota.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import Mapping, Optional
+
+import openai
+from langchain_core.messages import AIMessage
+
+logger = logging.getLogger(__name__)
+
+# ---- Config ----
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "120"))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "120000"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_MAX_BACKOFF_SECONDS = float(os.getenv("LLM_MAX_BACKOFF_SECONDS", "60"))
+# Completion allowance added to the prompt estimate until usage is known.
+LLM_COMPLETION_TOKENS_ESTIMATE = int(os.getenv("LLM_COMPLETION_TOKENS_ESTIMATE", "512"))
+
+
+class TokenBucket:
+    """Continuous-refill bucket. Reservations may overdraw it; the caller waits off the debt."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self._level = per_minute
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._level = min(self.capacity, self._level + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def reserve(self, amount: float) -> float:
+        """Takes `amount` now and returns how long to wait before using it."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._level -= amount
+            return 0.0 if self._level >= 0 else -self._level / self.rate
+
+    def adjust(self, amount: float) -> None:
+        """Returns (positive) or charges (negative) tokens after the real cost is known."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._level = min(self.capacity, self._level + amount)
+
+    def calibrate(self, remaining: Optional[float] = None, limit: Optional[float] = None) -> None:
+        """Applies server-reported quota; other replicas share it, so never trust more than the server."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if limit and limit > 0 and limit != self.capacity:
+                self.capacity = limit
+                self.rate = limit / 60.0
+            if remaining is not None:
+                self._level = min(self._level, remaining)
+
+    @property
+    def level(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._level
+
+
+class LLMRateLimiter:
+    def __init__(
+        self,
+        requests_per_minute: float = LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute: float = LLM_TOKENS_PER_MINUTE,
+        max_retries: int = LLM_MAX_RETRIES,
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self._paused_until = 0.0
+        self.calls = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.last_wait_seconds = 0.0
+        self.throttled = 0
+        self.retries = 0
+
+    # ---- budget ----
+
+    async def acquire(self, estimated_tokens: int) -> float:
+        """Waits until one request and `estimated_tokens` fit the budget; returns the wait."""
+        wait = max(
+            self.requests.reserve(1),
+            self.tokens.reserve(estimated_tokens),
+            self._paused_until - time.monotonic(),
+            0.0,
+        )
+        self.calls += 1
+        self.last_wait_seconds = wait
+        if wait > 0:
+            self.waits += 1
+            self.wait_seconds += wait
+            await asyncio.sleep(wait)
+        return wait
+
+    async def _wait_for_pause(self) -> None:
+        wait = self._paused_until - time.monotonic()
+        if wait > 0:
+            self.waits += 1
+            self.wait_seconds += wait
+            await asyncio.sleep(wait)
+
+    def observe(self, headers: Optional[Mapping[str, str]]) -> None:
+        """Calibrates both buckets from x-ratelimit-* response headers."""
+        headers = _lower(headers)
+        self.requests.calibrate(
+            remaining=_number(headers.get("x-ratelimit-remaining-requests")),
+            limit=_number(headers.get("x-ratelimit-limit-requests")),
+        )
+        self.tokens.calibrate(
+            remaining=_number(headers.get("x-ratelimit-remaining-tokens")),
+            limit=_number(headers.get("x-ratelimit-limit-tokens")),
+        )
+
+    def pause(self, headers: Optional[Mapping[str, str]], attempt: int) -> float:
+        """Blocks all callers after a 429: Retry-After if given, else jittered exponential backoff."""
+        self.throttled += 1
+        delay = retry_after_seconds(headers)
+        if delay is None:
+            delay = min(LLM_MAX_BACKOFF_SECONDS, 2 ** attempt) * (0.5 + random.random() / 2)
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        self.requests.calibrate(remaining=0)
+        return delay
+
+    # ---- calls ----
+
+    async def ainvoke(self, model, messages: list):
+        """model.ainvoke(messages) under the shared budget, retrying 429s and transient errors."""
+        estimate = estimate_tokens(messages) + LLM_COMPLETION_TOKENS_ESTIMATE
+        # The estimate is reserved once; retries only wait out a 429 pause.
+        await self.acquire(estimate)
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await self._wait_for_pause()
+            try:
+                response = await model.ainvoke(messages)
+            except openai.RateLimitError as exc:
+                if attempt == self.max_retries:
+                    self.tokens.adjust(estimate)
+                    raise
+                self.retries += 1
+                delay = self.pause(exc.response.headers if exc.response is not None else None, attempt)
+                logger.warning(f"LLM rate limited; pausing calls for {delay:.1f}s")
+                continue
+            except (openai.APIConnectionError, openai.InternalServerError) as exc:
+                if attempt == self.max_retries:
+                    self.tokens.adjust(estimate)
+                    raise
+                self.retries += 1
+                await asyncio.sleep(min(LLM_MAX_BACKOFF_SECONDS, 2 ** attempt))
+                logger.warning(f"LLM call failed, retrying: {exc}")
+                continue
+            metadata = getattr(response, "response_metadata", None) or {}
+            self.observe(metadata.get("headers"))
+            used = (getattr(response, "usage_metadata", None) or {}).get("total_tokens")
+            if used:
+                self.tokens.adjust(estimate - used)
+            return response
+
+    def stats(self) -> dict:
+        return {
+            "requests_available": round(self.requests.level, 1),
+            "requests_per_minute": self.requests.capacity,
+            "tokens_available": round(self.tokens.level),
+            "tokens_per_minute": self.tokens.capacity,
+            "paused_for_seconds": round(max(0.0, self._paused_until - time.monotonic()), 3),
+            "calls": self.calls,
+            "waits": self.waits,
+            "wait_seconds": round(self.wait_seconds, 3),
+            "last_wait_seconds": round(self.last_wait_seconds, 3),
+            "throttled": self.throttled,
+            "retries": self.retries,
+        }
+
+
+def estimate_tokens(messages: list) -> int:
+    # ~4 characters per token is close enough for budgeting; usage corrects it afterwards.
+    chars = 0
+    for message in messages:
+        content = getattr(message, "content", message)
+        chars += len(content) if isinstance(content, str) else len(str(content))
+        # Only AI messages carry tool calls; probing others goes through pydantic's slow __getattr__.
+        if isinstance(message, AIMessage) and message.tool_calls:
+            chars += len(str(message.tool_calls))
+    return chars // 4 + 4 * len(messages)
+
+
+def retry_after_seconds(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    headers = _lower(headers)
+    millis = _number(headers.get("retry-after-ms"))
+    if millis is not None:
+        return millis / 1000.0
+    return _number(headers.get("retry-after"))
+
+
+def _lower(headers: Optional[Mapping[str, str]]) -> dict:
+    return {str(k).lower(): v for k, v in (headers or {}).items()}
+
+
+def _number(value) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+LLM_LIMITER = LLMRateLimiter()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Bounded chat session store for AI Orchestrator.
+Keeps each session's message history and task metadata in an LRU with an idle
+TTL, a session count limit and approximate per-session and total byte budgets.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+# ---- Config ----
+AI_SESSIONS_MAX = int(os.getenv("AI_SESSIONS_MAX", "1000"))
+AI_SESSION_IDLE_SECONDS = float(os.getenv("AI_SESSION_IDLE_SECONDS", "3600"))
+AI_SESSION_MAX_BYTES = int(os.getenv("AI_SESSION_MAX_BYTES", str(512 * 1024)))
+AI_SESSIONS_MAX_BYTES = int(os.getenv("AI_SESSIONS_MAX_BYTES", str(64 * 1024 * 1024)))
+# Rough cost of a message object itself (pydantic model, ids, metadata) on top of its text.
+MESSAGE_OVERHEAD_BYTES = 256
+
+
+def message_bytes(message) -> int:
+    """Approximate memory held by one message: its text plus a fixed object overhead."""
+    content = getattr(message, "content", message)
+    size = len(content) if isinstance(content, str) else len(str(content))
+    if isinstance(message, AIMessage) and message.tool_calls:
+        size += len(str(message.tool_calls))
+    return size + MESSAGE_OVERHEAD_BYTES
+
+
+@dataclass
+class _Session:
+    messages: list = field(default_factory=list)
+    meta: dict = field(default_factory=dict)
+    bytes: int = 0
+    touched: float = field(default_factory=time.monotonic)
+
+
+class SessionStore:
+    """LRU of chat sessions; the least recently used session is evicted first."""
+
+    def __init__(
+        self,
+        max_sessions: int = AI_SESSIONS_MAX,
+        idle_seconds: float = AI_SESSION_IDLE_SECONDS,
+        session_max_bytes: int = AI_SESSION_MAX_BYTES,
+        max_bytes: int = AI_SESSIONS_MAX_BYTES,
+    ):
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.session_max_bytes = session_max_bytes
+        self.max_bytes = max_bytes
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.evictions = {"lru": 0, "idle": 0, "bytes": 0}
+        self.trimmed_messages = 0
+
+    # ---- public API ----
+
+    def get(self, key: str, default: Optional[list] = None) -> Optional[list]:
+        """Message history of a session, or `default` when it is unknown or expired."""
+        with self._lock:
+            self._expire()
+            session = self._touch(key)
+            return session.messages if session and session.messages else default
+
+    def meta(self, key: str) -> dict:
+        """Task metadata of a session, created empty when the session is new."""
+        with self._lock:
+            self._expire()
+            session = self._touch(key)
+            if session is None:
+                session = self._sessions[key] = _Session()
+                self._evict()
+            return session.meta
+
+    def __setitem__(self, key: str, messages: list) -> None:
+        with self._lock:
+            self._expire()
+            session = self._touch(key)
+            if session is None:
+                session = self._sessions[key] = _Session()
+            messages, size = self._fit(list(messages))
+            self.bytes += size - session.bytes
+            session.messages = messages
+            session.bytes = size
+            self._evict()
+
+    def pop(self, key: str, default: Optional[list] = None) -> Optional[list]:
+        with self._lock:
+            session = self._sessions.pop(key, None)
+            if session is None:
+                return default
+            self.bytes -= session.bytes
+            return session.messages
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+            self.bytes = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._expire()
+            return {
+                "sessions": len(self._sessions),
+                "messages": sum(len(s.messages) for s in self._sessions.values()),
+                "bytes": self.bytes,
+                "max_sessions": self.max_sessions,
+                "max_bytes": self.max_bytes,
+                "evictions": dict(self.evictions),
+                "trimmed_messages": self.trimmed_messages,
+            }
+
+    # ---- internals ----
+
+    def _touch(self, key: str) -> Optional[_Session]:
+        session = self._sessions.get(key)
+        if session is not None:
+            session.touched = time.monotonic()
+            self._sessions.move_to_end(key)
+        return session
+
+    def _fit(self, messages: list) -> tuple[list, int]:
+        """Drops the oldest messages until the session fits its byte budget."""
+        sizes = [message_bytes(m) for m in messages]
+        size = sum(sizes)
+        start = 0
+        while start < len(messages) - 1 and size > self.session_max_bytes:
+            size -= sizes[start]
+            start += 1
+        # A tool result whose tool call was dropped would be rejected by the model.
+        while start < len(messages) - 1 and isinstance(messages[start], ToolMessage):
+            size -= sizes[start]
+            start += 1
+        self.trimmed_messages += start
+        return (messages[start:] if start else messages), size
+
+    def _expire(self) -> None:
+        # Entries are in last-use order, so idle ones are at the front.
+        cutoff = time.monotonic() - self.idle_seconds
+        while self._sessions:
+            key, session = next(iter(self._sessions.items()))
+            if session.touched > cutoff:
+                break
+            self._drop(key, "idle")
+
+    def _evict(self) -> None:
+        while len(self._sessions) > self.max_sessions:
+            self._drop(next(iter(self._sessions)), "lru")
+        while self.bytes > self.max_bytes and len(self._sessions) > 1:
+            self._drop(next(iter(self._sessions)), "bytes")
+
+    def _drop(self, key: str, reason: str) -> None:
+        session = self._sessions.pop(key)
+        self.bytes -= session.bytes
+        self.evictions[reason] += 1
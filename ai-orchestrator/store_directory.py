@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Shared store directory for AI Orchestrator.
+Caches `/api/stores` from the Go orchestrator behind keep-alive HTTP clients,
+with a TTL, stale-while-revalidate refresh and an O(1) name/id/namespace index.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import httpx
+
+from model_cache import close_later
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+# ---- Config ----
+STORE_DIRECTORY_TTL_SECONDS = float(os.getenv("STORE_DIRECTORY_TTL_SECONDS", "30"))
+STORE_DIRECTORY_TIMEOUT_SECONDS = float(os.getenv("STORE_DIRECTORY_TIMEOUT_SECONDS", "10"))
+# A lookup miss forces a refresh (e.g. a store created seconds ago), at most this often.
+STORE_DIRECTORY_MISS_REFRESH_SECONDS = float(os.getenv("STORE_DIRECTORY_MISS_REFRESH_SECONDS", "2"))
+
+
+def normalize_store_name(text: str) -> str:
+    name = (text or "").strip().lower()
+    if name.startswith("store "):
+        name = name[len("store "):]
+    if name.endswith(" store"):
+        name = name[: -len(" store")]
+    return name.strip()
+
+
+@dataclass
+class _Snapshot:
+    stores: list[dict]
+    fetched_at: float
+    index: Dict[str, dict] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, stores: list[dict]) -> "_Snapshot":
+        index: Dict[str, dict] = {}
+        for store in stores:
+            if not isinstance(store, dict):
+                continue
+            for key in ("name", "id", "namespace"):
+                value = str(store.get(key, "")).lower()
+                if value:
+                    index.setdefault(value, store)
+        return cls(stores=stores, fetched_at=time.monotonic(), index=index)
+
+
+class StoreDirectory:
+    """Process-wide view of the orchestrator's store list."""
+
+    def __init__(
+        self,
+        base_url: str | None = None,
+        ttl: float = STORE_DIRECTORY_TTL_SECONDS,
+        timeout: float = STORE_DIRECTORY_TIMEOUT_SECONDS,
+        transport: httpx.BaseTransport | None = None,
+        async_transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self._base_url = base_url
+        self.ttl = ttl
+        self._timeout = timeout
+        self._transport = transport
+        self._async_transport = async_transport
+        self._snapshot: Optional[_Snapshot] = None
+        self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._inflight: Optional[asyncio.Task] = None
+        self.fetches = 0
+        self.errors = 0
+
+    @property
+    def url(self) -> str:
+        # Read lazily so a .env loaded after import still applies.
+        base = self._base_url or os.getenv("ORCH_API_BASE", "http://localhost:8080")
+        return f"{base.rstrip('/')}/api/stores"
+
+    # ---- public API ----
+
+    def stores(self) -> Optional[list[dict]]:
+        """Store list, refreshing synchronously only when nothing is cached yet."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self._refresh()
+        elif self._is_stale(snapshot):
+            self._refresh_in_background()
+        return snapshot.stores if snapshot else None
+
+    async def astores(self) -> Optional[list[dict]]:
+        """Async version of stores()."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = await self._arefresh()
+        elif self._is_stale(snapshot):
+            self._arefresh_in_background()
+        return snapshot.stores if snapshot else None
+
+    def match(self, store_name: str) -> Optional[dict]:
+        """Store record whose name, id or namespace equals the normalised name."""
+        if self.stores() is None:
+            return None
+        needle = normalize_store_name(store_name)
+        record = self._lookup(needle)
+        if record is None and self._may_refresh_on_miss():
+            self._refresh()
+            record = self._lookup(needle)
+        return record
+
+    async def amatch(self, store_name: str) -> Optional[dict]:
+        """Async version of match()."""
+        if await self.astores() is None:
+            return None
+        needle = normalize_store_name(store_name)
+        record = self._lookup(needle)
+        if record is None and self._may_refresh_on_miss():
+            await self._arefresh()
+            record = self._lookup(needle)
+        return record
+
+    def cached_key(self, store_name: str) -> Optional[str]:
+        """Namespace (or id) of the store the name refers to, from the cached list only; never fetches."""
+        record = self._lookup(normalize_store_name(store_name))
+        if record is None:
+            return None
+        return str(record.get("namespace") or record.get("id") or "").lower() or None
+
+    def invalidate(self) -> None:
+        self._snapshot = None
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "stores": len(snapshot.stores) if snapshot else 0,
+            "age_seconds": round(time.monotonic() - snapshot.fetched_at, 3) if snapshot else None,
+            "fetches": self.fetches,
+            "errors": self.errors,
+        }
+
+    # ---- internals ----
+
+    def _lookup(self, needle: str) -> Optional[dict]:
+        snapshot = self._snapshot
+        return snapshot.index.get(needle) if snapshot else None
+
+    def _is_stale(self, snapshot: _Snapshot) -> bool:
+        return time.monotonic() - snapshot.fetched_at >= self.ttl
+
+    def _may_refresh_on_miss(self) -> bool:
+        snapshot = self._snapshot
+        return snapshot is None or time.monotonic() - snapshot.fetched_at >= STORE_DIRECTORY_MISS_REFRESH_SECONDS
+
+    def _store(self, data) -> _Snapshot:
+        stores = data if isinstance(data, list) else (data or {}).get("stores", [])
+        snapshot = _Snapshot.build(stores or [])
+        self._snapshot = snapshot
+        return snapshot
+
+    def _sync_client(self) -> httpx.Client:
+        if self._client is None:
+            self._client = httpx.Client(timeout=self._timeout, transport=self._transport)
+        return self._client
+
+    def _loop_client(self) -> httpx.AsyncClient:
+        # AsyncClient pools are bound to the loop that created them.
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            if self._async_client is not None:
+                close_later(self._async_client, self._async_client_loop, loop)
+            self._async_client = httpx.AsyncClient(timeout=self._timeout, transport=self._async_transport)
+            self._async_client_loop = loop
+        return self._async_client
+
+    def _refresh(self) -> Optional[_Snapshot]:
+        with span("store_directory.fetch"):
+            return self._fetch()
+
+    def _fetch(self) -> Optional[_Snapshot]:
+        self.fetches += 1
+        try:
+            resp = self._sync_client().get(self.url)
+            if resp.status_code != 200:
+                self.errors += 1
+                return self._snapshot
+            return self._store(resp.json())
+        except Exception as exc:
+            self.errors += 1
+            logger.warning(f"Could not fetch stores: {exc}")
+            return self._snapshot
+
+    async def _arefresh(self) -> Optional[_Snapshot]:
+        # Single-flight: concurrent callers share one request.
+        if not self._has_inflight():
+            self._inflight = asyncio.ensure_future(self._afetch())
+        return await asyncio.shield(self._inflight)
+
+    def _has_inflight(self) -> bool:
+        task = self._inflight
+        return task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop()
+
+    async def _afetch(self) -> Optional[_Snapshot]:
+        with span("store_directory.fetch"):
+            return await self._afetch_once()
+
+    async def _afetch_once(self) -> Optional[_Snapshot]:
+        self.fetches += 1
+        try:
+            resp = await self._loop_client().get(self.url)
+            if resp.status_code != 200:
+                self.errors += 1
+                return self._snapshot
+            return self._store(resp.json())
+        except Exception as exc:
+            self.errors += 1
+            logger.warning(f"Could not fetch stores: {exc}")
+            return self._snapshot
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self._refresh()
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name="store-directory-refresh", daemon=True).start()
+
+    def _arefresh_in_background(self) -> None:
+        if self._has_inflight():
+            return
+        self._inflight = asyncio.ensure_future(self._afetch())
+
+
+STORE_DIRECTORY = StoreDirectory()
+
+
+def store_key(store_name: str) -> str:
+    """One key per store for its aliases ("nike", "store-nike", "Nike store"); the normalised name if unknown."""
+    return STORE_DIRECTORY.cached_key(store_name) or normalize_store_name(store_name)
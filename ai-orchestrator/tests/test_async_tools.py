@@ -0,0 +1,105 @@
+import asyncio
+import sys
+import unittest
+from unittest.mock import AsyncMock, patch
+
+import tools
+from tool_registry import ALL_TOOLS, set_popup_settings
+
+
+def _tool(name):
+    return next(t for t in ALL_TOOLS if t.name == name)
+
+
+class TestAsyncTools(unittest.TestCase):
+
+    def test_every_tool_has_a_coroutine(self):
+        for tool in ALL_TOOLS:
+            self.assertIsNotNone(tool.coroutine, tool.name)
+
+    @patch("tool_registry.arun_wp_cli_command", new_callable=AsyncMock)
+    @patch("tool_registry.aresolve_store", new_callable=AsyncMock)
+    @patch("tool_registry.run_wp_cli_command")
+    def test_tool_ainvoke_awaits_async_path(self, mock_sync_run, mock_resolve, mock_run):
+        mock_resolve.return_value = ("store-nike", "pod-1")
+        mock_run.return_value = "[]"
+
+        result = asyncio.run(_tool("list_products").ainvoke({"store_name": "nike", "per_page": 5}))
+
+        self.assertEqual(result, "[]")
+        mock_sync_run.assert_not_called()
+        mock_resolve.assert_awaited_once_with("nike")
+        args = mock_run.await_args[0][2]
+        self.assertIn("--per_page=5", args)
+
+    @patch("tool_registry.arun_wp_cli_command", new_callable=AsyncMock)
+    @patch("tool_registry.aresolve_store", new_callable=AsyncMock)
+    def test_create_coupon_postprocesses_async_output(self, mock_resolve, mock_run):
+        mock_resolve.return_value = ("store-nike", "pod-1")
+        mock_run.return_value = "42"
+
+        result = asyncio.run(_tool("create_coupon").ainvoke({"store_name": "nike", "code": "DIWALI", "amount": "20"}))
+
+        self.assertEqual(result, '{"ok": true, "id": "42"}')
+
+    @patch("tool_registry.arun_wp_cli_command", new_callable=AsyncMock)
+    @patch("tool_registry.aresolve_store", new_callable=AsyncMock)
+    def test_set_popup_settings_async(self, mock_resolve, mock_run):
+        mock_resolve.return_value = ("store-nike", "pod-1")
+        mock_run.side_effect = ['{"cookies": []}', "Success"]
+
+        asyncio.run(set_popup_settings.acall("nike", 10, {"triggers": []}))
+
+        update_args = mock_run.await_args_list[1][0][2]
+        self.assertIn('{"cookies": [], "triggers": []}', update_args)
+
+
+class TestAsyncKubectl(unittest.TestCase):
+
+    def setUp(self):
+        self._patches = [
+            patch.object(tools, "KUBECTL_BIN", sys.executable),
+            patch.object(tools, "_RESOLVED_CONTEXT", ""),
+        ]
+        for p in self._patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self._patches:
+            p.stop()
+
+    def test_akubectl_returns_stdout(self):
+        result = asyncio.run(tools._akubectl(["-c", "print(' ok ')"]))
+        self.assertEqual(result, "ok")
+
+    @patch("tools.asyncio.sleep", new_callable=AsyncMock)
+    def test_akubectl_retries_transient_errors(self, mock_sleep):
+        script = "import sys; sys.stderr.write('dial tcp: connection refused'); sys.exit(1)"
+        result = asyncio.run(tools._akubectl(["-c", script]))
+
+        self.assertEqual(result, "Error: dial tcp: connection refused")
+        self.assertEqual([c.args[0] for c in mock_sleep.await_args_list], [1, 2, 4])
+
+    @patch("tools.asyncio.sleep", new_callable=AsyncMock)
+    def test_akubectl_times_out(self, mock_sleep):
+        result = asyncio.run(tools._akubectl(["-c", "import time; time.sleep(5)"], timeout=0.2))
+        self.assertEqual(result, "Error: Command timed out after 0.2s")
+
+    @patch("tools._pod_registry", return_value=None)
+    @patch("tools._alist_wp_pods", new_callable=AsyncMock)
+    @patch("tools.asyncio.sleep", new_callable=AsyncMock)
+    def test_await_wp_pod_polls_without_blocking(self, mock_sleep, mock_list, _registry):
+        pending = '{"items": [{"metadata": {"name": "wp-0"}, "status": {"phase": "Pending"}}]}'
+        running = '{"items": [{"metadata": {"name": "wp-0"}, "status": {"phase": "Running"}}]}'
+        mock_list.side_effect = [pending, running]
+        tools._POD_CACHE.pop("store-async", None)
+
+        pod = asyncio.run(tools._await_wp_pod("store-async"))
+
+        self.assertEqual(pod, "wp-0")
+        mock_sleep.assert_awaited_once_with(tools.WAIT_POLL_SECONDS)
+        tools._POD_CACHE.pop("store-async", None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+import asyncio
+import base64
+import json
+import re
+import unittest
+from unittest.mock import AsyncMock, patch
+
+import tools
+from tool_registry import ALL_TOOLS
+from wp_session import RESPONSE_MARKER
+
+
+def _tool(name):
+    return next(t for t in ALL_TOOLS if t.name == name)
+
+
+def _ops_in(script):
+    encoded = re.search(r"base64_decode\('([^']*)'\)", script).group(1)
+    return json.loads(base64.b64decode(encoded))
+
+
+def _batch_output(*results):
+    return "Deprecated: plugin notice\n" + RESPONSE_MARKER + json.dumps(list(results))
+
+
+class TestRunWpCliBatch(unittest.TestCase):
+
+    @patch("tools.run_wp_cli_command")
+    def test_runs_all_operations_in_one_exec(self, mock_run):
+        mock_run.return_value = _batch_output(
+            {"code": 0, "stdout": "17\n", "stderr": ""},
+            {"code": 0, "stdout": "Success: Updated product 12.\n", "stderr": ""},
+        )
+
+        results = tools.run_wp_cli_batch("store-nike", "wp-0", [
+            ["wc", "shop_coupon", "create", "--code=A", "--porcelain"],
+            ["wc", "product", "update", "12", "--regular_price=9", "--allow-root"],
+        ])
+
+        mock_run.assert_called_once()
+        ns, pod, wp_args = mock_run.call_args[0]
+        self.assertEqual((ns, pod, wp_args[0]), ("store-nike", "wp-0", "eval"))
+        self.assertIn("$stop_on_error = true;", wp_args[1])
+        self.assertEqual(_ops_in(wp_args[1])[1], {
+            "args": ["wc", "product", "update", "12"],
+            "assoc": {"regular_price": "9"},
+        })
+        self.assertEqual([r["output"] for r in results], ["17", "Success: Updated product 12."])
+        self.assertTrue(all(r["ok"] for r in results))
+
+    @patch("tools.run_wp_cli_command")
+    def test_csv_operations_run_as_json(self, mock_run):
+        mock_run.return_value = _batch_output({"code": 0, "stdout": '[{"id": 1, "code": "A"}]', "stderr": ""})
+
+        results = tools.run_wp_cli_batch("store-nike", "wp-0", [["wc", "shop_coupon", "list", "--format=csv"]])
+
+        self.assertEqual(_ops_in(mock_run.call_args[0][2][1])[0]["assoc"], {"format": "json"})
+        self.assertEqual(results[0]["output"], "id,code\n1,A")
+
+    @patch("tools.run_wp_cli_command")
+    def test_stop_on_error_marks_remaining_operations_skipped(self, mock_run):
+        mock_run.return_value = _batch_output({"code": 1, "stdout": "", "stderr": "Error: Invalid ID."})
+
+        results = tools.run_wp_cli_batch("store-nike", "wp-0", [["wc", "product", "get", "1"], ["option", "get", "home"]])
+
+        self.assertEqual(results[0]["error"], "Error: Error: Invalid ID.")
+        self.assertTrue(results[1]["skipped"])
+        self.assertFalse(results[1]["ok"])
+
+    @patch("tools.run_wp_cli_command")
+    def test_continue_policy_and_exec_failure(self, mock_run):
+        mock_run.return_value = "Error: pods \"wp-0\" not found"
+
+        results = tools.run_wp_cli_batch("store-nike", "wp-0", [["option", "get", "home"]], stop_on_error=False)
+
+        self.assertIn("$stop_on_error = false;", mock_run.call_args[0][2][1])
+        self.assertEqual(results[0]["error"], "Error: pods \"wp-0\" not found")
+
+    def test_rejects_oversized_batches(self):
+        with patch.object(tools, "WP_CLI_BATCH_MAX_OPS", 1), self.assertRaises(ValueError):
+            tools.run_wp_cli_batch("store-nike", "wp-0", [["option", "get", "a"], ["option", "get", "b"]])
+
+
+class TestRunBatchTool(unittest.TestCase):
+
+    @patch("tool_registry.run_wp_cli_batch")
+    @patch("tool_registry.resolve_store")
+    def test_builds_operations_from_tool_schemas(self, mock_resolve, mock_batch):
+        mock_resolve.return_value = ("store-nike", "wp-0")
+        mock_batch.return_value = [
+            {"args": [], "ok": True, "output": "42", "error": ""},
+            {"args": [], "ok": True, "output": "Success", "error": ""},
+        ]
+
+        result = json.loads(_tool("run_batch").invoke({
+            "store_name": "nike",
+            "operations": [
+                {"tool": "create_coupon", "args": {"code": "DIWALI", "amount": "20"}},
+                {"tool": "update_product", "args": {"id": 12, "regular_price": "9.99"}},
+            ],
+        }))
+
+        plan = mock_batch.call_args[0][2]
+        self.assertEqual(plan[0][:3], ["wc", "shop_coupon", "create"])
+        self.assertIn("--regular_price=9.99", plan[1])
+        self.assertEqual(mock_batch.call_args.kwargs, {"stop_on_error": True})
+        self.assertTrue(result["ok"])
+        self.assertEqual(result["results"][0]["output"], '{"ok": true, "id": "42"}')
+
+    @patch("tool_registry.resolve_store")
+    def test_invalid_operation_is_rejected_before_running(self, mock_resolve):
+        result = json.loads(_tool("run_batch").invoke({
+            "store_name": "nike",
+            "operations": [
+                {"tool": "create_coupon", "args": {"code": "X", "amount": "5"}},
+                {"tool": "get_product", "args": {}},
+            ],
+        }))
+
+        self.assertFalse(result["ok"])
+        self.assertIn("operation 1 (get_product)", result["error"])
+        mock_resolve.assert_not_called()
+
+    @patch("tool_registry.resolve_store")
+    def test_batch_limits_are_reported_before_resolving_the_store(self, mock_resolve):
+        op = {"tool": "get_product", "args": {"id": 1}}
+        with patch.object(tools, "WP_CLI_BATCH_MAX_OPS", 1):
+            for operations in ([], [op, op]):
+                result = json.loads(_tool("run_batch").invoke({"store_name": "nike", "operations": operations}))
+                self.assertFalse(result["ok"])
+                self.assertIn("Batch has", result["error"])
+        mock_resolve.assert_not_called()
+
+    def test_unknown_tools_cannot_be_batched(self):
+        result = json.loads(_tool("run_batch").invoke({
+            "store_name": "nike",
+            "operations": [{"tool": "set_popup_settings", "args": {}}],
+        }))
+        self.assertIn("cannot be batched", result["error"])
+
+    @patch("tool_registry.resolve_store")
+    def test_uncapturable_tools_cannot_be_batched(self, mock_resolve):
+        for tool in ("catcher_list_emails", "mailpoet_list_subscribers", "system_info"):
+            result = json.loads(_tool("run_batch").invoke({
+                "store_name": "nike",
+                "operations": [{"tool": "create_coupon", "args": {"code": "X", "amount": "5"}}, {"tool": tool, "args": {}}],
+            }))
+            self.assertFalse(result["ok"])
+            self.assertIn(f"operation 1: {tool} cannot be batched", result["error"])
+        mock_resolve.assert_not_called()
+
+    @patch("tool_registry.arun_wp_cli_batch", new_callable=AsyncMock)
+    @patch("tool_registry.aresolve_store", new_callable=AsyncMock)
+    def test_async_path(self, mock_resolve, mock_batch):
+        mock_resolve.return_value = ("store-nike", "wp-0")
+        mock_batch.return_value = [{"args": [], "ok": False, "output": "", "error": "Error: boom"}]
+
+        result = json.loads(asyncio.run(_tool("run_batch").ainvoke({
+            "store_name": "nike",
+            "operations": [{"tool": "delete_coupon", "args": {"id": 3}}],
+            "stop_on_error": False,
+        })))
+
+        self.assertEqual(mock_batch.await_args[0][2], [["wc", "shop_coupon", "delete", "3", "--force"]])
+        self.assertEqual(mock_batch.await_args.kwargs, {"stop_on_error": False})
+        self.assertFalse(result["ok"])
+
+
+if __name__ == "__main__":
+    unittest.main()
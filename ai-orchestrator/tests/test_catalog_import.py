@@ -0,0 +1,239 @@
+import asyncio
+import json
+import os
+import queue
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage
+from langgraph.graph import START, MessagesState, StateGraph
+from langgraph.prebuilt import ToolNode
+
+import catalog_import
+import main
+import tools
+from tool_registry import ALL_TOOLS
+from wp_session import RESPONSE_MARKER
+
+client = TestClient(main.APP)
+
+SAMPLE_CSV = os.path.join(
+    os.path.dirname(__file__), "..", "..", "charts", "ecommerce-store", "files", "sample-products.csv"
+)
+
+
+class FakeImporter:
+    """Emulates IMPORT_PHP: buffers rows, reports totals per batch, finishes on END_OF_ROWS."""
+
+    def __init__(self, batch_size=catalog_import.IMPORT_BATCH_SIZE, fail_names=()):
+        self.batch_size = batch_size
+        self.fail_names = set(fail_names)
+        self.pending = []
+        self.totals = {"processed": 0, "created": 0, "updated": 0, "failed": 0, "errors": []}
+        self.max_pending = 0
+        self.closed = False
+        self._lines = queue.Queue()
+
+    def send(self, data):
+        for line in data.split("\n"):
+            if line == catalog_import.END_OF_ROWS:
+                self._flush()
+                self._reply({**self.totals, "done": True})
+                return
+            self.pending.append(json.loads(line))
+            self.max_pending = max(self.max_pending, len(self.pending))
+            if len(self.pending) >= self.batch_size:
+                self._flush()
+
+    def _flush(self):
+        if not self.pending:
+            return
+        for row in self.pending[:self.batch_size]:
+            key = "failed" if row["name"] in self.fail_names else "created"
+            self.totals[key] += 1
+            self.totals["processed"] += 1
+        del self.pending[:self.batch_size]
+        self._reply(self.totals)
+
+    def _reply(self, payload):
+        self._lines.put(RESPONSE_MARKER + json.dumps(payload) + "\n")
+
+    def readline(self, timeout):
+        try:
+            return self._lines.get(timeout=max(timeout, 0))
+        except queue.Empty:
+            return None
+
+    def alive(self):
+        return not self.closed
+
+    def close(self):
+        self.closed = True
+
+
+def _products(n):
+    return ({"name": f"Product {i}", "sku": f"SKU-{i}"} for i in range(n))
+
+
+class TestRowMapping(unittest.TestCase):
+
+    def test_sample_csv_maps_like_products_sh(self):
+        with patch.object(catalog_import, "AI_IMPORT_DIR", os.path.dirname(SAMPLE_CSV)), \
+                catalog_import.open_csv(csv_path="sample-products.csv") as lines:
+            products = list(catalog_import.iter_products(lines))
+
+        self.assertGreater(len(products), 10)
+        bag = products[0]
+        self.assertEqual(bag["name"], "Engine String Bag (Big Logo)")
+        self.assertEqual(bag["status"], "publish")
+        self.assertEqual(bag["regular_price"], "19.99")
+        self.assertEqual(bag["categories"], ["Accessories"])
+        self.assertEqual(len(bag["images"]), 3)
+        self.assertEqual(bag["attributes"][0]["options"], ["Engine"])
+        self.assertNotIn("variation", {p["type"] for p in products})
+
+    def test_rows_without_name_are_skipped(self):
+        csv_text = "Name,SKU,Stock\n,orphan,1\nShoe,SH-1,7\n"
+        with catalog_import.open_csv(csv_content=csv_text) as lines:
+            products = list(catalog_import.iter_products(lines))
+        self.assertEqual(products, [{"name": "Shoe", "type": "simple", "status": "draft", "sku": "SH-1", "stock_quantity": 7}])
+
+    def test_source_must_be_unambiguous(self):
+        with self.assertRaises(ValueError):
+            with catalog_import.open_csv(csv_path="a.csv", csv_content="Name\n"):
+                pass
+        with self.assertRaises(ValueError):
+            catalog_import.upload_path("../etc/passwd")
+
+    def test_csv_path_is_confined_to_the_import_dir(self):
+        with patch.object(catalog_import, "AI_IMPORT_DIR", ""), self.assertRaises(ValueError):
+            catalog_import.import_path(SAMPLE_CSV)
+        with patch.object(catalog_import, "AI_IMPORT_DIR", os.path.dirname(SAMPLE_CSV)):
+            for path in ("/etc/passwd", "../../../../etc/passwd"):
+                with self.assertRaises(ValueError):
+                    catalog_import.import_path(path)
+            self.assertEqual(catalog_import.import_path(SAMPLE_CSV), Path(os.path.realpath(SAMPLE_CSV)))
+
+
+class TestUploads(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = patch.object(catalog_import, "UPLOAD_DIR", self.tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_oversized_upload_is_rejected_and_removed(self):
+        with patch.object(main, "MAX_UPLOAD_BYTES", 10):
+            response = client.post("/uploads", content=b"Name\n" + b"x" * 20)
+        self.assertEqual(response.status_code, 413)
+
+        async def chunks():
+            for _ in range(3):
+                yield b"x" * 5
+
+        with self.assertRaises(catalog_import.UploadTooLarge):
+            asyncio.run(catalog_import.save_upload(chunks(), max_bytes=10))
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_upload_is_deleted_after_import(self):
+        response = client.post("/uploads", content=b"Name,SKU\nShoe,SH-1\n")
+        self.assertEqual(response.status_code, 200)
+        upload_id = response.json()["upload_id"]
+        tool = next(t for t in ALL_TOOLS if t.name == "import_products_csv")
+        with patch("tool_registry.resolve_store", return_value=("store-nike", "pod-1")), \
+                patch("tools._open_exec_channel", return_value=FakeImporter()):
+            result = json.loads(tool.invoke({"store_name": "nike", "upload_id": upload_id}))
+        self.assertEqual(result["created"], 1)
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_stale_uploads_are_pruned(self):
+        path = os.path.join(self.tmp.name, "old.csv")
+        open(path, "w").close()
+        os.utime(path, (0, 0))
+        open(os.path.join(self.tmp.name, "new.csv"), "w").close()
+        self.assertEqual(catalog_import.prune_uploads(ttl=60), 1)
+        self.assertEqual(os.listdir(self.tmp.name), ["new.csv"])
+
+
+class TestRunImport(unittest.TestCase):
+
+    def test_streams_in_bounded_window(self):
+        channel = FakeImporter(batch_size=10)
+        progress = []
+
+        totals = catalog_import.run_import(channel, _products(95), on_progress=progress.append, batch_size=10, chunk_rows=4)
+
+        self.assertEqual(totals["processed"], 95)
+        self.assertEqual(totals["created"], 95)
+        self.assertEqual(totals["sent"], 95)
+        self.assertLessEqual(channel.max_pending, 2 * 10)
+        self.assertEqual(progress[-1]["processed"], 95)
+        self.assertGreaterEqual(len(progress), 9)
+
+    def test_importer_exit_raises(self):
+        channel = FakeImporter(batch_size=10)
+        channel.send = lambda data: channel._lines.put("")
+
+        with self.assertRaises(catalog_import.CatalogImportError):
+            catalog_import.run_import(channel, _products(3), batch_size=10, chunk_rows=4)
+
+    def test_import_products_reports_failures(self):
+        channel = FakeImporter(batch_size=2, fail_names={"Product 1"})
+        with patch("tools._open_exec_channel", return_value=channel) as opener:
+            summary = tools.import_products("store-nike", "wp-0", _products(3), images=False)
+
+        command = opener.call_args[0][2]
+        self.assertEqual(command[-2], "eval")
+        self.assertIn("$with_images = false;", command[-1])
+        self.assertFalse(summary["ok"])
+        self.assertEqual((summary["created"], summary["failed"]), (2, 1))
+        self.assertTrue(channel.closed)
+
+
+class TestImportTool(unittest.TestCase):
+
+    @patch("tool_registry.aresolve_store", new_callable=AsyncMock)
+    def test_progress_reaches_the_custom_stream(self, mock_resolve):
+        mock_resolve.return_value = ("store-nike", "wp-0")
+        tool = next(t for t in ALL_TOOLS if t.name == "import_products_csv")
+        builder = StateGraph(MessagesState)
+        builder.add_node("tools", ToolNode([tool]))
+        builder.add_edge(START, "tools")
+        graph = builder.compile()
+        csv_text = "Name,SKU\n" + "".join(f"Shoe {i},SH-{i}\n" for i in range(250))
+        call = {"name": "import_products_csv", "args": {"store_name": "nike", "csv_content": csv_text}, "id": "c1"}
+
+        async def run():
+            events = []
+            async for mode, chunk in graph.astream(
+                {"messages": [AIMessage(content="", tool_calls=[call])]},
+                stream_mode=["custom", "values"],
+            ):
+                events.append((mode, chunk))
+            return events
+
+        with patch("tools._open_exec_channel", return_value=FakeImporter()):
+            events = asyncio.run(run())
+
+        progress = [chunk for mode, chunk in events if mode == "custom"]
+        self.assertEqual(progress[0]["type"], "tool_progress")
+        self.assertEqual(progress[0]["name"], "import_products_csv")
+        self.assertEqual(progress[-1]["processed"], 250)
+        result = json.loads(events[-1][1]["messages"][-1].content)
+        self.assertEqual((result["ok"], result["created"]), (True, 250))
+
+    def test_missing_file_fails_before_resolving_store(self):
+        tool = next(t for t in ALL_TOOLS if t.name == "import_products_csv")
+        with patch("tool_registry.resolve_store") as mock_resolve:
+            result = json.loads(tool.invoke({"store_name": "nike", "csv_path": "/nonexistent.csv"}))
+        self.assertFalse(result["ok"])
+        mock_resolve.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
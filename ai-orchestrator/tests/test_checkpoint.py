@@ -0,0 +1,115 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+import main
+from checkpoint import SQLiteCheckpointer, dump_message, load_messages, open_checkpointer
+from session_store import SessionStore
+
+client = TestClient(main.APP)
+
+
+class TestSQLiteCheckpointer(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._dir.name, "sessions.db")
+        self.store = SQLiteCheckpointer(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        self._dir.cleanup()
+
+    def _rows(self):
+        return self.store._db().execute("SELECT seq FROM messages ORDER BY seq").fetchall()
+
+    def test_message_round_trip_is_compact(self):
+        call = AIMessage(content="", tool_calls=[{"name": "list_coupons", "args": {"store_name": "nike"}, "id": "c1"}], id="a1")
+        result = ToolMessage(content="[]", name="list_coupons", tool_call_id="c1", id="t1")
+
+        encoded = dump_message(result)
+        self.assertNotIn("additional_kwargs", encoded)
+        self.assertEqual(load_messages([dump_message(call), encoded]), [call, result])
+
+    def test_turns_append_deltas_and_trim(self):
+        turn1 = [HumanMessage(content="hi", id="h1"), AIMessage(content="hello", id="a1")]
+        turn2 = [HumanMessage(content="again", id="h2"), AIMessage(content="sure", id="a2")]
+
+        self.assertEqual(self.store.save_turn("s1", turn1, {"tasks": []}, keep=2), (0, 2))
+        self.assertEqual(self.store.save_turn("s1", turn2, {"tasks": ["x"]}, keep=3), (2, 4))
+
+        self.assertEqual(self._rows(), [(2,), (3,), (4,)])
+        saved = self.store.load("s1")
+        self.assertEqual([m.id for m in saved.messages], ["a1", "h2", "a2"])
+        self.assertEqual((saved.meta, saved.head), ({"tasks": ["x"]}, 4))
+
+    def test_load_skips_unchanged_sessions(self):
+        self.store.save_turn("s1", [HumanMessage(content="hi")], {"checkpoint_head": 9}, keep=10)
+
+        self.assertIsNone(self.store.load("missing"))
+        self.assertIsNone(self.store.load("s1", known_head=1))
+        self.assertEqual(self.store.load("s1", known_head=0).meta, {})
+
+    def test_prune_and_url(self):
+        self.store.save_turn("s1", [HumanMessage(content="hi")], {}, keep=10)
+        self.assertEqual(self.store.prune(-1), 1)
+        self.assertEqual(self._rows(), [])
+
+        self.assertIsNone(open_checkpointer(""))
+        self.assertEqual(open_checkpointer("sqlite:///" + self.path).path, self.path)
+        with self.assertRaises(ValueError):
+            open_checkpointer("redis://cache:6379")
+
+
+class TestSharedSessions(unittest.TestCase):
+
+    def test_second_worker_continues_session(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "sessions.db")
+            model = GenericFakeChatModel(messages=iter([AIMessage(content="Hi Ana."), AIMessage(content="Ana.")]))
+            seen = []
+
+            async def record(model, messages):
+                seen.append([m.content for m in messages if isinstance(m, HumanMessage)])
+                return await model.ainvoke(messages)
+
+            with patch("graph.get_model", return_value=model), \
+                    patch("graph.LLM_LIMITER.ainvoke", side_effect=record), \
+                    patch("graph.STORE_DIRECTORY.astores", new_callable=AsyncMock, return_value=[]):
+                # Each "worker" has its own in-memory sessions and its own connection.
+                for message in ("I am Ana", "What is my name?"):
+                    with patch.object(main, "SESSIONS", SessionStore()), \
+                            patch.object(main, "CHECKPOINTER", SQLiteCheckpointer(path)):
+                        response = client.post("/chat", json={"message": message, "session_id": "shared"})
+                        main.CHECKPOINTER.close()
+                    self.assertEqual(response.status_code, 200)
+
+            self.assertEqual(seen[-1], ["I am Ana", "What is my name?"])
+            lines = [json.loads(line) for line in response.text.split("\\n") if line.strip()]
+            self.assertEqual(lines[-1]["content"], "Ana.")
+
+    def test_trimmed_local_copy_keeps_the_checkpoint(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "sessions.db")
+            model = GenericFakeChatModel(messages=iter([AIMessage(content="Hi Ana."), AIMessage(content="Ana.")]))
+            # The local copy only fits the latest message; the durable one keeps what compact() kept.
+            with patch("graph.get_model", return_value=model), \
+                    patch("graph.STORE_DIRECTORY.astores", new_callable=AsyncMock, return_value=[]), \
+                    patch.object(main, "SESSIONS", SessionStore(session_max_bytes=1)), \
+                    patch.object(main, "CHECKPOINTER", SQLiteCheckpointer(path)):
+                for message in ("I am Ana", "What is my name?"):
+                    client.post("/chat", json={"message": message, "session_id": "trimmed"})
+                saved = main.CHECKPOINTER.load("trimmed")
+                main.CHECKPOINTER.close()
+
+            self.assertEqual([m.content for m in saved.messages], ["Hi Ana.", "What is my name?", "Ana."])
+
+
+if __name__ == "__main__":
+    unittest.main()
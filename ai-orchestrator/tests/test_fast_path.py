@@ -0,0 +1,113 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+
+import main
+from fast_path import INTENTS, FastPath, match_intent, render
+from tool_cache import TOOL_CACHE
+
+client = TestClient(main.APP)
+
+PRODUCTS = [
+    {"id": 12, "name": "Runner", "sku": "RUN-1", "price": "99.00", "stock_status": "instock", "stock_quantity": 4, "status": "publish"},
+    {"id": 13, "name": "Walker", "sku": "", "price": "49.00", "stock_status": "outofstock", "stock_quantity": None, "status": "draft"},
+]
+
+
+def _intent(name):
+    return next(i for i in INTENTS if i.name == name)
+
+
+class TestIntentMatching(unittest.TestCase):
+
+    def test_matches_simple_reads(self):
+        cases = {
+            "list products in store nike": ("list_products", "nike", {}),
+            "Show me all orders for the acme store?": ("list_orders", "acme", {}),
+            "get product #12 in store nike": ("get_product", "nike", {"id": 12}),
+            "what are the coupons": ("list_coupons", None, {}),
+            "show discount codes in nike": ("list_coupons", "nike", {}),
+        }
+        for text, (name, store, args) in cases.items():
+            intent, matched_store, matched_args = match_intent(text)
+            self.assertEqual((intent.name, matched_store, matched_args), (name, store, args), text)
+
+    def test_anything_more_goes_to_the_agent(self):
+        for text in (
+            "list products in store nike that are out of stock",
+            "update product 12 price to 20 in store nike",
+            "list products in store nike and create a coupon",
+            "why are orders slow",
+        ):
+            self.assertIsNone(match_intent(text), text)
+
+    def test_render(self):
+        text = render(_intent("list_products"), "nike", PRODUCTS)
+        self.assertEqual(text.splitlines(), [
+            "Products in store nike (2 shown):",
+            "- #12 Runner - SKU RUN-1 - 99.00 - instock (4) - publish",
+            "- #13 Walker - 49.00 - outofstock - draft",
+        ])
+        self.assertEqual(render(_intent("list_orders"), "nike", []), "No orders found in store nike.")
+
+
+class TestFastPath(unittest.TestCase):
+
+    def _answer(self, text, output=json.dumps(PRODUCTS), store=True):
+        fast = FastPath()
+        TOOL_CACHE.clear()
+        with patch("fast_path.STORE_DIRECTORY.amatch", new_callable=AsyncMock, return_value={"name": "nike"} if store else None), \
+                patch("tool_registry.aresolve_store", new_callable=AsyncMock, return_value=("store-nike", "wp-0")), \
+                patch("tool_registry.arun_wp_cli_command", new_callable=AsyncMock, return_value=output) as run:
+            messages = asyncio.run(fast.answer(text))
+        return fast, messages, run
+
+    def test_answers_without_llm(self):
+        fast, messages, run = self._answer("list products in store nike")
+
+        call, result, final = messages
+        self.assertEqual(call.tool_calls[0]["name"], "list_products")
+        self.assertEqual(result.tool_call_id, call.tool_calls[0]["id"])
+        self.assertTrue(final.content.startswith("Products in store nike (2 shown):"))
+        self.assertIn("--fields=", " ".join(run.await_args[0][2]))
+        stats = fast.stats()
+        self.assertEqual((stats["hits"], stats["hit_ratio"]), (1, 1.0))
+        self.assertIsNotNone(stats["mean_latency_ms"])
+
+    def test_tool_call_is_observed(self):
+        with patch("tool_scheduler.observe_tool_call") as observe:
+            _, messages, _ = self._answer("list products in store nike")
+
+        call, seconds, result = observe.call_args[0]
+        self.assertEqual(call["id"], messages[0].tool_calls[0]["id"])
+        self.assertIs(result, messages[1])
+
+    def test_unknown_store_and_tool_errors_fall_back(self):
+        fast, messages, _ = self._answer("list products in store nope", store=False)
+        self.assertIsNone(messages)
+        self.assertEqual(fast.stats()["misses"]["store"], 1)
+
+        fast, messages, _ = self._answer("list products in store nike", output="Error: Invalid product")
+        self.assertIsNone(messages)
+        self.assertEqual(fast.stats()["misses"]["tool_error"], 1)
+
+    def test_chat_streams_fast_path_events(self):
+        with patch.object(main, "FAST_PATH", FastPath()), \
+                patch("fast_path.STORE_DIRECTORY.amatch", new_callable=AsyncMock, return_value={"name": "nike"}), \
+                patch("tool_registry.aresolve_store", new_callable=AsyncMock, return_value=("store-nike", "wp-0")), \
+                patch("tool_registry.arun_wp_cli_command", new_callable=AsyncMock, return_value="[]"), \
+                patch("graph.get_model") as get_model:
+            response = client.post("/chat", json={"message": "show orders in store nike", "session_id": "s-fast"})
+
+        get_model.assert_not_called()
+        events = [json.loads(line) for line in response.text.split("\\n") if line.strip()]
+        self.assertEqual([e["type"] for e in events], ["tool_call", "tool_result", "final"])
+        self.assertEqual(events[-1]["content"], "No orders found in store nike.")
+        self.assertEqual(len(main.SESSIONS.pop("s-fast")), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+import main
+from history import HistorySummarizer, compact, is_summary, message_groups, transcript
+from rate_limiter import estimate_tokens
+from session_store import SessionStore
+
+client = TestClient(main.APP)
+
+
+def _tool_turn(n, output="[]"):
+    call_id = f"c{n}"
+    return [
+        HumanMessage(content=f"list products {n}"),
+        AIMessage(content="", tool_calls=[{"name": "list_products", "args": {"store_name": "nike"}, "id": call_id}]),
+        ToolMessage(content=output, name="list_products", tool_call_id=call_id),
+        AIMessage(content=f"done {n}"),
+    ]
+
+
+class TestCompaction(unittest.TestCase):
+
+    def test_groups_keep_tool_results_with_their_call(self):
+        messages = [ToolMessage(content="orphan", tool_call_id="x")] + _tool_turn(1)
+        groups = message_groups(messages)
+        self.assertEqual([len(g) for g in groups], [1, 2, 1])
+
+    def test_within_budget_is_untouched(self):
+        messages = _tool_turn(1)
+        self.assertEqual(compact(messages, max_tokens=10 ** 6, keep_tokens=10 ** 6), (messages, []))
+
+    def test_budget_drops_whole_groups(self):
+        big = _tool_turn(1, output="x" * 4000)
+        small = _tool_turn(2)
+        keep = sum(estimate_tokens(g) for g in message_groups(small))
+
+        kept, dropped = compact(big + small, max_tokens=keep, keep_tokens=keep)
+
+        self.assertEqual(kept, small)
+        self.assertEqual(dropped, big)
+
+    def test_message_cap_never_starts_with_tool_result(self):
+        messages = _tool_turn(1) + _tool_turn(2)
+        kept, dropped = compact(messages, max_tokens=10 ** 6, keep_tokens=10 ** 6, max_messages=6)
+
+        # Cutting at six messages would orphan a tool result, so the whole call goes.
+        self.assertEqual(kept, messages[3:])
+        self.assertEqual(len(dropped), 3)
+
+    def test_compacts_down_to_keep_budget(self):
+        turns = [_tool_turn(n) for n in range(6)]
+        per_turn = sum(estimate_tokens(g) for g in message_groups(turns[0]))
+        kept, _ = compact(sum(turns, []), max_tokens=per_turn * 5, keep_tokens=per_turn * 2)
+        self.assertEqual(kept, sum(turns[4:], []))
+
+    def test_transcript_cuts_tool_output(self):
+        text = transcript(_tool_turn(1, output="y" * 5000))
+        self.assertIn("Agent called list_products", text)
+        self.assertLess(len(text), 1000)
+
+
+class TestHistorySummarizer(unittest.TestCase):
+
+    def test_folds_batches_in_order(self):
+        calls = []
+
+        async def summarize(previous, messages):
+            calls.append((previous, [m.content for m in messages]))
+            await asyncio.sleep(0)
+            return f"{previous or ''}+{len(messages)}"
+
+        async def run():
+            summarizer = HistorySummarizer(summarize)
+            saved = AsyncMock()
+            meta = {}
+            summarizer.submit("s1", meta, [HumanMessage(content="a")], on_done=saved)
+            summarizer.submit("s1", meta, [HumanMessage(content="b"), HumanMessage(content="c")], on_done=saved)
+            await summarizer.drain()
+            return meta, saved, summarizer.stats()
+
+        meta, saved, stats = asyncio.run(run())
+
+        self.assertEqual(meta["summary"], "+3")
+        self.assertEqual(calls, [(None, ["a", "b", "c"])])
+        saved.assert_awaited_once_with("s1", meta)
+        self.assertEqual(stats, {"summaries": 1, "failures": 0, "running": 0})
+
+    def test_failure_keeps_previous_summary(self):
+        async def run():
+            summarizer = HistorySummarizer(AsyncMock(side_effect=RuntimeError("429")))
+            meta = {"summary": "old"}
+            summarizer.submit("s1", meta, [HumanMessage(content="a")])
+            await summarizer.drain()
+            return meta, summarizer.failures
+
+        self.assertEqual(asyncio.run(run()), ({"summary": "old"}, 1))
+
+
+class TestSummaryInPrompt(unittest.TestCase):
+
+    def test_agent_sees_summary_after_system_prompt(self):
+        seen = []
+
+        async def record(model, messages):
+            seen.extend(messages)
+            return await model.ainvoke(messages)
+
+        store = SessionStore()
+        store.meta("s-sum").update({"summary": "Operator is Ana; store nike."})
+        model = GenericFakeChatModel(messages=iter([AIMessage(content="Hi Ana.")]))
+        with patch.object(main, "SESSIONS", store), \
+                patch("graph.get_model", return_value=model), \
+                patch("graph.LLM_LIMITER.ainvoke", side_effect=record), \
+                patch("graph.STORE_DIRECTORY.astores", new_callable=AsyncMock, return_value=[]):
+            client.post("/chat", json={"message": "hello", "session_id": "s-sum"})
+
+        self.assertIsInstance(seen[0], SystemMessage)
+        self.assertFalse(is_summary(seen[0]))
+        self.assertTrue(is_summary(seen[1]))
+        self.assertIn("Ana", seen[1].content)
+        # The summary is prompt context only, never part of the stored history.
+        self.assertFalse(any(is_summary(m) for m in store.get("s-sum")))
+
+
+if __name__ == "__main__":
+    unittest.main()
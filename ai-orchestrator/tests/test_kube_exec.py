@@ -0,0 +1,144 @@
+import base64
+import hashlib
+import json
+import socketserver
+import threading
+import unittest
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+from kubernetes import client as k8s_client
+
+import kube_exec
+import tools
+from kube_exec import KubeExecTransport
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def _frame(payload: bytes, opcode: int = 0x2) -> bytes:
+    header = bytes([0x80 | opcode])
+    size = len(payload)
+    if size < 126:
+        header += bytes([size])
+    elif size < 65536:
+        header += bytes([126]) + size.to_bytes(2, "big")
+    else:
+        header += bytes([127]) + size.to_bytes(8, "big")
+    return header + payload
+
+
+class FakeExecHandler(socketserver.StreamRequestHandler):
+    """Speaks just enough of the API server's exec websocket protocol."""
+
+    def handle(self):
+        request_line = self.rfile.readline().decode()
+        headers = {}
+        while True:
+            line = self.rfile.readline().decode().strip()
+            if not line:
+                break
+            key, _, value = line.partition(":")
+            headers[key.strip().lower()] = value.strip()
+
+        path = request_line.split(" ")[1]
+        self.server.requests.append((path, headers))
+        command = parse_qs(urlparse(path).query).get("command", [])
+        stdout, stderr, code = self.server.responder(command)
+
+        accept = base64.b64encode(
+            hashlib.sha1((headers["sec-websocket-key"] + WS_GUID).encode()).digest()
+        ).decode()
+        self.wfile.write(
+            (
+                "HTTP/1.1 101 Switching Protocols\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Accept: {accept}\r\n"
+                "Sec-WebSocket-Protocol: v4.channel.k8s.io\r\n\r\n"
+            ).encode()
+        )
+        if stdout:
+            self.wfile.write(_frame(b"\x01" + stdout.encode()))
+        if stderr:
+            self.wfile.write(_frame(b"\x02" + stderr.encode()))
+        if code == 0:
+            status = {"status": "Success"}
+        else:
+            status = {
+                "status": "Failure",
+                "reason": "NonZeroExitCode",
+                "details": {"causes": [{"reason": "ExitCode", "message": str(code)}]},
+            }
+        self.wfile.write(_frame(b"\x03" + json.dumps(status).encode()))
+        self.wfile.write(_frame(b"", opcode=0x8))
+        self.wfile.flush()
+
+
+class FakeApiServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, responder):
+        super().__init__(("127.0.0.1", 0), FakeExecHandler)
+        self.responder = responder
+        self.requests = []
+
+    @property
+    def host(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class TestKubeExecTransport(unittest.TestCase):
+
+    def setUp(self):
+        def responder(command):
+            if "fail" in command:
+                return "", "Error: no such product", 1
+            return json.dumps({"argv": command}), "", 0
+
+        self.server = FakeApiServer(responder)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        configuration = k8s_client.Configuration()
+        configuration.host = self.server.host
+        configuration.api_key = {"authorization": "test-token"}
+        configuration.api_key_prefix = {"authorization": "Bearer"}
+        self.transport = KubeExecTransport(k8s_client.ApiClient(configuration))
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        kube_exec.set_transport(None)
+
+    def test_exec_returns_stdout_and_exit_code(self):
+        result = self.transport.exec("store-nike", "wp-0", ["wp", "option", "get", "home"])
+
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(json.loads(result.stdout)["argv"], ["wp", "option", "get", "home"])
+        path, headers = self.server.requests[0]
+        self.assertTrue(path.startswith("/api/v1/namespaces/store-nike/pods/wp-0/exec"))
+        self.assertEqual(headers["authorization"], "Bearer test-token")
+
+    def test_exec_reports_non_zero_exit(self):
+        result = self.transport.exec("store-nike", "wp-0", ["wp", "fail"])
+
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("no such product", result.stderr)
+
+    def test_run_wp_cli_command_uses_native_backend(self):
+        kube_exec.set_transport(self.transport)
+        with patch.object(tools, "WP_EXEC_BACKEND", "native"), patch("tools._kubectl") as mock_kubectl:
+            output = tools.run_wp_cli_command("store-nike", "wp-0", ["wc", "product", "list"])
+            failed = tools.run_wp_cli_command("store-nike", "wp-0", ["fail"])
+
+        mock_kubectl.assert_not_called()
+        argv = json.loads(output)["argv"]
+        self.assertIn("--allow-root", argv)
+        self.assertIn("--user=admin", argv)
+        self.assertTrue(failed.startswith("Error:"))
+        self.assertEqual(len(self.server.requests), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
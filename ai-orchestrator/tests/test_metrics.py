@@ -0,0 +1,76 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, ToolMessage
+
+import main
+import metrics
+import tools
+from store_directory import STORE_DIRECTORY, _Snapshot
+from tool_cache import TOOL_CACHE
+
+client = TestClient(main.APP)
+
+
+def _sample(name, **labels):
+    return metrics.REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class TestMetricsEndpoint(unittest.TestCase):
+
+    def test_chat_turn_records_llm_and_tool_latency(self):
+        TOOL_CACHE.clear()
+        tool_count = {"tool": "list_coupons", "store": "store-nike", "outcome": "ok"}
+        tools_before = _sample("orch_tool_seconds_count", **tool_count)
+        llm_before = _sample("orch_llm_call_seconds_count", outcome="ok")
+        model = GenericFakeChatModel(messages=iter([
+            AIMessage(content="", tool_calls=[{"name": "list_coupons", "args": {"store_name": "nike"}, "id": "c1"}]),
+            AIMessage(content="There is one coupon."),
+        ]))
+        snapshot = _Snapshot.build([{"id": "nike", "name": "nike", "namespace": "store-nike"}])
+        with patch("graph.get_model", return_value=model), \
+                patch.object(STORE_DIRECTORY, "_snapshot", snapshot), \
+                patch("graph.STORE_DIRECTORY.astores", new_callable=AsyncMock, return_value=[{"name": "nike"}]), \
+                patch("tool_registry.aresolve_store", new_callable=AsyncMock, return_value=("store-nike", "wp-0")), \
+                patch("tool_registry.arun_wp_cli_command", new_callable=AsyncMock, return_value='[{"id": 1}]'):
+            response = client.post("/chat", json={"message": "which coupons does store nike have right now", "session_id": "s-metrics"})
+        self.assertEqual(response.status_code, 200)
+
+        response = client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("orch_tool_seconds_bucket", response.text)
+        self.assertIn("orch_event_loop_lag_seconds", response.text)
+        self.assertEqual(_sample("orch_tool_seconds_count", **tool_count), tools_before + 1)
+        self.assertEqual(_sample("orch_llm_call_seconds_count", outcome="ok"), llm_before + 2)
+        self.assertEqual(_sample("orch_inflight_streams"), 0)
+        self.assertGreaterEqual(_sample("orch_active_sessions"), 1)
+
+    def test_tool_outcome(self):
+        self.assertEqual(metrics.tool_outcome(ToolMessage(content="Error: no such post", tool_call_id="c")), "error")
+        self.assertEqual(metrics.tool_outcome(ToolMessage(content='{"ok": false, "error": "x"}', tool_call_id="c")), "error")
+        self.assertEqual(metrics.tool_outcome(ToolMessage(content='[{"id": 1}]', tool_call_id="c")), "ok")
+
+    def test_unknown_store_names_share_one_label(self):
+        before = _sample("orch_tool_seconds_count", tool="get_product", store="unknown", outcome="ok")
+        for name in ("no-such-store-1", "no-such-store-2"):
+            metrics.observe_tool_call({"name": "get_product", "args": {"store_name": name}}, 0.1)
+        after = _sample("orch_tool_seconds_count", tool="get_product", store="unknown", outcome="ok")
+        self.assertEqual(after, before + 2)
+
+    def test_kubectl_retries_are_counted(self):
+        before = _sample("orch_kubectl_retries_total", reason="transient")
+        attempts = iter([(1, "", "connection refused"), (0, "ok", "")])
+
+        async def attempt():
+            return next(attempts)
+
+        with patch("tools.asyncio.sleep", new_callable=AsyncMock):
+            self.assertEqual(asyncio.run(tools._arun_with_retries(attempt, 5)), "ok")
+        self.assertEqual(_sample("orch_kubectl_retries_total", reason="transient"), before + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
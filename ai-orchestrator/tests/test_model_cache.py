@@ -0,0 +1,95 @@
+import asyncio
+import os
+import unittest
+from unittest.mock import patch
+
+import model_cache
+from model_cache import ModelCache, toolset_hash
+from tool_registry import ALL_TOOLS
+
+ENV = {
+    "AZURE_OPENAI_ENDPOINT": "https://azure.example/openai/v1",
+    "AZURE_OPENAI_API_KEY": "test-key",
+    "AZURE_OPENAI_DEPLOYMENT": "gpt-test",
+}
+
+
+class TestModelCache(unittest.TestCase):
+
+    def setUp(self):
+        self._env = patch.dict(os.environ, ENV)
+        self._env.start()
+
+    def tearDown(self):
+        self._env.stop()
+
+    def test_turns_on_one_loop_reuse_model_and_schemas(self):
+        cache = ModelCache()
+
+        async def two_turns():
+            return cache.get(ALL_TOOLS), cache.get(ALL_TOOLS)
+
+        with patch.object(model_cache, "convert_to_openai_tool", wraps=model_cache.convert_to_openai_tool) as convert:
+            first, second = asyncio.run(two_turns())
+
+        self.assertIs(first, second)
+        self.assertEqual(convert.call_count, len(ALL_TOOLS))
+        self.assertEqual([t["function"]["name"] for t in first.kwargs["tools"]], [t.name for t in ALL_TOOLS])
+        self.assertEqual(first.bound.model_name, "gpt-test")
+        self.assertEqual(first.bound.max_retries, 0)
+        self.assertEqual(cache.stats(), {"models": 1, "hits": 1, "misses": 1, "evictions": 0})
+
+    def test_new_loop_gets_new_client_but_keeps_schemas(self):
+        cache = ModelCache()
+
+        async def turn():
+            return cache.get(ALL_TOOLS)
+
+        first = asyncio.run(turn())
+        with patch.object(model_cache, "convert_to_openai_tool") as convert:
+            second = asyncio.run(turn())
+
+        convert.assert_not_called()
+        self.assertIsNot(first, second)
+        self.assertIsNot(first.bound.http_async_client, second.bound.http_async_client)
+        self.assertIs(first.kwargs["tools"], second.kwargs["tools"])
+
+    def test_replaced_pool_is_closed(self):
+        cache = ModelCache()
+
+        async def turn():
+            model = cache.get(ALL_TOOLS)
+            await asyncio.sleep(0.01)
+            return model
+
+        first = asyncio.run(turn())
+        asyncio.run(turn())
+        self.assertTrue(first.bound.http_async_client.is_closed)
+
+    def test_tool_sets_share_one_pool_and_are_lru_bounded(self):
+        cache = ModelCache(max_entries=2)
+
+        async def turns():
+            return [cache.get(tools) for tools in (ALL_TOOLS[:1], ALL_TOOLS[:2], ALL_TOOLS[:1], ALL_TOOLS[:3])]
+
+        models = asyncio.run(turns())
+
+        self.assertEqual(len({id(m.bound.http_async_client) for m in models}), 1)
+        self.assertEqual(cache.stats()["models"], 2)
+        self.assertEqual(cache.stats()["evictions"], 1)
+        # ALL_TOOLS[:1] was used more recently than ALL_TOOLS[:2], so it survived.
+        self.assertIs(asyncio.run(turns())[0].kwargs["tools"], models[0].kwargs["tools"])
+
+    def test_settings_and_tool_set_are_part_of_the_key(self):
+        cache = ModelCache()
+        cache.get(ALL_TOOLS)
+        cache.get(ALL_TOOLS[:3])
+        with patch.dict(os.environ, {"AZURE_OPENAI_DEPLOYMENT": "gpt-other"}):
+            cache.get(ALL_TOOLS)
+
+        self.assertEqual(cache.stats()["models"], 3)
+        self.assertNotEqual(toolset_hash(ALL_TOOLS), toolset_hash(ALL_TOOLS[:3]))
+
+
+if __name__ == "__main__":
+    unittest.main()
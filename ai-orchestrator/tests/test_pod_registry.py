@@ -0,0 +1,148 @@
+import asyncio
+import json
+import queue
+import threading
+import unittest
+from unittest.mock import patch
+
+import tools
+from pod_registry import PodRegistry, pod_is_ready
+
+
+def _pod(namespace, name, ready=True, created="2026-01-01T00:00:00Z", deleting=False):
+    meta = {"namespace": namespace, "name": name, "creationTimestamp": created}
+    if deleting:
+        meta["deletionTimestamp"] = "2026-01-02T00:00:00Z"
+    return {
+        "metadata": meta,
+        "status": {
+            "phase": "Running" if ready else "Pending",
+            "conditions": [{"type": "Ready", "status": "True" if ready else "False"}],
+        },
+    }
+
+
+class QueueSource:
+    """Watch source fed by the test; blocks like a real watch until events arrive."""
+
+    def __init__(self, initial):
+        self.initial = initial
+        self.events = queue.Queue()
+
+    def __call__(self):
+        yield "RESET", self.initial
+        while True:
+            event = self.events.get()
+            if event is None:
+                return
+            yield event
+
+
+class TestPodRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.changes = []
+        self.source = QueueSource([_pod("store-nike", "wp-a"), _pod("kube-system", "wp-x")])
+        self.registry = PodRegistry(self.source, on_change=lambda ns, pod: self.changes.append((ns, pod))).start()
+        self.assertIsNone(self.registry.wait_for("store-missing", 0))
+
+    def tearDown(self):
+        self.registry.stop()
+        self.source.events.put(None)
+
+    def _settle(self, namespace, expected):
+        for _ in range(200):
+            if self.registry.get(namespace) == expected:
+                return
+            threading.Event().wait(0.01)
+        self.fail(f"{namespace} never became {expected!r}")
+
+    def test_initial_listing_is_indexed(self):
+        self.assertEqual(self.registry.get("store-nike"), "wp-a")
+        self.assertIsNone(self.registry.get("kube-system"))
+        self.assertIn(("store-nike", "wp-a"), self.changes)
+
+    def test_restart_switches_to_new_ready_pod(self):
+        self.source.events.put(("MODIFIED", _pod("store-nike", "wp-a", deleting=True)))
+        self._settle("store-nike", None)
+        self.source.events.put(("ADDED", _pod("store-nike", "wp-b", ready=False, created="2026-01-03T00:00:00Z")))
+        self.source.events.put(("MODIFIED", _pod("store-nike", "wp-b", created="2026-01-03T00:00:00Z")))
+        self._settle("store-nike", "wp-b")
+        self.assertEqual(self.changes[-2:], [("store-nike", None), ("store-nike", "wp-b")])
+
+    def test_wait_for_wakes_on_readiness_event(self):
+        threading.Timer(0.05, lambda: self.source.events.put(("ADDED", _pod("store-acme", "wp-1")))).start()
+        self.assertEqual(self.registry.wait_for("store-acme", 5), "wp-1")
+
+    def test_await_ready_wakes_on_readiness_event(self):
+        async def scenario():
+            waiter = asyncio.create_task(self.registry.await_ready("store-acme", 5))
+            await asyncio.sleep(0.05)
+            self.source.events.put(("ADDED", _pod("store-acme", "wp-1")))
+            return await waiter
+
+        self.assertEqual(asyncio.run(scenario()), "wp-1")
+
+    def test_pod_is_ready(self):
+        self.assertTrue(pod_is_ready(_pod("store-nike", "wp-a")))
+        self.assertFalse(pod_is_ready(_pod("store-nike", "wp-a", ready=False)))
+        self.assertFalse(pod_is_ready(_pod("store-nike", "wp-a", deleting=True)))
+
+
+class TestPodCacheInvalidation(unittest.TestCase):
+
+    def tearDown(self):
+        tools._POD_CACHE.pop("store-nike", None)
+
+    def test_clean_watch_end_reconnects_without_going_unhealthy(self):
+        connected = threading.Event()
+        calls = []
+
+        def source():
+            calls.append(len(calls))
+            yield "RESET", [_pod("store-nike", "wp-a")]
+            if len(calls) > 1:
+                connected.set()
+                threading.Event().wait(5)
+
+        registry = PodRegistry(source)
+        self.addCleanup(registry.stop)
+        with patch.object(registry, "_mark_unhealthy") as mark_unhealthy:
+            registry.start()
+            self.assertTrue(connected.wait(2))
+        mark_unhealthy.assert_not_called()
+        self.assertTrue(registry.healthy)
+        self.assertEqual(registry.get("store-nike"), "wp-a")
+
+    @patch("tools.time.sleep")
+    @patch("tools._list_wp_pods")
+    def test_unprefixed_namespaces_are_polled(self, mock_list, _sleep):
+        mock_list.side_effect = ['{"items": []}', json.dumps({"items": [_pod("shop", "wp-0")]})]
+        tools._POD_CACHE.pop("shop", None)
+        with patch("tools._pod_registry") as mock_registry:
+            self.assertEqual(tools._wait_for_wp_pod("shop"), "wp-0")
+        mock_registry.assert_not_called()
+        tools._POD_CACHE.pop("shop", None)
+
+    def test_registry_changes_write_through_to_pod_cache(self):
+        with patch.object(tools._WP_SESSIONS, "invalidate") as mock_invalidate:
+            tools._on_pod_change("store-nike", "wp-a")
+            tools._on_pod_change("store-nike", "wp-b")
+            self.assertEqual(tools._POD_CACHE["store-nike"], "wp-b")
+            tools._on_pod_change("store-nike", None)
+
+        self.assertNotIn("store-nike", tools._POD_CACHE)
+        mock_invalidate.assert_called_with("store-nike")
+
+    @patch("tools._kubectl")
+    def test_exec_into_deleted_pod_drops_cache_entry(self, mock_kubectl):
+        tools._POD_CACHE["store-nike"] = "wp-a"
+        mock_kubectl.return_value = 'Error: Error from server (NotFound): pods "wp-a" not found'
+
+        tools.run_wp_cli_command("store-nike", "wp-a", ["option", "get", "home"])
+
+        self.assertNotIn("store-nike", tools._POD_CACHE)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import os
+import pstats
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+import main
+import profiling
+
+client = TestClient(main.APP)
+
+
+def _events(text):
+    return [json.loads(line) for line in text.split("\\n") if line.strip()]
+
+
+class TestRequested(unittest.TestCase):
+
+    def test_gated_by_flag_and_token(self):
+        tagged = {"x-debug-profile": "1"}
+        with patch.object(profiling, "AI_DEBUG_PROFILING", False):
+            self.assertFalse(profiling.requested(tagged, {}))
+        with patch.object(profiling, "AI_DEBUG_PROFILING", True):
+            self.assertTrue(profiling.requested(tagged, {}))
+            self.assertTrue(profiling.requested({}, {"profile": "1"}))
+            self.assertFalse(profiling.requested({}, {"profile": "0"}))
+            self.assertFalse(profiling.requested({}, {}))
+            with patch.object(profiling, "AI_DEBUG_PROFILING_TOKEN", "s3cret"):
+                self.assertFalse(profiling.requested(tagged, {}))
+                self.assertTrue(profiling.requested({"x-debug-profile": "s3cret"}, {}))
+
+
+class TestChatProfiling(unittest.TestCase):
+
+    def _chat(self, **kwargs):
+        model = GenericFakeChatModel(messages=iter([AIMessage(content="Hello there.")]))
+        with patch("graph.get_model", return_value=model), \
+                patch("graph.STORE_DIRECTORY.astores", new_callable=AsyncMock, return_value=[]):
+            response = client.post("/chat", json={"message": "hello there"}, **kwargs)
+        self.assertEqual(response.status_code, 200)
+        return _events(response.text)
+
+    def test_tagged_request_writes_a_profile(self):
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch.object(profiling, "AI_DEBUG_PROFILING", True), \
+                patch.object(profiling, "AI_PROFILE_DIR", tmp):
+            events = self._chat(headers={"X-Debug-Profile": "1"})
+
+            self.assertEqual([e["type"] for e in events], ["final", "profile"])
+            profile = events[-1]
+            self.assertEqual(profile["trace_id"], events[0]["trace_id"])
+            self.assertEqual(os.path.dirname(profile["path"]), tmp)
+            self.assertLessEqual(len(profile["top"]), profiling.PROFILE_TOP_FUNCTIONS)
+            stats = pstats.Stats(profile["path"])
+            self.assertTrue(any(function == "_stream_events" for _, _, function in stats.stats))
+
+    def test_unwritable_profile_dir_reports_an_error(self):
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch.object(profiling, "AI_DEBUG_PROFILING", True), \
+                patch.object(profiling, "AI_PROFILE_DIR", os.path.join(tmp, "file", "profiles")):
+            open(os.path.join(tmp, "file"), "w").close()
+            events = self._chat(headers={"X-Debug-Profile": "1"})
+
+        self.assertEqual([e["type"] for e in events], ["final", "profile"])
+        self.assertIn("could not write profile", events[-1]["error"])
+
+    def test_untagged_or_disabled_requests_are_not_profiled(self):
+        with patch.object(profiling, "AI_DEBUG_PROFILING", True), \
+                patch("profiling.RequestProfile") as request_profile:
+            self.assertEqual([e["type"] for e in self._chat()], ["final"])
+        with patch.object(profiling, "AI_DEBUG_PROFILING", False):
+            events = self._chat(params={"profile": "1"})
+        self.assertEqual([e["type"] for e in events], ["final"])
+        request_profile.assert_not_called()
+
+    def test_abandoned_stream_frees_the_profiler(self):
+        model = GenericFakeChatModel(messages=iter([AIMessage(content="Hello there.")]))
+        request = SimpleNamespace(headers={"x-debug-profile": "1"}, query_params={})
+
+        async def disconnect():
+            response = await main.chat(main.ChatRequest(message="hello there"), request)
+            # The client goes away after the first event; the generator is never closed.
+            await response.body_iterator.__anext__()
+            self.assertTrue(profiling._ACTIVE.locked())
+            await response.background()
+
+        with patch.object(profiling, "AI_DEBUG_PROFILING", True), \
+                patch("graph.get_model", return_value=model), \
+                patch("graph.STORE_DIRECTORY.astores", new_callable=AsyncMock, return_value=[]):
+            asyncio.run(disconnect())
+        self.assertFalse(profiling._ACTIVE.locked())
+
+
+if __name__ == "__main__":
+    unittest.main()
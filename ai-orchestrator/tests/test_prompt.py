@@ -0,0 +1,83 @@
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+import main
+from history import summary_message
+from prompt import SYSTEM_MESSAGE, PromptCacheStats, build_prompt
+
+client = TestClient(main.APP)
+
+HISTORY = [
+    HumanMessage(content="list coupons in store nike"),
+    AIMessage(content="", tool_calls=[{"name": "list_coupons", "args": {"store_name": "nike"}, "id": "c1"}]),
+    ToolMessage(content="[]", tool_call_id="c1"),
+    AIMessage(content="No coupons."),
+]
+
+
+def _usage(input_tokens, cached):
+    return {
+        "input_tokens": input_tokens, "output_tokens": 5, "total_tokens": input_tokens + 5,
+        "input_token_details": {"cache_read": cached},
+    }
+
+
+class TestPromptLayout(unittest.TestCase):
+
+    def test_volatile_context_goes_last(self):
+        one = build_prompt(HISTORY, [{"name": "nike"}], "nike")
+        two = build_prompt(HISTORY, [{"name": "nike"}, {"name": "acme"}], None)
+
+        self.assertIs(one[0], SYSTEM_MESSAGE)
+        self.assertEqual(one[:-1], two[:-1])
+        self.assertIn("Current focus: Store 'nike'", one[-1].content)
+        self.assertIn("acme, nike", two[-1].content)
+
+    def test_summary_follows_system_prompt_and_stale_context_is_dropped(self):
+        summary = summary_message("Ana runs nike.")
+        stale = SystemMessage(content="Current focus: Store 'acme'.")
+        prompt = build_prompt([summary, stale] + HISTORY, None, None)
+
+        self.assertEqual(prompt, [SYSTEM_MESSAGE, summary] + HISTORY)
+
+    def test_next_turn_extends_previous_prefix(self):
+        first = build_prompt(HISTORY[:1], [{"name": "nike"}], "nike")
+        second = build_prompt(HISTORY + [HumanMessage(content="thanks")], [{"name": "nike"}], "nike")
+        self.assertEqual(second[:len(first) - 1], first[:-1])
+
+
+class TestPromptCacheStats(unittest.TestCase):
+
+    def test_records_cached_tokens_per_turn(self):
+        stats = PromptCacheStats()
+        turn = [
+            HumanMessage(content="hi"),
+            AIMessage(content="", usage_metadata=_usage(1200, 1024)),
+            ToolMessage(content="[]", tool_call_id="c1"),
+            AIMessage(content="done", usage_metadata=_usage(1300, 1152)),
+        ]
+
+        self.assertEqual(stats.record_turn("s1", turn), {
+            "session_id": "s1", "calls": 2, "input_tokens": 2500, "cached_tokens": 2176,
+        })
+        self.assertIsNone(stats.record_turn("s1", [HumanMessage(content="hi"), AIMessage(content="fast")]))
+        self.assertEqual(stats.stats()["cache_hit_ratio"], 0.8704)
+
+    def test_chat_records_usage(self):
+        reply = AIMessage(content="Hello.", usage_metadata=_usage(900, 768))
+        model = GenericFakeChatModel(messages=iter([reply]))
+        with patch.object(main, "PROMPT_CACHE", PromptCacheStats()), \
+                patch("graph.get_model", return_value=model), \
+                patch("graph.STORE_DIRECTORY.astores", new_callable=AsyncMock, return_value=[]):
+            client.post("/chat", json={"message": "hello"})
+            recorded = main.PROMPT_CACHE.stats()
+
+        self.assertEqual((recorded["input_tokens"], recorded["cached_tokens"]), (900, 768))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import openai
+from langchain_core.messages import AIMessage, HumanMessage
+
+from rate_limiter import LLM_COMPLETION_TOKENS_ESTIMATE, LLMRateLimiter, TokenBucket, retry_after_seconds
+
+
+def _rate_limit_error(headers):
+    response = httpx.Response(429, headers=headers, request=httpx.Request("POST", "https://azure.example/chat"))
+    return openai.RateLimitError("Too Many Requests", response=response, body=None)
+
+
+def _reply(headers=None, total_tokens=None):
+    message = AIMessage(content="ok", response_metadata={"headers": headers or {}})
+    if total_tokens:
+        message.usage_metadata = {"input_tokens": total_tokens, "output_tokens": 0, "total_tokens": total_tokens}
+    return message
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_reserve_overdraws_and_reports_wait(self):
+        bucket = TokenBucket(per_minute=60)  # one per second
+        self.assertEqual(bucket.reserve(60), 0.0)
+        self.assertAlmostEqual(bucket.reserve(2), 2.0, places=1)
+
+    def test_calibrate_never_raises_level_above_server_view(self):
+        bucket = TokenBucket(per_minute=1000)
+        bucket.calibrate(remaining=10, limit=600)
+        self.assertEqual(bucket.capacity, 600)
+        self.assertLessEqual(bucket.level, 11)
+
+    def test_retry_after_headers(self):
+        self.assertEqual(retry_after_seconds({"Retry-After": "7"}), 7.0)
+        self.assertEqual(retry_after_seconds({"retry-after-ms": "250", "retry-after": "1"}), 0.25)
+        self.assertIsNone(retry_after_seconds({"retry-after": "Wed, 21 Oct 2026 07:28:00 GMT"}))
+
+
+class TestLLMRateLimiter(unittest.TestCase):
+
+    @patch("rate_limiter.asyncio.sleep", new_callable=AsyncMock)
+    def test_no_wait_when_under_budget(self, mock_sleep):
+        limiter = LLMRateLimiter(requests_per_minute=60, tokens_per_minute=100000)
+        model = AsyncMock()
+        model.ainvoke.return_value = _reply()
+
+        asyncio.run(limiter.ainvoke(model, [HumanMessage(content="hi")]))
+
+        mock_sleep.assert_not_awaited()
+        self.assertEqual(limiter.stats()["waits"], 0)
+
+    @patch("rate_limiter.asyncio.sleep", new_callable=AsyncMock)
+    def test_honours_retry_after_on_429(self, mock_sleep):
+        limiter = LLMRateLimiter(requests_per_minute=6000, tokens_per_minute=10 ** 6)
+        model = AsyncMock()
+        model.ainvoke.side_effect = [_rate_limit_error({"retry-after": "3"}), _reply()]
+
+        response = asyncio.run(limiter.ainvoke(model, [HumanMessage(content="hi")]))
+
+        self.assertEqual(response.content, "ok")
+        waited = mock_sleep.await_args_list[-1][0][0]
+        self.assertGreater(waited, 2.5)
+        stats = limiter.stats()
+        self.assertEqual((stats["throttled"], stats["retries"]), (1, 1))
+
+    @patch("rate_limiter.asyncio.sleep", new_callable=AsyncMock)
+    def test_gives_up_after_max_retries(self, mock_sleep):
+        limiter = LLMRateLimiter(max_retries=1)
+        model = AsyncMock()
+        model.ainvoke.side_effect = _rate_limit_error({})
+
+        with self.assertRaises(openai.RateLimitError):
+            asyncio.run(limiter.ainvoke(model, [HumanMessage(content="hi")]))
+        self.assertEqual(model.ainvoke.await_count, 2)
+
+    @patch("rate_limiter.asyncio.sleep", new_callable=AsyncMock)
+    def test_retries_reserve_the_estimate_once(self, mock_sleep):
+        limiter = LLMRateLimiter(requests_per_minute=6000, tokens_per_minute=10 ** 6)
+        model = AsyncMock()
+        failure = httpx.Response(500, request=httpx.Request("POST", "https://azure.example/chat"))
+        model.ainvoke.side_effect = [
+            _rate_limit_error({"retry-after": "1"}),
+            openai.InternalServerError("boom", response=failure, body=None),
+            _reply(),
+        ]
+
+        asyncio.run(limiter.ainvoke(model, [HumanMessage(content="hi")]))
+        spent = 10 ** 6 - limiter.stats()["tokens_available"]
+        self.assertLess(spent, 2 * LLM_COMPLETION_TOKENS_ESTIMATE)
+
+        model.ainvoke.side_effect = _rate_limit_error({})
+        limiter.max_retries = 0
+        with self.assertRaises(openai.RateLimitError):
+            asyncio.run(limiter.ainvoke(model, [HumanMessage(content="hi")]))
+        self.assertLessEqual(10 ** 6 - limiter.stats()["tokens_available"], spent)
+
+    @patch("rate_limiter.asyncio.sleep", new_callable=AsyncMock)
+    def test_remaining_headers_throttle_later_calls(self, mock_sleep):
+        limiter = LLMRateLimiter(requests_per_minute=600, tokens_per_minute=60000)
+        model = AsyncMock()
+        model.ainvoke.return_value = _reply(
+            {"x-ratelimit-remaining-requests": "0", "x-ratelimit-remaining-tokens": "50000"},
+            total_tokens=40,
+        )
+
+        asyncio.run(limiter.ainvoke(model, [HumanMessage(content="hi")]))
+        asyncio.run(limiter.ainvoke(model, [HumanMessage(content="hi")]))
+
+        mock_sleep.assert_awaited_once()
+        self.assertGreater(limiter.stats()["last_wait_seconds"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
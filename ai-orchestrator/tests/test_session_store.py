@@ -0,0 +1,76 @@
+import unittest
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+import session_store
+from session_store import SessionStore, message_bytes
+
+
+def _turn(n, size=10):
+    return [HumanMessage(content="q" * size), AIMessage(content=f"answer {n}")]
+
+
+class TestSessionStore(unittest.TestCase):
+
+    def test_lru_evicts_least_recently_used(self):
+        store = SessionStore(max_sessions=2)
+        store["a"] = _turn(1)
+        store["b"] = _turn(2)
+        store.get("a")
+        store["c"] = _turn(3)
+
+        self.assertIn("a", store)
+        self.assertNotIn("b", store)
+        self.assertEqual(store.stats()["evictions"]["lru"], 1)
+
+    def test_idle_sessions_expire(self):
+        store = SessionStore(idle_seconds=60)
+        with patch.object(session_store.time, "monotonic", return_value=1000.0):
+            store["a"] = _turn(1)
+            store.meta("a")["tasks"] = ["x"]
+        with patch.object(session_store.time, "monotonic", return_value=1061.0):
+            self.assertIsNone(store.get("a"))
+            self.assertEqual(store.meta("a"), {})
+
+        stats = store.stats()
+        self.assertEqual(stats["evictions"]["idle"], 1)
+        self.assertEqual(stats["bytes"], 0)
+
+    def test_session_budget_trims_oldest_and_orphaned_tool_results(self):
+        messages = [
+            HumanMessage(content="x" * 1000),
+            AIMessage(content="", tool_calls=[{"name": "list_coupons", "args": {}, "id": "c1"}]),
+            ToolMessage(content="[]", tool_call_id="c1"),
+            AIMessage(content="no coupons"),
+        ]
+        budget = sum(message_bytes(m) for m in messages[2:]) + 50
+        store = SessionStore(session_max_bytes=budget)
+        store["a"] = messages
+
+        self.assertEqual(store.get("a"), messages[3:])
+        self.assertEqual(store.stats()["trimmed_messages"], 3)
+        self.assertEqual(store.bytes, message_bytes(messages[3]))
+
+    def test_total_budget_evicts_oldest_sessions(self):
+        one = sum(message_bytes(m) for m in _turn(0, size=500))
+        store = SessionStore(max_bytes=one * 2)
+        for key in "abc":
+            store[key] = _turn(0, size=500)
+
+        self.assertEqual(len(store), 2)
+        self.assertNotIn("a", store)
+        self.assertEqual(store.stats()["evictions"]["bytes"], 1)
+        self.assertEqual(store.bytes, one * 2)
+
+    def test_replacing_history_updates_byte_count(self):
+        store = SessionStore()
+        store["a"] = _turn(1)
+        store["a"] = _turn(1) + _turn(2)
+        self.assertEqual(store.bytes, sum(message_bytes(m) for m in _turn(1) + _turn(2)))
+        store.pop("a")
+        self.assertEqual(store.bytes, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+import tools
+from store_directory import StoreDirectory
+
+STORES = [
+    {"id": "s-1", "name": "Nike", "namespace": "store-nike"},
+    {"id": "s-2", "name": "acme", "namespace": "store-acme"},
+]
+
+
+class CountingHandler:
+    def __init__(self, payload):
+        self.payload = payload
+        self.calls = 0
+
+    def __call__(self, request):
+        self.calls += 1
+        return httpx.Response(200, content=json.dumps(self.payload))
+
+
+class TestStoreDirectory(unittest.TestCase):
+
+    def _directory(self, handler, ttl=30):
+        return StoreDirectory(
+            base_url="http://orchestrator",
+            ttl=ttl,
+            transport=httpx.MockTransport(handler),
+            async_transport=httpx.MockTransport(handler),
+        )
+
+    def test_index_matches_name_id_and_namespace(self):
+        directory = self._directory(CountingHandler(STORES))
+
+        self.assertEqual(directory.match("store nike")["id"], "s-1")
+        self.assertEqual(directory.match("S-2")["name"], "acme")
+        self.assertEqual(directory.match("store-acme")["id"], "s-2")
+
+    def test_cached_key_resolves_aliases_without_fetching(self):
+        handler = CountingHandler(STORES)
+        directory = self._directory(handler)
+        self.assertIsNone(directory.cached_key("nike"))
+        self.assertEqual(handler.calls, 0)
+
+        directory.stores()
+        keys = {directory.cached_key(name) for name in ("nike", "Nike store", "store-nike", "s-1")}
+        self.assertEqual(keys, {"store-nike"})
+
+    def test_fresh_snapshot_is_reused(self):
+        handler = CountingHandler(STORES)
+        directory = self._directory(handler)
+
+        async def turn():
+            await directory.astores()
+            await directory.amatch("nike")
+            await directory.astores()
+
+        asyncio.run(turn())
+        directory.stores()
+        self.assertEqual(handler.calls, 1)
+
+    def test_concurrent_cold_lookups_share_one_request(self):
+        handler = CountingHandler(STORES)
+        directory = self._directory(handler)
+
+        async def burst():
+            return await asyncio.gather(*(directory.amatch("nike") for _ in range(10)))
+
+        results = asyncio.run(burst())
+        self.assertTrue(all(r["id"] == "s-1" for r in results))
+        self.assertEqual(handler.calls, 1)
+
+    def test_stale_snapshot_is_served_while_revalidating(self):
+        handler = CountingHandler(STORES)
+        directory = self._directory(handler, ttl=0)
+
+        async def turn():
+            first = await directory.astores()
+            handler.payload = STORES + [{"id": "s-3", "name": "zara", "namespace": "store-zara"}]
+            stale = await directory.astores()
+            await asyncio.sleep(0.05)
+            return first, stale, await directory.astores()
+
+        first, stale, fresh = asyncio.run(turn())
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(stale), 2)
+        self.assertEqual(len(fresh), 3)
+
+    def test_replaced_loop_client_is_closed(self):
+        directory = self._directory(CountingHandler(STORES), ttl=0)
+
+        async def turn():
+            await directory.astores()
+            await asyncio.sleep(0.01)
+            return directory._async_client
+
+        first = asyncio.run(turn())
+        asyncio.run(turn())
+        self.assertTrue(first.is_closed)
+
+    def test_miss_forces_refresh(self):
+        handler = CountingHandler(STORES)
+        directory = self._directory(handler)
+        directory.stores()
+        handler.payload = STORES + [{"id": "s-3", "name": "zara", "namespace": "store-zara"}]
+
+        with patch("store_directory.STORE_DIRECTORY_MISS_REFRESH_SECONDS", 0):
+            self.assertEqual(directory.match("zara")["id"], "s-3")
+        self.assertEqual(handler.calls, 2)
+
+    def test_unreachable_api_returns_none(self):
+        def refuse(request):
+            raise httpx.ConnectError("connection refused")
+
+        directory = self._directory(refuse)
+        self.assertIsNone(directory.stores())
+        self.assertIsNone(directory.match("nike"))
+
+    @patch("tools._wait_for_wp_pod", return_value="wp-0")
+    def test_get_store_pod_info_uses_directory(self, _wait):
+        directory = self._directory(CountingHandler(STORES))
+        with patch("tools.STORE_DIRECTORY", directory):
+            self.assertEqual(tools.get_store_pod_info("nike"), ("store-nike", "wp-0"))
+            with self.assertRaises(RuntimeError):
+                tools.get_store_pod_info("unknown")
+
+
+if __name__ == "__main__":
+    unittest.main()
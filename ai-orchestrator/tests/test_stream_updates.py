@@ -0,0 +1,69 @@
+import json
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage, ToolMessage
+
+import main
+from graph import MessageList, append_messages
+
+client = TestClient(main.APP)
+
+
+def _events(text):
+    # _ndjson_line separates records with a literal backslash-n.
+    return [json.loads(line) for line in text.split("\\n") if line.strip()]
+
+
+class TestAppendMessages(unittest.TestCase):
+
+    def test_appends_and_assigns_ids(self):
+        left = append_messages([], [HumanMessage(content="hi", id="h1")])
+        merged = append_messages(left, [AIMessage(content="hello")])
+
+        self.assertIsInstance(merged, MessageList)
+        self.assertEqual([m.content for m in merged], ["hi", "hello"])
+        self.assertIsNotNone(merged[1].id)
+        self.assertEqual(merged.ids, {"h1", merged[1].id})
+        self.assertEqual(len(left), 1)
+
+    def test_existing_id_replaces_and_remove_drops(self):
+        left = append_messages([], [HumanMessage(content="hi", id="h1"), AIMessage(content="a", id="a1")])
+
+        replaced = append_messages(left, [AIMessage(content="b", id="a1")])
+        self.assertEqual([m.content for m in replaced], ["hi", "b"])
+
+        removed = append_messages(replaced, [RemoveMessage(id="h1")])
+        self.assertEqual([m.id for m in removed], ["a1"])
+        self.assertEqual(removed.ids, {"a1"})
+
+
+class TestUpdatesStream(unittest.TestCase):
+
+    def test_tool_turn_events_and_history(self):
+        model = GenericFakeChatModel(messages=iter([
+            AIMessage(content="", tool_calls=[{"name": "list_coupons", "args": {"store_name": "nike"}, "id": "c1"}]),
+            AIMessage(content="There is one coupon."),
+        ]))
+        with patch("graph.get_model", return_value=model), \
+                patch("graph.STORE_DIRECTORY.astores", new_callable=AsyncMock, return_value=[{"name": "nike"}]), \
+                patch("tool_registry.aresolve_store", new_callable=AsyncMock, return_value=("store-nike", "wp-0")), \
+                patch("tool_registry.arun_wp_cli_command", new_callable=AsyncMock, return_value='[{"id": 1}]'):
+            response = client.post("/chat", json={"message": "list coupons in store nike", "session_id": "s-updates"})
+
+        self.assertEqual(response.status_code, 200)
+        events = _events(response.text)
+        self.assertEqual([e["type"] for e in events], ["tool_call", "tool_result", "final"])
+        self.assertEqual(events[-1]["content"], "There is one coupon.")
+
+        history = main.SESSIONS.pop("s-updates")
+        self.assertEqual(
+            [type(m) for m in history],
+            [HumanMessage, AIMessage, ToolMessage, AIMessage],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
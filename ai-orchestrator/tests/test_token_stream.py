@@ -0,0 +1,53 @@
+import json
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from main import APP, _message_delta_events
+
+client = TestClient(APP)
+
+
+def _events(text):
+    # _ndjson_line separates records with a literal backslash-n.
+    return [json.loads(line) for line in text.split("\\n") if line.strip()]
+
+
+class TestTokenStreaming(unittest.TestCase):
+
+    def _chat(self, **body):
+        model = GenericFakeChatModel(messages=iter([AIMessage(content="Hello there friend")]))
+        with patch("graph.get_model", return_value=model), \
+                patch("graph.STORE_DIRECTORY.astores", new_callable=AsyncMock, return_value=[]):
+            response = client.post("/chat", json={"message": "hello", **body})
+        self.assertEqual(response.status_code, 200)
+        return _events(response.text)
+
+    def test_tokens_stream_before_final(self):
+        events = self._chat(stream_tokens=True)
+
+        tokens = [e for e in events if e["type"] == "token"]
+        self.assertGreater(len(tokens), 1)
+        self.assertEqual("".join(e["content"] for e in tokens), "Hello there friend")
+        self.assertEqual((events[-1]["type"], events[-1]["content"]), ("final", "Hello there friend"))
+
+    def test_token_events_are_opt_in(self):
+        events = self._chat()
+        self.assertEqual([e["type"] for e in events], ["final"])
+
+    def test_tool_call_deltas(self):
+        chunk = AIMessageChunk(
+            content="",
+            tool_call_chunks=[{"name": "get_product", "args": '{"store_na', "id": "call-1", "index": 0}],
+        )
+        self.assertEqual(_message_delta_events(chunk, {"langgraph_node": "agent"}), [{
+            "type": "tool_call_delta", "index": 0, "id": "call-1", "name": "get_product", "args": '{"store_na',
+        }])
+        self.assertEqual(_message_delta_events(chunk, {"langgraph_node": "tools"}), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, patch
+
+import tool_cache
+from main import _is_mutating_tool_call
+from tool_cache import TOOL_CACHE, ToolCache, is_mutating_tool
+from store_directory import STORE_DIRECTORY, _Snapshot
+from tool_registry import ALL_TOOLS
+
+
+def _tool(name):
+    return next(t for t in ALL_TOOLS if t.name == name)
+
+
+class TestToolCache(unittest.TestCase):
+
+    def test_lru_bound_and_ttl(self):
+        cache = ToolCache(ttl=60, max_entries=2)
+        for n in range(3):
+            cache.put("nike", "get_product", str(n), f"out-{n}", cache.generation("nike"))
+
+        self.assertIsNone(cache.get("nike", "get_product", "0"))
+        self.assertEqual(cache.get("nike", "get_product", "2"), "out-2")
+        self.assertEqual(cache.evictions, 1)
+
+        expired = ToolCache(ttl=0)
+        expired.put("nike", "list_coupons", "{}", "[]", 0)
+        self.assertIsNone(expired.get("nike", "list_coupons", "{}"))
+
+    def test_mutation_invalidates_affected_resources_only(self):
+        cache = ToolCache()
+        cache.put("nike", "list_products", "{}", "[products]", 0)
+        cache.put("nike", "list_coupons", "{}", "[coupons]", 0)
+        cache.put("acme", "list_products", "{}", "[acme]", 0)
+
+        cache.invalidate("nike", "create_coupon")
+        self.assertIsNone(cache.get("nike", "list_coupons", "{}"))
+        self.assertEqual(cache.get("nike", "list_products", "{}"), "[products]")
+
+        cache.invalidate("nike", "update_order")
+        self.assertIsNone(cache.get("nike", "list_products", "{}"))
+        self.assertEqual(cache.get("acme", "list_products", "{}"), "[acme]")
+
+    def test_read_started_before_mutation_is_not_stored(self):
+        cache = ToolCache()
+        generation = cache.generation("nike")
+        cache.invalidate("nike", "update_product")
+        cache.put("nike", "get_product", "{}", "stale", generation)
+        self.assertIsNone(cache.get("nike", "get_product", "{}"))
+
+    def test_classification_is_shared_with_main(self):
+        self.assertTrue(is_mutating_tool("woo_create_product"))
+        self.assertTrue(is_mutating_tool("run_batch"))
+        self.assertFalse(is_mutating_tool("list_products"))
+        self.assertTrue(_is_mutating_tool_call({"name": "replace_urls"}))
+        self.assertFalse(_is_mutating_tool_call("delete_product"))
+
+
+class TestCachedTools(unittest.TestCase):
+
+    def setUp(self):
+        TOOL_CACHE.clear()
+
+    def tearDown(self):
+        TOOL_CACHE.clear()
+
+    @patch("tool_registry.run_wp_cli_command")
+    @patch("tool_registry.resolve_store")
+    def test_repeated_reads_hit_until_a_write(self, mock_resolve, mock_run):
+        mock_resolve.return_value = ("store-nike", "pod-1")
+        mock_run.side_effect = ["[1]", "77", "[1, 77]"]
+        list_products = _tool("list_products")
+        hits = TOOL_CACHE.hits
+
+        first = list_products.invoke({"store_name": "Nike", "per_page": 10})
+        second = list_products.invoke({"store_name": "nike store"})
+        _tool("create_product").invoke({"store_name": "nike", "name": "Shoe", "regular_price": "9"})
+        third = list_products.invoke({"store_name": "nike"})
+
+        self.assertEqual((first, second, third), ("[1]", "[1]", "[1, 77]"))
+        self.assertEqual(mock_run.call_count, 3)
+        self.assertEqual(TOOL_CACHE.hits - hits, 1)
+
+    @patch("tool_registry.run_wp_cli_command")
+    @patch("tool_registry.resolve_store")
+    def test_write_under_one_alias_invalidates_reads_under_another(self, mock_resolve, mock_run):
+        mock_resolve.return_value = ("store-nike", "pod-1")
+        mock_run.side_effect = ["[1]", "77", "[1, 77]"]
+        snapshot = _Snapshot.build([{"id": "nike", "name": "Nike", "namespace": "store-nike"}])
+        list_products = _tool("list_products")
+
+        with patch.object(STORE_DIRECTORY, "_snapshot", snapshot):
+            first = list_products.invoke({"store_name": "Nike store"})
+            _tool("create_product").invoke({"store_name": "store-nike", "name": "Shoe", "regular_price": "9"})
+            second = list_products.invoke({"store_name": "nike"})
+
+        self.assertEqual((first, second), ("[1]", "[1, 77]"))
+        self.assertEqual(mock_run.call_count, 3)
+
+    @patch("tool_registry.run_wp_cli_command")
+    @patch("tool_registry.resolve_store")
+    def test_errors_are_not_cached(self, mock_resolve, mock_run):
+        mock_resolve.return_value = ("store-nike", "pod-1")
+        mock_run.side_effect = ["Error: timeout", '{"id": 5}']
+
+        _tool("get_product").invoke({"store_name": "nike", "id": 5})
+        result = _tool("get_product").invoke({"store_name": "nike", "id": 5})
+
+        self.assertEqual(result, '{"id": 5}')
+
+    @patch("tool_registry.arun_wp_cli_command", new_callable=AsyncMock)
+    @patch("tool_registry.aresolve_store", new_callable=AsyncMock)
+    def test_async_path_shares_the_cache(self, mock_resolve, mock_run):
+        mock_resolve.return_value = ("store-nike", "pod-1")
+        mock_run.return_value = "[]"
+
+        async def run():
+            await _tool("list_coupons").ainvoke({"store_name": "nike"})
+            return await _tool("list_coupons").ainvoke({"store_name": "nike"})
+
+        self.assertEqual(asyncio.run(run()), "[]")
+        mock_run.assert_awaited_once()
+
+    @patch("tool_registry.run_wp_cli_command")
+    @patch("tool_registry.resolve_store")
+    def test_disabled_cache_passes_through(self, mock_resolve, mock_run):
+        mock_resolve.return_value = ("store-nike", "pod-1")
+        mock_run.return_value = "[]"
+        with patch.object(tool_cache, "TOOL_CACHE_ENABLED", False):
+            _tool("list_popups").invoke({"store_name": "nike"})
+            _tool("list_popups").invoke({"store_name": "nike"})
+        self.assertEqual(mock_run.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.tools import StructuredTool
+
+from store_directory import STORE_DIRECTORY, _Snapshot
+from tool_scheduler import StoreScheduledToolNode, schedule
+
+
+def _call(name, store, n):
+    return {"name": name, "args": {"store_name": store, "n": n}, "id": f"call-{n}"}
+
+
+class Recorder:
+    """Async and sync fake tools that log start/end and overlap per store."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.log = []
+        self.active = {}
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def _enter(self, name, store, n):
+        with self._lock:
+            self.log.append(("start", n))
+            self.active[store] = self.active.get(store, 0) + 1
+            self.max_active = max(self.max_active, sum(self.active.values()))
+
+    def _exit(self, name, store, n):
+        with self._lock:
+            self.active[store] -= 1
+            self.log.append(("end", n))
+        return f"{name}:{n}"
+
+    def tools(self):
+        def make(name):
+            async def arun(store_name: str, n: int):
+                self._enter(name, store_name, n)
+                await asyncio.sleep(self.delay)
+                return self._exit(name, store_name, n)
+
+            def run(store_name: str, n: int):
+                self._enter(name, store_name, n)
+                time.sleep(self.delay)
+                return self._exit(name, store_name, n)
+
+            return StructuredTool.from_function(run, coroutine=arun, name=name, description=name)
+
+        return [make(n) for n in ("get_product", "list_products", "update_product", "create_coupon")]
+
+    def index(self, event, n):
+        return self.log.index((event, n))
+
+
+CALLS = [
+    _call("update_product", "nike", 0),
+    _call("get_product", "nike", 1),
+    _call("list_products", "acme", 2),
+    _call("update_product", "nike", 3),
+    _call("create_coupon", "acme", 4),
+    _call("get_product", "nike", 5),
+]
+
+
+class TestSchedule(unittest.TestCase):
+
+    def test_dependencies(self):
+        self.assertEqual(schedule(CALLS), [[], [0], [], [0, 1], [2], [3]])
+
+    def test_store_names_are_normalised(self):
+        deps = schedule([_call("update_product", "Nike", 0), _call("get_product", "nike store", 1)])
+        self.assertEqual(deps[1], [0])
+
+    def test_aliases_of_one_store_are_ordered(self):
+        snapshot = _Snapshot.build([{"id": "nike", "name": "Nike", "namespace": "store-nike"}])
+        calls = [_call("update_product", "store-nike", 0), _call("update_product", "nike", 1)]
+        self.assertEqual(schedule(calls), [[], []])
+        with patch.object(STORE_DIRECTORY, "_snapshot", snapshot):
+            self.assertEqual(schedule(calls), [[], [0]])
+
+
+class TestStoreScheduledToolNode(unittest.TestCase):
+
+    def _check(self, recorder, result):
+        messages = result["messages"]
+        self.assertEqual([m.tool_call_id for m in messages], [c["id"] for c in CALLS])
+        self.assertEqual(messages[3].content, "update_product:3")
+        # Writes wait for earlier calls on their store; reads wait for earlier writes.
+        self.assertLess(recorder.index("end", 0), recorder.index("start", 1))
+        self.assertLess(recorder.index("end", 1), recorder.index("start", 3))
+        self.assertLess(recorder.index("end", 2), recorder.index("start", 4))
+        self.assertLess(recorder.index("end", 3), recorder.index("start", 5))
+        # Different stores still overlap.
+        self.assertLess(recorder.index("start", 2), recorder.index("end", 0))
+        self.assertGreater(recorder.max_active, 1)
+
+    def test_async_ordering(self):
+        recorder = Recorder()
+        node = StoreScheduledToolNode(recorder.tools())
+        state = {"messages": [AIMessage(content="", tool_calls=CALLS)]}
+
+        result = asyncio.run(node.ainvoke(state))
+
+        self._check(recorder, result)
+
+    def test_sync_ordering(self):
+        recorder = Recorder()
+        node = StoreScheduledToolNode(recorder.tools())
+        state = {"messages": [AIMessage(content="", tool_calls=CALLS)]}
+
+        result = node.invoke(state)
+
+        self._check(recorder, result)
+
+    def test_reads_run_concurrently(self):
+        recorder = Recorder(delay=0.2)
+        node = StoreScheduledToolNode(recorder.tools())
+        calls = [_call("get_product", "nike", n) for n in range(4)]
+
+        started = time.monotonic()
+        asyncio.run(node.ainvoke({"messages": [AIMessage(content="", tool_calls=calls)]}))
+
+        self.assertLess(time.monotonic() - started, 0.6)
+        self.assertEqual(recorder.max_active, 4)
+
+    def test_each_call_gets_its_own_config(self):
+        seen = []
+
+        async def arun_one(self, call, config):
+            seen.append(config)
+            return ToolMessage(content="ok", tool_call_id=call["id"])
+
+        calls = [_call("get_product", "nike", n) for n in range(3)]
+        with patch.object(StoreScheduledToolNode, "_arun_one", arun_one):
+            asyncio.run(StoreScheduledToolNode(Recorder().tools()).ainvoke(
+                {"messages": [AIMessage(content="", tool_calls=calls)]}))
+
+        self.assertEqual(len({id(config) for config in seen}), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
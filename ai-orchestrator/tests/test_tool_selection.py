@@ -0,0 +1,117 @@
+import json
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+import main
+from tool_registry import ALL_TOOLS
+from tool_selection import REQUEST_TOOLS, TOOL_GROUPS, ToolSelector, request_tools
+
+client = TestClient(main.APP)
+
+
+def _names(tools):
+    return [t.name for t in tools]
+
+
+class TestToolSelector(unittest.TestCase):
+
+    def test_every_tool_belongs_to_a_group(self):
+        grouped = {t for g in TOOL_GROUPS.values() for t in g.tools} | {"run_batch"}
+        self.assertEqual(grouped, set(_names(ALL_TOOLS)))
+
+    def test_selects_groups_from_the_request(self):
+        selector = ToolSelector()
+        self.assertEqual(selector.select([HumanMessage(content="Show me the last 5 orders")]), ["orders"])
+
+        tools = selector.tools_for(["orders"])
+        self.assertEqual(_names(tools), ["list_orders", "get_order", "update_order", "run_batch", "request_tools"])
+
+    def test_follow_up_keeps_recent_groups(self):
+        messages = [
+            HumanMessage(content="Create a popup for Diwali"),
+            AIMessage(content="", tool_calls=[{"name": "create_popup", "args": {}, "id": "c1"}]),
+            ToolMessage(content="42", tool_call_id="c1"),
+            AIMessage(content="Created popup 42."),
+            HumanMessage(content="yes, publish it now"),
+        ]
+        self.assertEqual(ToolSelector().select(messages), ["popups"])
+
+    def test_session_groups_only_widen(self):
+        selector = ToolSelector()
+        messages = [HumanMessage(content="Show me the last 5 orders"), AIMessage(content="3 orders."),
+                    HumanMessage(content="now create a popup")]
+
+        self.assertEqual(selector.select(messages[2:], ["orders"]), ["orders", "popups"])
+        self.assertEqual(selector.select([HumanMessage(content="thanks")], ["orders"]), ["orders"])
+        self.assertEqual(selector.stats()["fallbacks"], 0)
+
+    def test_no_match_binds_everything(self):
+        selector = ToolSelector()
+        groups = selector.select([HumanMessage(content="hello there")])
+
+        self.assertEqual(groups, list(TOOL_GROUPS))
+        self.assertEqual(_names(selector.tools_for(groups)), _names(ALL_TOOLS))
+        self.assertEqual(selector.stats()["fallbacks"], 1)
+
+    def test_request_tools_widens_the_turn(self):
+        selector = ToolSelector()
+        messages = [
+            HumanMessage(content="list orders"),
+            AIMessage(content="", tool_calls=[{"name": "request_tools", "args": {"groups": ["email"]}, "id": "r1"}]),
+            ToolMessage(content=request_tools(["email"]), tool_call_id="r1"),
+        ]
+        groups = selector.select(messages[:1])
+
+        self.assertEqual(selector.widen(groups, messages), ["orders", "email"])
+        self.assertEqual(selector.widen(["orders", "email"], messages), ["orders", "email"])
+        stats = selector.stats()
+        self.assertEqual((stats["widened"], stats["hit_rate"]), (1, 0.0))
+        self.assertFalse(json.loads(request_tools(["nope"]))["ok"])
+
+    def test_records_schema_token_savings(self):
+        selector = ToolSelector()
+        selector.record(selector.tools_for(["coupons"]))
+        stats = selector.stats()
+        self.assertGreater(stats["schema_tokens_saved"], stats["schema_tokens_bound"] * 3)
+
+
+class TestGraphBinding(unittest.TestCase):
+
+    def test_agent_binds_selected_tools(self):
+        bound = []
+        model = GenericFakeChatModel(messages=iter([AIMessage(content="No orders yet.")]))
+
+        def get_model(store_name=None, tools=None):
+            bound.append(_names(tools))
+            return model
+
+        with patch("graph.get_model", side_effect=get_model), \
+                patch("graph.STORE_DIRECTORY.astores", new_callable=AsyncMock, return_value=[]):
+            response = client.post("/chat", json={"message": "any new orders today?"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(bound, [["list_orders", "get_order", "update_order", "run_batch", REQUEST_TOOLS.name]])
+
+    def test_later_turns_keep_the_session_tools(self):
+        bound = []
+        model = GenericFakeChatModel(messages=iter([AIMessage(content="No orders yet."), AIMessage(content="Done.")]))
+
+        def get_model(store_name=None, tools=None):
+            bound.append(_names(tools))
+            return model
+
+        with patch("graph.get_model", side_effect=get_model), \
+                patch("graph.STORE_DIRECTORY.astores", new_callable=AsyncMock, return_value=[]):
+            for message in ("any new orders today?", "ok, add a coupon"):
+                client.post("/chat", json={"message": message, "session_id": "sticky-tools"})
+
+        self.assertEqual(bound[1], ["list_orders", "get_order", "update_order", "list_coupons", "create_coupon",
+                                    "delete_coupon", "run_batch", REQUEST_TOOLS.name])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,7 +3,9 @@ from unittest.mock import patch
 import json
 
 from tool_registry import (
+    PRODUCT_LIST_FIELDS,
     list_products,
+    get_product,
     create_product,
     update_product,
     delete_product,
@@ -25,6 +27,20 @@ class TestWooCommerceTools(unittest.TestCase):
         self.assertIn("product", args)
         self.assertIn("list", args)
         self.assertIn("--format=json", args)
+        self.assertIn(f"--fields={','.join(PRODUCT_LIST_FIELDS)}", args)
+
+    @patch("tool_registry.run_wp_cli_command")
+    @patch("tool_registry.resolve_store")
+    def test_field_projection_and_csv(self, mock_resolve, mock_run):
+        mock_resolve.return_value = ("store-nike", "pod-1")
+        mock_run.return_value = "id,name\n1,Shoe"
+
+        list_products("nike", fields=["id", "name"], format="csv")
+        args = mock_run.call_args[0][2]
+        self.assertEqual(args[-2:], ["--fields=id,name", "--format=csv"])
+
+        get_product("nike", 7, fields=["*"])
+        self.assertEqual(mock_run.call_args[0][2], ["wc", "product", "get", "7", "--format=json"])
 
     @patch("tool_registry.run_wp_cli_command")
     @patch("tool_registry.resolve_store")
@@ -0,0 +1,89 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+import main
+import tracing
+from tool_cache import TOOL_CACHE
+
+client = TestClient(main.APP)
+
+
+def _events(text):
+    return [json.loads(line) for line in text.split("\\n") if line.strip()]
+
+
+class TestSpans(unittest.TestCase):
+
+    def test_spans_nest_under_the_trace(self):
+        trace = tracing.start_trace("turn")
+        with tracing.span("agent") as agent:
+            with tracing.span("llm.call", model="fake"):
+                pass
+        trace.finish()
+
+        spans = {s.name: s for s in trace.spans}
+        self.assertEqual(set(spans), {"turn", "agent", "llm.call"})
+        self.assertEqual(spans["llm.call"].parent_id, agent.span_id)
+        self.assertEqual(spans["agent"].parent_id, trace.root.span_id)
+        self.assertIsNone(tracing.current_trace_id())
+
+    def test_span_outside_a_trace_is_a_no_op(self):
+        with tracing.span("tool") as s:
+            s.set(tool="list_coupons")
+        self.assertIsNone(tracing.current_trace_id())
+
+    def test_exports_jsonl_and_otlp(self):
+        trace = tracing.start_trace("turn", session_id="s1")
+        with self.assertRaises(RuntimeError):
+            with tracing.span("pod.resolve", store="nike"):
+                raise RuntimeError("Store nike not found")
+        trace.finish()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "spans.jsonl")
+            tracing.TraceExporter(path=path).export([trace])
+            with open(path) as handle:
+                lines = [json.loads(line) for line in handle]
+        self.assertEqual([line["name"] for line in lines], ["pod.resolve", "turn"])
+        self.assertEqual(lines[0]["error"], "Store nike not found")
+
+        otlp = tracing.otlp_payload([trace])["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        self.assertEqual(otlp[0]["parentSpanId"], trace.root.span_id)
+        self.assertEqual(otlp[0]["status"]["code"], 2)
+        self.assertEqual(otlp[1]["attributes"], [{"key": "session_id", "value": {"stringValue": "s1"}}])
+
+
+class TestChatTracing(unittest.TestCase):
+
+    def test_trace_id_on_every_event_and_timing(self):
+        TOOL_CACHE.clear()
+        model = GenericFakeChatModel(messages=iter([
+            AIMessage(content="", tool_calls=[{"name": "list_coupons", "args": {"store_name": "nike"}, "id": "c1"}]),
+            AIMessage(content="There is one coupon."),
+        ]))
+        with patch("graph.get_model", return_value=model), \
+                patch("graph.STORE_DIRECTORY.astores", new_callable=AsyncMock, return_value=[{"name": "nike"}]), \
+                patch("tool_registry.aresolve_store", new_callable=AsyncMock, return_value=("store-nike", "wp-0")), \
+                patch("tool_registry.arun_wp_cli_command", new_callable=AsyncMock, return_value='[{"id": 1}]'):
+            response = client.post("/chat", json={"message": "which coupons does store nike have now", "timing": True})
+
+        events = _events(response.text)
+        self.assertEqual([e["type"] for e in events], ["tool_call", "tool_result", "final", "timing"])
+        self.assertEqual(len({e["trace_id"] for e in events}), 1)
+
+        timing = events[-1]
+        self.assertEqual(set(timing["breakdown_ms"]), {"agent", "llm.call", "tool"})
+        tool = next(s for s in timing["spans"] if s["name"] == "tool")
+        self.assertEqual(tool["attributes"], {"tool": "list_coupons", "store": "nike", "outcome": "ok"})
+        self.assertGreaterEqual(timing["total_ms"], tool["duration_ms"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,186 @@
+import json
+import queue
+import threading
+import unittest
+from unittest.mock import patch
+
+import tools
+import wp_session
+from wp_session import RESPONSE_MARKER, SessionManager, split_wp_args
+
+
+class FakeChannel:
+    """Emulates the in-pod request loop: replies to each JSON request line."""
+
+    def __init__(self, namespace, pod, command):
+        self.namespace = namespace
+        self.pod = pod
+        self.command = command
+        self.requests = []
+        self.closed = False
+        self._lines = queue.Queue()
+        self._lines.put("Deprecated: some plugin notice\n")
+        self._lines.put(RESPONSE_MARKER + json.dumps({"ready": True}) + "\n")
+
+    def send(self, line):
+        req = json.loads(line)
+        self.requests.append(req)
+        code = 1 if "missing" in req["args"] else 0
+        reply = {
+            "id": req["id"],
+            "code": code,
+            "stdout": json.dumps({"args": req["args"], "assoc": req["assoc"]}) if code == 0 else "",
+            "stderr": "Error: Invalid product ID." if code else "",
+        }
+        self._lines.put(RESPONSE_MARKER + json.dumps(reply) + "\n")
+
+    def readline(self, timeout):
+        try:
+            return self._lines.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def alive(self):
+        return not self.closed
+
+    def close(self):
+        self.closed = True
+
+
+class TestWpCliSessions(unittest.TestCase):
+
+    def setUp(self):
+        self.channels = []
+
+        def opener(namespace, pod, command):
+            channel = FakeChannel(namespace, pod, command)
+            self.channels.append(channel)
+            return channel
+
+        self.manager = SessionManager(opener, idle_seconds=300)
+
+    def test_split_wp_args(self):
+        args, assoc = split_wp_args(["wc", "product", "update", "12", "--name=Shoe", "--force", "--no-color"])
+        self.assertEqual(args, ["wc", "product", "update", "12"])
+        self.assertEqual(assoc, {"name": "Shoe", "force": True, "color": False})
+
+    def test_commands_reuse_one_session(self):
+        base = ["wp", "--allow-root", "--user=admin"]
+        code, out, _ = self.manager.run("store-nike", "wp-0", base, ["wc", "product", "get", "5", "--format=json", "--allow-root"])
+        self.manager.run("store-nike", "wp-0", base, ["wc", "product", "list"])
+
+        self.assertEqual(code, 0)
+        self.assertEqual(json.loads(out)["assoc"], {"format": "json"})
+        self.assertEqual(len(self.channels), 1)
+        self.assertEqual(self.channels[0].command[:4], ["wp", "--allow-root", "--user=admin", "eval"])
+        self.assertEqual(len(self.channels[0].requests), 2)
+
+    def test_pod_change_restarts_session(self):
+        self.manager.run("store-nike", "wp-0", ["wp"], ["option", "get", "home"])
+        self.manager.run("store-nike", "wp-1", ["wp"], ["option", "get", "home"])
+
+        self.assertEqual(len(self.channels), 2)
+        self.assertTrue(self.channels[0].closed)
+        self.assertEqual(len(self.manager), 1)
+
+    def test_idle_sessions_are_evicted(self):
+        self.manager = SessionManager(self.manager._opener, idle_seconds=-1)
+        self.manager.run("store-nike", "wp-0", ["wp"], ["option", "get", "home"])
+        self.manager.run("store-acme", "wp-9", ["wp"], ["option", "get", "home"])
+
+        self.assertTrue(self.channels[0].closed)
+        self.assertEqual(len(self.manager), 1)
+
+    def test_slow_open_does_not_block_other_stores(self):
+        release = threading.Event()
+        opener = self.manager._opener
+
+        def slow_opener(namespace, pod, command):
+            if namespace == "store-slow":
+                release.wait(5)
+            return opener(namespace, pod, command)
+
+        self.manager = SessionManager(slow_opener, idle_seconds=300)
+        acquired = []
+        slow = [threading.Thread(target=lambda: acquired.append(self.manager._acquire("store-slow", "wp-0", ["wp"])))
+                for _ in range(2)]
+        for thread in slow:
+            thread.start()
+
+        self.manager.run("store-nike", "wp-0", ["wp"], ["option", "get", "home"])
+        self.assertEqual([c.namespace for c in self.channels], ["store-nike"])
+
+        release.set()
+        for thread in slow:
+            thread.join(5)
+        self.assertIs(acquired[0], acquired[1])
+        self.assertEqual(len(self.channels), 2)
+
+    @patch("tools._kubectl")
+    def test_run_wp_cli_command_uses_session(self, mock_kubectl):
+        with patch.object(wp_session, "WP_CLI_SESSIONS", True), patch.object(tools, "_WP_SESSIONS", self.manager):
+            ok = tools.run_wp_cli_command("store-nike", "wp-0", ["wc", "product", "get", "5"])
+            failed = tools.run_wp_cli_command("store-nike", "wp-0", ["wc", "product", "get", "missing"])
+
+        mock_kubectl.assert_not_called()
+        self.assertEqual(json.loads(ok)["args"], ["wc", "product", "get", "5"])
+        self.assertEqual(failed, "Error: Error: Invalid product ID.")
+
+    @patch("tools._kubectl")
+    def test_csv_format_is_run_as_json_and_converted(self, mock_kubectl):
+        class ListChannel(FakeChannel):
+            def send(self, line):
+                req = json.loads(line)
+                self.requests.append(req)
+                items = [{"id": 1, "name": "Shoe, red", "on_sale": True}, {"id": 2, "name": "Cap", "on_sale": False}]
+                reply = {"id": req["id"], "code": 0, "stdout": json.dumps(items), "stderr": ""}
+                self._lines.put(RESPONSE_MARKER + json.dumps(reply) + "\n")
+
+        manager = SessionManager(ListChannel)
+        with patch.object(wp_session, "WP_CLI_SESSIONS", True), patch.object(tools, "_WP_SESSIONS", manager):
+            output = tools.run_wp_cli_command(
+                "store-nike", "wp-0", ["wc", "product", "list", "--fields=id,name,on_sale", "--format=csv"]
+            )
+
+        mock_kubectl.assert_not_called()
+        channel = next(iter(manager._sessions.values())).channel
+        self.assertEqual(channel.requests[0]["assoc"]["format"], "json")
+        self.assertEqual(output, 'id,name,on_sale\n1,"Shoe, red",1\n2,Cap,')
+
+    @patch("tools._kubectl")
+    def test_uncapturable_commands_bypass_the_session(self, mock_kubectl):
+        mock_kubectl.return_value = '{"ok": false, "error": "MailPoet not found"}'
+        with patch.object(wp_session, "WP_CLI_SESSIONS", True), patch.object(tools, "_WP_SESSIONS", self.manager):
+            tools.run_wp_cli_command("store-nike", "wp-0", ["db", "query", "SELECT 1", "--format=json"])
+            result = tools.run_wp_cli_command("store-nike", "wp-0", ["eval", "echo json_encode(['ok' => false]); exit;"])
+            tools.run_wp_cli_command("store-nike", "wp-0", ["wc", "product", "list"])
+            tools.run_wp_cli_command("store-nike", "wp-0", ["post", "list", "--format=table"])
+
+        self.assertEqual(result, '{"ok": false, "error": "MailPoet not found"}')
+        self.assertEqual(mock_kubectl.call_count, 4)
+        self.assertEqual(self.channels, [])
+
+    def test_runner_can_capture(self):
+        self.assertTrue(wp_session.runner_can_capture(["wc", "product", "get", "5"]))
+        self.assertTrue(wp_session.runner_can_capture(["wc", "product", "list", "--format=csv"]))
+        self.assertTrue(wp_session.runner_can_capture(["post", "list", "--format=ids"]))
+        self.assertFalse(wp_session.runner_can_capture(["db", "query", "SELECT 1", "--format=json"]))
+        self.assertFalse(wp_session.runner_can_capture(["eval", "exit;"]))
+        self.assertFalse(wp_session.runner_can_capture(["wc", "product", "list"]))
+
+    @patch("tools._kubectl")
+    def test_falls_back_when_session_cannot_start(self, mock_kubectl):
+        def broken_opener(namespace, pod, command):
+            raise OSError("kubectl not found")
+
+        mock_kubectl.return_value = "[]"
+        manager = SessionManager(broken_opener)
+        with patch.object(wp_session, "WP_CLI_SESSIONS", True), patch.object(tools, "_WP_SESSIONS", manager):
+            result = tools.run_wp_cli_command("store-nike", "wp-0", ["wc", "product", "list", "--format=json"])
+
+        self.assertEqual(result, "[]")
+        mock_kubectl.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Read-through result cache for AI Orchestrator tools.
+Keeps recent outputs of read-only inspection tools per store, bounded by a TTL
+and an LRU size limit, and drops them when a mutating tool touches that store.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from store_directory import store_key
+
+# ---- Config ----
+TOOL_CACHE_ENABLED = os.getenv("TOOL_CACHE_ENABLED", "1").strip().lower() in {"1", "true", "yes"}
+TOOL_CACHE_TTL_SECONDS = float(os.getenv("TOOL_CACHE_TTL_SECONDS", "30"))
+TOOL_CACHE_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "512"))
+
+# Dynamic MCP tools are named prefix_toolname (e.g., woo_create_product).
+# A tool is a mutation if its core name starts with a write verb.
+MUTATING_PREFIXES = [
+    "create", "update", "delete", "send", "import", "set", "flush", "activate",
+    "replace", "sync", "run",
+]
+
+# Inspection tools whose data only changes through the admin tools above.
+# Orders, customers and mail change from the storefront, so they are not cached.
+CACHEABLE_TOOLS = {"list_products", "get_product", "list_coupons", "list_popups"}
+
+RESOURCES = ("product", "coupon", "popup", "order", "customer")
+# Order changes restock products and update customer totals.
+ALSO_AFFECTS = {"order": {"product", "customer"}}
+
+
+def is_mutating_tool(name: str) -> bool:
+    name = (name or "").lower()
+    return any(f"_{p}_" in f"_{name}_" or name.split("_")[-1].startswith(p) for p in MUTATING_PREFIXES)
+
+
+def resource_of(name: str) -> Optional[str]:
+    name = (name or "").lower()
+    return next((r for r in RESOURCES if r in name), None)
+
+
+class ToolCache:
+    """Per-store LRU of tool outputs keyed by tool name and normalised arguments.
+    Stores are keyed by store_key(), so every alias of a store shares its entries."""
+
+    def __init__(self, ttl: float = TOOL_CACHE_TTL_SECONDS, max_entries: int = TOOL_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # (store, tool, args key) -> (expires_at, resource, output)
+        self._entries: OrderedDict[tuple[str, str, str], tuple[float, Optional[str], str]] = OrderedDict()
+        # Bumped by every mutation; a read that started before it must not be stored.
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def get(self, store: str, tool: str, args_key: str) -> Optional[str]:
+        key = (store, tool, args_key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def generation(self, store: str) -> int:
+        return self._generations.get(store, 0)
+
+    def put(self, store: str, tool: str, args_key: str, output: str, generation: int) -> None:
+        with self._lock:
+            if self._generations.get(store, 0) != generation:
+                return
+            self._entries[(store, tool, args_key)] = (time.monotonic() + self.ttl, resource_of(tool), output)
+            self._entries.move_to_end((store, tool, args_key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, store: str, mutation: Optional[str] = None) -> None:
+        """Drops the store's entries affected by `mutation` (all of them if its resource is unknown)."""
+        resource = resource_of(mutation) if mutation else None
+        affected = None if resource is None else {resource} | ALSO_AFFECTS.get(resource, set())
+        with self._lock:
+            self._generations[store] = self._generations.get(store, 0) + 1
+            for key, (_, entry_resource, _) in list(self._entries.items()):
+                if key[0] == store and (affected is None or entry_resource in affected):
+                    del self._entries[key]
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+        }
+
+
+TOOL_CACHE = ToolCache()
+
+
+def args_key(tool, kwargs: dict) -> str:
+    """Arguments after schema defaults are applied, so omitted and explicit defaults share an entry."""
+    fields = {k: v for k, v in kwargs.items() if k in tool.args_schema.model_fields}
+    params = tool.args_schema(**fields).model_dump()
+    params.pop("store_name", None)
+    return json.dumps({k: v for k, v in params.items() if v is not None}, sort_keys=True, default=str)
+
+
+def install(tool, cache: ToolCache = TOOL_CACHE) -> None:
+    """Wraps a StructuredTool's func/coroutine with read-through caching or invalidation."""
+    if is_mutating_tool(tool.name):
+        _install_invalidation(tool, cache)
+    elif tool.name in CACHEABLE_TOOLS:
+        _install_read_through(tool, cache)
+
+
+def _install_read_through(tool, cache: ToolCache) -> None:
+    func, coroutine = tool.func, tool.coroutine
+
+    def lookup(kwargs):
+        store = store_key(kwargs.get("store_name", ""))
+        key = args_key(tool, kwargs)
+        return store, key, cache.get(store, tool.name, key), cache.generation(store)
+
+    def remember(kwargs, store, key, output, generation):
+        # The call may have loaded the store list; if the name now resolves to a
+        # different key, a write under another alias could miss this entry.
+        if store_key(kwargs.get("store_name", "")) != store:
+            return
+        if isinstance(output, str) and not output.startswith("Error:"):
+            cache.put(store, tool.name, key, output, generation)
+
+    @functools.wraps(func)
+    def cached(**kwargs):
+        if not TOOL_CACHE_ENABLED:
+            return func(**kwargs)
+        store, key, hit, generation = lookup(kwargs)
+        if hit is not None:
+            return hit
+        output = func(**kwargs)
+        remember(kwargs, store, key, output, generation)
+        return output
+
+    @functools.wraps(coroutine)
+    async def acached(**kwargs):
+        if not TOOL_CACHE_ENABLED:
+            return await coroutine(**kwargs)
+        store, key, hit, generation = lookup(kwargs)
+        if hit is not None:
+            return hit
+        output = await coroutine(**kwargs)
+        remember(kwargs, store, key, output, generation)
+        return output
+
+    tool.func, tool.coroutine = cached, acached
+
+
+def _install_invalidation(tool, cache: ToolCache) -> None:
+    func, coroutine = tool.func, tool.coroutine
+
+    def invalidate(kwargs):
+        cache.invalidate(store_key(kwargs.get("store_name", "")), tool.name)
+
+    @functools.wraps(func)
+    def invalidating(**kwargs):
+        try:
+            return func(**kwargs)
+        finally:
+            invalidate(kwargs)
+
+    @functools.wraps(coroutine)
+    async def ainvalidating(**kwargs):
+        try:
+            return await coroutine(**kwargs)
+        finally:
+            invalidate(kwargs)
+
+    tool.func, tool.coroutine = invalidating, ainvalidating
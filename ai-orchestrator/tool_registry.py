@@ -1,10 +1,19 @@
 # tool_registry.py
 
+import functools
 import json
-from typing import Optional, Dict, Any
-from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, Callable, List, Literal
+from pydantic import BaseModel, Field, ValidationError
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import StructuredTool
-from tools import run_wp_cli_command, get_store_pod_info
+from langgraph.constants import CONFIG_KEY_STREAM_WRITER
+import catalog_import
+from wp_session import runner_can_capture
+import tool_cache
+from tools import (
+    run_wp_cli_command, get_store_pod_info, arun_wp_cli_command, aget_store_pod_info,
+    run_wp_cli_batch, arun_wp_cli_batch, check_batch_size, import_products, aimport_products,
+)
 
 
 # ============================================================
@@ -15,36 +24,112 @@ def resolve_store(store_name: str):
     return get_store_pod_info(store_name)
 
 
+async def aresolve_store(store_name: str):
+    return await aget_store_pod_info(store_name)
+
+
+def progress_writer(tool_name: str, config: Optional[RunnableConfig]) -> Optional[Callable[[dict], None]]:
+    """Emits `tool_progress` events on the graph's custom stream, if one is attached."""
+    writer = ((config or {}).get("configurable") or {}).get(CONFIG_KEY_STREAM_WRITER)
+    if writer is None:
+        return None
+    return lambda progress: writer({"type": "tool_progress", "name": tool_name, **progress})
+
+
+def wp_tool(fn: Callable | None = None, *, postprocess: Callable[[str], str] | None = None):
+    """
+    Turns a WP-CLI args builder into a tool implementation.
+
+    The decorated function returns the WP-CLI arguments; calling it resolves the
+    store pod and runs them. `.acall` is the coroutine twin registered with
+    StructuredTool, and `.build` exposes the bare args builder.
+    """
+    def decorate(build: Callable[..., list[str]]):
+        def store_of(args, kwargs) -> str:
+            return kwargs["store_name"] if "store_name" in kwargs else args[0]
+
+        @functools.wraps(build)
+        def call(*args, **kwargs):
+            ns, pod = resolve_store(store_of(args, kwargs))
+            output = run_wp_cli_command(ns, pod, build(*args, **kwargs))
+            return postprocess(output) if postprocess else output
+
+        @functools.wraps(build)
+        async def acall(*args, **kwargs):
+            ns, pod = await aresolve_store(store_of(args, kwargs))
+            output = await arun_wp_cli_command(ns, pod, build(*args, **kwargs))
+            return postprocess(output) if postprocess else output
+
+        call.acall = acall
+        call.build = build
+        call.postprocess = postprocess
+        return call
+
+    return decorate(fn) if fn is not None else decorate
+
+
+# Read tools return only these fields unless the agent asks for others
+# (WP-CLI --fields); descriptions, meta_data, images and links can be
+# many times larger than the fields the agent actually needs.
+FIELDS_DESCRIPTION = 'Fields to return; ["*"] returns every field.'
+FORMAT_DESCRIPTION = "csv returns a header row and one line per item, which is much smaller than json for long lists."
+
+
+def output_args(fields: Optional[List[str]], default_fields: List[str], format: str = "json") -> list[str]:
+    """`--fields` and `--format` arguments for a WP-CLI read command."""
+    args = []
+    if fields != ["*"]:
+        args.append(f"--fields={','.join(fields or default_fields)}")
+    args.append(f"--format={format}")
+    return args
+
+
 # ============================================================
 # PRODUCTS
 # ============================================================
 
+PRODUCT_LIST_FIELDS = [
+    "id", "name", "sku", "type", "status", "price", "regular_price", "sale_price",
+    "stock_status", "stock_quantity",
+]
+PRODUCT_FIELDS = PRODUCT_LIST_FIELDS + [
+    "on_sale", "manage_stock", "categories", "short_description", "description", "permalink",
+]
+
 class ListProductsInput(BaseModel):
     store_name: str
     per_page: int = 10
     page: int = 1
     status: str = "any"
+    fields: Optional[List[str]] = Field(None, description=FIELDS_DESCRIPTION)
+    format: Literal["json", "csv"] = Field("json", description=FORMAT_DESCRIPTION)
 
-def list_products(store_name: str, per_page: int = 10, page: int = 1, status: str = "any"):
-    ns, pod = resolve_store(store_name)
+@wp_tool
+def list_products(
+    store_name: str,
+    per_page: int = 10,
+    page: int = 1,
+    status: str = "any",
+    fields: Optional[List[str]] = None,
+    format: str = "json",
+):
     args = [
         "wc", "product", "list",
         f"--per_page={per_page}",
         f"--page={page}",
         f"--status={status}",
-        "--format=json"
     ]
-    return run_wp_cli_command(ns, pod, args)
+    return args + output_args(fields, PRODUCT_LIST_FIELDS, format)
 
 
 class GetProductInput(BaseModel):
     store_name: str
     id: int
+    fields: Optional[List[str]] = Field(None, description=FIELDS_DESCRIPTION)
 
-def get_product(store_name: str, id: int):
-    ns, pod = resolve_store(store_name)
-    args = ["wc", "product", "get", str(id), "--format=json"]
-    return run_wp_cli_command(ns, pod, args)
+@wp_tool
+def get_product(store_name: str, id: int, fields: Optional[List[str]] = None):
+    return ["wc", "product", "get", str(id)] + output_args(fields, PRODUCT_FIELDS)
 
 
 class CreateProductInput(BaseModel):
@@ -57,6 +142,7 @@ class CreateProductInput(BaseModel):
     sku: Optional[str] = None
     status: str = "publish"
 
+@wp_tool
 def create_product(
     store_name: str,
     name: str,
@@ -67,8 +153,6 @@ def create_product(
     sku: Optional[str] = None,
     status: str = "publish",
 ):
-    ns, pod = resolve_store(store_name)
-
     args = ["wc", "product", "create"]
 
     for key, value in {
@@ -85,7 +169,7 @@ def create_product(
 
     args.append("--porcelain")
 
-    return run_wp_cli_command(ns, pod, args)
+    return args
 
 
 
@@ -98,15 +182,15 @@ class UpdateProductInput(BaseModel):
     status: Optional[str] = None
     stock_quantity: Optional[int] = None
 
+@wp_tool
 def update_product(**kwargs):
-    ns, pod = resolve_store(kwargs["store_name"])
     args = ["wc", "product", "update", str(kwargs["id"])]
 
     for key in ["name", "regular_price", "sale_price", "status", "stock_quantity"]:
         if kwargs.get(key) is not None:
             args.append(f"--{key}={kwargs[key]}")
 
-    return run_wp_cli_command(ns, pod, args)
+    return args
 
 
 class DeleteProductInput(BaseModel):
@@ -114,42 +198,116 @@ class DeleteProductInput(BaseModel):
     id: int
     force: bool = False
 
+@wp_tool
 def delete_product(store_name: str, id: int, force: bool = False):
-    ns, pod = resolve_store(store_name)
     args = ["wc", "product", "delete", str(id)]
     if force:
         args.append("--force")
-    return run_wp_cli_command(ns, pod, args)
+    return args
+
+
+class ImportProductsCsvInput(BaseModel):
+    store_name: str
+    csv_path: Optional[str] = Field(None, description="Path of a CSV file in the orchestrator's import directory.")
+    csv_content: Optional[str] = Field(None, description="CSV text pasted by the user.")
+    upload_id: Optional[str] = Field(None, description="Id returned by POST /uploads.")
+    images: bool = Field(True, description="Download images for new products; slow for large catalogs.")
+
+def _import_source(csv_path, csv_content, upload_id):
+    # Fail fast on a bad source before touching the pod.
+    if csv_content is None:
+        with catalog_import.open_csv(csv_path, None, upload_id):
+            pass
+    elif csv_path or upload_id:
+        raise ValueError("Provide exactly one of csv_path, csv_content or upload_id")
+
+def import_products_csv(
+    store_name: str,
+    csv_path: Optional[str] = None,
+    csv_content: Optional[str] = None,
+    upload_id: Optional[str] = None,
+    images: bool = True,
+    config: RunnableConfig = None,
+):
+    try:
+        _import_source(csv_path, csv_content, upload_id)
+    except (ValueError, OSError) as exc:
+        return json.dumps({"ok": False, "error": str(exc)})
+    ns, pod = resolve_store(store_name)
+    with catalog_import.open_csv(csv_path, csv_content, upload_id) as lines:
+        summary = import_products(
+            ns, pod, catalog_import.iter_products(lines),
+            on_progress=progress_writer("import_products_csv", config), images=images,
+        )
+    if upload_id:
+        catalog_import.remove_upload(upload_id)
+    return json.dumps(summary)
+
+async def _aimport_products_csv(
+    store_name: str,
+    csv_path: Optional[str] = None,
+    csv_content: Optional[str] = None,
+    upload_id: Optional[str] = None,
+    images: bool = True,
+    config: RunnableConfig = None,
+):
+    try:
+        _import_source(csv_path, csv_content, upload_id)
+    except (ValueError, OSError) as exc:
+        return json.dumps({"ok": False, "error": str(exc)})
+    ns, pod = await aresolve_store(store_name)
+    with catalog_import.open_csv(csv_path, csv_content, upload_id) as lines:
+        summary = await aimport_products(
+            ns, pod, catalog_import.iter_products(lines),
+            on_progress=progress_writer("import_products_csv", config), images=images,
+        )
+    if upload_id:
+        catalog_import.remove_upload(upload_id)
+    return json.dumps(summary)
+
+import_products_csv.acall = _aimport_products_csv
 
 
 # ============================================================
 # ORDERS
 # ============================================================
 
+ORDER_LIST_FIELDS = [
+    "id", "number", "status", "date_created", "total", "currency", "customer_id", "payment_method_title",
+]
+ORDER_FIELDS = ORDER_LIST_FIELDS + ["customer_note", "billing", "shipping", "line_items"]
+
 class ListOrdersInput(BaseModel):
     store_name: str
     per_page: int = 10
     status: str = "any"
+    fields: Optional[List[str]] = Field(None, description=FIELDS_DESCRIPTION)
+    format: Literal["json", "csv"] = Field("json", description=FORMAT_DESCRIPTION)
 
-def list_orders(store_name: str, per_page: int = 10, status: str = "any"):
-    ns, pod = resolve_store(store_name)
+@wp_tool
+def list_orders(
+    store_name: str,
+    per_page: int = 10,
+    status: str = "any",
+    fields: Optional[List[str]] = None,
+    format: str = "json",
+):
     args = [
         "wc", "shop_order", "list",
         f"--per_page={per_page}",
         f"--status={status}",
-        "--format=json"
     ]
-    return run_wp_cli_command(ns, pod, args)
+    return args + output_args(fields, ORDER_LIST_FIELDS, format)
 
 
 class GetOrderInput(BaseModel):
     store_name: str
     id: int
+    fields: Optional[List[str]] = Field(None, description=FIELDS_DESCRIPTION)
 
-def get_order(store_name: str, id: int):
-    ns, pod = resolve_store(store_name)
-    args = ["wc", "shop_order", "get", str(id), "--format=json"]
-    return run_wp_cli_command(ns, pod, args)
+@wp_tool
+def get_order(store_name: str, id: int, fields: Optional[List[str]] = None):
+    return ["wc", "shop_order", "get", str(id)] + output_args(fields, ORDER_FIELDS)
 
 
 class UpdateOrderInput(BaseModel):
@@ -158,8 +316,8 @@ class UpdateOrderInput(BaseModel):
     status: Optional[str] = None
     customer_note: Optional[str] = None
 
+@wp_tool
 def update_order(**kwargs):
-    ns, pod = resolve_store(kwargs["store_name"])
     args = ["wc", "shop_order", "update", str(kwargs["id"])]
 
     if kwargs.get("status"):
@@ -167,20 +325,26 @@ def update_order(**kwargs):
     if kwargs.get("customer_note"):
         args.append(f"--customer_note={kwargs['customer_note']}")
 
-    return run_wp_cli_command(ns, pod, args)
+    return args
 
 
 # ============================================================
 # COUPONS
 # ============================================================
 
+COUPON_LIST_FIELDS = [
+    "id", "code", "amount", "discount_type", "description", "date_expires",
+    "usage_count", "usage_limit", "individual_use",
+]
+
 class ListCouponsInput(BaseModel):
     store_name: str
+    fields: Optional[List[str]] = Field(None, description=FIELDS_DESCRIPTION)
+    format: Literal["json", "csv"] = Field("json", description=FORMAT_DESCRIPTION)
 
-def list_coupons(store_name: str):
-    ns, pod = resolve_store(store_name)
-    args = ["wc", "shop_coupon", "list", "--format=json"]
-    return run_wp_cli_command(ns, pod, args)
+@wp_tool
+def list_coupons(store_name: str, fields: Optional[List[str]] = None, format: str = "json"):
+    return ["wc", "shop_coupon", "list"] + output_args(fields, COUPON_LIST_FIELDS, format)
 
 
 class CreateCouponInput(BaseModel):
@@ -192,8 +356,13 @@ class CreateCouponInput(BaseModel):
     individual_use: bool = False
     usage_limit: Optional[int] = None
 
+def _coupon_result(output: str) -> str:
+    if output.startswith("Error:"):
+        return json.dumps({"ok": False, "error": output})
+    return json.dumps({"ok": True, "id": output.strip()})
+
+@wp_tool(postprocess=_coupon_result)
 def create_coupon(**kwargs):
-    ns, pod = resolve_store(kwargs["store_name"])
     args = ["wc", "shop_coupon", "create"]
 
     for key in ["code", "amount", "discount_type", "description", "usage_limit"]:
@@ -205,50 +374,56 @@ def create_coupon(**kwargs):
 
     args.append("--porcelain")
 
-    output = run_wp_cli_command(ns, pod, args)
-    if output.startswith("Error:"):
-        return json.dumps({"ok": False, "error": output})
-    return json.dumps({"ok": True, "id": output.strip()})
+    return args
 
 
 class DeleteCouponInput(BaseModel):
     store_name: str
     id: int
 
+@wp_tool
 def delete_coupon(store_name: str, id: int):
-    ns, pod = resolve_store(store_name)
-    args = ["wc", "shop_coupon", "delete", str(id), "--force"]
-    return run_wp_cli_command(ns, pod, args)
+    return ["wc", "shop_coupon", "delete", str(id), "--force"]
 
 
 # ============================================================
 # CUSTOMERS
 # ============================================================
 
+CUSTOMER_LIST_FIELDS = ["id", "email", "first_name", "last_name", "username", "role", "date_created"]
+CUSTOMER_FIELDS = CUSTOMER_LIST_FIELDS + ["billing", "shipping", "is_paying_customer"]
+
 class ListCustomersInput(BaseModel):
     store_name: str
     per_page: int = 10
     role: str = "all"
+    fields: Optional[List[str]] = Field(None, description=FIELDS_DESCRIPTION)
+    format: Literal["json", "csv"] = Field("json", description=FORMAT_DESCRIPTION)
 
-def list_customers(store_name: str, per_page: int = 10, role: str = "all"):
-    ns, pod = resolve_store(store_name)
+@wp_tool
+def list_customers(
+    store_name: str,
+    per_page: int = 10,
+    role: str = "all",
+    fields: Optional[List[str]] = None,
+    format: str = "json",
+):
     args = [
         "wc", "customer", "list",
         f"--per_page={per_page}",
         f"--role={role}",
-        "--format=json"
     ]
-    return run_wp_cli_command(ns, pod, args)
+    return args + output_args(fields, CUSTOMER_LIST_FIELDS, format)
 
 
 class GetCustomerInput(BaseModel):
     store_name: str
     id: int
+    fields: Optional[List[str]] = Field(None, description=FIELDS_DESCRIPTION)
 
-def get_customer(store_name: str, id: int):
-    ns, pod = resolve_store(store_name)
-    args = ["wc", "customer", "get", str(id), "--format=json"]
-    return run_wp_cli_command(ns, pod, args)
+@wp_tool
+def get_customer(store_name: str, id: int, fields: Optional[List[str]] = None):
+    return ["wc", "customer", "get", str(id)] + output_args(fields, CUSTOMER_FIELDS)
     
     
 # ============================================================
@@ -261,8 +436,8 @@ class CreatePopupInput(BaseModel):
     content: str
     status: str = "publish"
 
+@wp_tool
 def create_popup(store_name: str, title: str, content: str, status: str = "publish"):
-    ns, pod = resolve_store(store_name)
     args = [
         "post", "create",
         "--post_type=popup",
@@ -271,16 +446,19 @@ def create_popup(store_name: str, title: str, content: str, status: str = "publi
         f"--post_status={status}",
         "--porcelain"
     ]
-    return run_wp_cli_command(ns, pod, args)
+    return args
+
 
+POPUP_LIST_FIELDS = ["ID", "post_title", "post_status", "post_date"]
 
 class ListPopupsInput(BaseModel):
     store_name: str
+    fields: Optional[List[str]] = Field(None, description=FIELDS_DESCRIPTION)
+    format: Literal["json", "csv"] = Field("json", description=FORMAT_DESCRIPTION)
 
-def list_popups(store_name: str):
-    ns, pod = resolve_store(store_name)
-    args = ["post", "list", "--post_type=popup", "--format=json"]
-    return run_wp_cli_command(ns, pod, args)
+@wp_tool
+def list_popups(store_name: str, fields: Optional[List[str]] = None, format: str = "json"):
+    return ["post", "list", "--post_type=popup"] + output_args(fields, POPUP_LIST_FIELDS, format)
     
     
 class UpdatePopupInput(BaseModel):
@@ -290,9 +468,8 @@ class UpdatePopupInput(BaseModel):
     content: Optional[str] = None
     status: Optional[str] = None
 
+@wp_tool
 def update_popup(**kwargs):
-    ns, pod = resolve_store(kwargs["store_name"])
-
     args = ["post", "update", str(kwargs["popup_id"])]
 
     if kwargs.get("title"):
@@ -302,17 +479,16 @@ def update_popup(**kwargs):
     if kwargs.get("status"):
         args.append(f"--post_status={kwargs['status']}")
 
-    return run_wp_cli_command(ns, pod, args)
+    return args
     
     
 class DeletePopupInput(BaseModel):
     store_name: str
     popup_id: int
 
+@wp_tool
 def delete_popup(store_name: str, popup_id: int):
-    ns, pod = resolve_store(store_name)
-    args = ["post", "delete", str(popup_id), "--force"]
-    return run_wp_cli_command(ns, pod, args)
+    return ["post", "delete", str(popup_id), "--force"]
     
     
 class SetPopupSettingsInput(BaseModel):
@@ -320,15 +496,7 @@ class SetPopupSettingsInput(BaseModel):
     popup_id: int
     settings: Dict[str, Any]
 
-def set_popup_settings(store_name: str, popup_id: int, settings: Dict[str, Any]):
-    ns, pod = resolve_store(store_name)
-
-    # Get current settings
-    current_raw = run_wp_cli_command(
-        ns, pod,
-        ["post", "meta", "get", str(popup_id), "_pum_popup_settings", "--format=json"]
-    )
-
+def _popup_settings_args(popup_id: int, current_raw: str, settings: Dict[str, Any]) -> list[str]:
     try:
         current_settings = json.loads(current_raw) if current_raw else {}
     except:
@@ -339,13 +507,30 @@ def set_popup_settings(store_name: str, popup_id: int, settings: Dict[str, Any])
     else:
         current_settings = settings
 
-    return run_wp_cli_command(
+    return ["post", "meta", "update",
+            str(popup_id),
+            "_pum_popup_settings",
+            json.dumps(current_settings)]
+
+def set_popup_settings(store_name: str, popup_id: int, settings: Dict[str, Any]):
+    ns, pod = resolve_store(store_name)
+
+    # Get current settings
+    current_raw = run_wp_cli_command(
+        ns, pod,
+        ["post", "meta", "get", str(popup_id), "_pum_popup_settings", "--format=json"]
+    )
+    return run_wp_cli_command(ns, pod, _popup_settings_args(popup_id, current_raw, settings))
+
+async def _aset_popup_settings(store_name: str, popup_id: int, settings: Dict[str, Any]):
+    ns, pod = await aresolve_store(store_name)
+    current_raw = await arun_wp_cli_command(
         ns, pod,
-        ["post", "meta", "update",
-         str(popup_id),
-         "_pum_popup_settings",
-         json.dumps(current_settings)]
+        ["post", "meta", "get", str(popup_id), "_pum_popup_settings", "--format=json"]
     )
+    return await arun_wp_cli_command(ns, pod, _popup_settings_args(popup_id, current_raw, settings))
+
+set_popup_settings.acall = _aset_popup_settings
 
 
 # ============================================================
@@ -360,9 +545,8 @@ class CreateBannerInput(BaseModel):
     cta_text: str = "Shop Now"
     enabled: bool = True
 
+@wp_tool
 def urumi_create_banner(**kwargs):
-    ns, pod = resolve_store(kwargs["store_name"])
-
     enabled = "true" if kwargs.get("enabled", True) else "false"
 
     args = [
@@ -373,7 +557,7 @@ def urumi_create_banner(**kwargs):
         f"--cta_text={kwargs.get('cta_text', 'Shop Now')}",
         f"--enabled={enabled}"
     ]
-    return run_wp_cli_command(ns, pod, args)
+    return args
 
 
 # ============================================================
@@ -384,10 +568,10 @@ class CatcherListEmailsInput(BaseModel):
     store_name: str
     limit: int = 5
 
+@wp_tool
 def catcher_list_emails(store_name: str, limit: int = 5):
-    ns, pod = resolve_store(store_name)
     sql = f"SELECT * FROM wp_mail_logging ORDER BY id DESC LIMIT {limit}"
-    return run_wp_cli_command(ns, pod, ["db", "query", sql, "--format=json"])
+    return ["db", "query", sql, "--format=json"]
 
 
 # ============================================================
@@ -397,9 +581,8 @@ def catcher_list_emails(store_name: str, limit: int = 5):
 class MailpoetListSubscribersInput(BaseModel):
     store_name: str
 
+@wp_tool
 def mailpoet_list_subscribers(store_name: str):
-    ns, pod = resolve_store(store_name)
-
     php = """
     try {
         if (!class_exists('\\MailPoet\\\\API\\\\API')) {
@@ -412,7 +595,7 @@ def mailpoet_list_subscribers(store_name: str):
         echo json_encode(['ok'=>false,'error'=>$e->getMessage()]);
     }
     """
-    return run_wp_cli_command(ns, pod, ["eval", php])
+    return ["eval", php]
 
 
 class MailpoetCreateCampaignInput(BaseModel):
@@ -420,9 +603,8 @@ class MailpoetCreateCampaignInput(BaseModel):
     subject: str
     body: str
 
+@wp_tool
 def mailpoet_create_campaign(store_name: str, subject: str, body: str):
-    ns, pod = resolve_store(store_name)
-
     php = f"""
     try {{
         $api = \\MailPoet\\\\API\\\\API::MP('v1');
@@ -436,7 +618,7 @@ def mailpoet_create_campaign(store_name: str, subject: str, body: str):
         echo json_encode(['ok'=>false,'error'=>$e->getMessage()]);
     }}
     """
-    return run_wp_cli_command(ns, pod, ["eval", php])
+    return ["eval", php]
 
 
 # ============================================================
@@ -446,9 +628,9 @@ def mailpoet_create_campaign(store_name: str, subject: str, body: str):
 class FlushCssInput(BaseModel):
     store_name: str
 
+@wp_tool
 def flush_css(store_name: str):
-    ns, pod = resolve_store(store_name)
-    return run_wp_cli_command(ns, pod, ["elementor", "flush-css"])
+    return ["elementor", "flush-css"]
 
 
 class ReplaceUrlsInput(BaseModel):
@@ -456,24 +638,24 @@ class ReplaceUrlsInput(BaseModel):
     old_url: str
     new_url: str
 
+@wp_tool
 def replace_urls(store_name: str, old_url: str, new_url: str):
-    ns, pod = resolve_store(store_name)
-    return run_wp_cli_command(ns, pod, ["elementor", "replace-urls", old_url, new_url])
+    return ["elementor", "replace-urls", old_url, new_url]
     
 class LibrarySyncInput(BaseModel):
     store_name: str
 
+@wp_tool
 def library_sync(store_name: str):
-    ns, pod = resolve_store(store_name)
-    return run_wp_cli_command(ns, pod, ["elementor", "library-sync"])
+    return ["elementor", "library-sync"]
 
 
 class SystemInfoInput(BaseModel):
     store_name: str
 
+@wp_tool
 def system_info(store_name: str):
-    ns, pod = resolve_store(store_name)
-    return run_wp_cli_command(ns, pod, ["elementor", "system-info"])
+    return ["elementor", "system-info"]
 
 
 
@@ -488,6 +670,7 @@ ALL_TOOLS = [
 
     StructuredTool.from_function(
         list_products,
+        coroutine=list_products.acall,
         name="list_products",
         description="List WooCommerce products with optional pagination and status filtering.",
         args_schema=ListProductsInput
@@ -495,6 +678,7 @@ ALL_TOOLS = [
 
     StructuredTool.from_function(
         get_product,
+        coroutine=get_product.acall,
         name="get_product",
         description="Retrieve detailed information for a specific WooCommerce product by ID.",
         args_schema=GetProductInput
@@ -502,6 +686,7 @@ ALL_TOOLS = [
 
     StructuredTool.from_function(
         create_product,
+        coroutine=create_product.acall,
         name="create_product",
         description="Create a new WooCommerce product with name, price, and optional metadata.",
         args_schema=CreateProductInput
@@ -509,6 +694,7 @@ ALL_TOOLS = [
 
     StructuredTool.from_function(
         update_product,
+        coroutine=update_product.acall,
         name="update_product",
         description="Update fields of an existing WooCommerce product such as price, stock, or status.",
         args_schema=UpdateProductInput
@@ -516,13 +702,27 @@ ALL_TOOLS = [
 
     StructuredTool.from_function(
         delete_product,
+        coroutine=delete_product.acall,
         name="delete_product",
         description="Delete a WooCommerce product by ID. Can permanently remove if force is true.",
         args_schema=DeleteProductInput
     ),
 
+    StructuredTool.from_function(
+        import_products_csv,
+        coroutine=import_products_csv.acall,
+        name="import_products_csv",
+        description=(
+            "Bulk create or update WooCommerce products from a CSV in WooCommerce export format "
+            "(local path, pasted content, or an upload id). Products are matched by SKU. "
+            "Use this instead of repeated create_product calls for more than a few products."
+        ),
+        args_schema=ImportProductsCsvInput
+    ),
+
     StructuredTool.from_function(
         list_orders,
+        coroutine=list_orders.acall,
         name="list_orders",
         description="List WooCommerce orders with optional filtering by status and pagination.",
         args_schema=ListOrdersInput
@@ -530,6 +730,7 @@ ALL_TOOLS = [
 
     StructuredTool.from_function(
         get_order,
+        coroutine=get_order.acall,
         name="get_order",
         description="Retrieve detailed information for a specific WooCommerce order by ID.",
         args_schema=GetOrderInput
@@ -537,6 +738,7 @@ ALL_TOOLS = [
 
     StructuredTool.from_function(
         update_order,
+        coroutine=update_order.acall,
         name="update_order",
         description="Update a WooCommerce order status or customer note.",
         args_schema=UpdateOrderInput
@@ -544,6 +746,7 @@ ALL_TOOLS = [
 
     StructuredTool.from_function(
         list_coupons,
+        coroutine=list_coupons.acall,
         name="list_coupons",
         description="List all WooCommerce discount coupons.",
         args_schema=ListCouponsInput
@@ -551,6 +754,7 @@ ALL_TOOLS = [
 
     StructuredTool.from_function(
         create_coupon,
+        coroutine=create_coupon.acall,
         name="create_coupon",
         description="Create a WooCommerce discount coupon with amount and discount type.",
         args_schema=CreateCouponInput
@@ -558,6 +762,7 @@ ALL_TOOLS = [
 
     StructuredTool.from_function(
         delete_coupon,
+        coroutine=delete_coupon.acall,
         name="delete_coupon",
         description="Delete a WooCommerce coupon permanently by ID.",
         args_schema=DeleteCouponInput
@@ -565,6 +770,7 @@ ALL_TOOLS = [
 
     StructuredTool.from_function(
         list_customers,
+        coroutine=list_customers.acall,
         name="list_customers",
         description="List WooCommerce customers with optional role and pagination filters.",
         args_schema=ListCustomersInput
@@ -572,6 +778,7 @@ ALL_TOOLS = [
 
     StructuredTool.from_function(
         get_customer,
+        coroutine=get_customer.acall,
         name="get_customer",
         description="Retrieve detailed information for a specific WooCommerce customer by ID.",
         args_schema=GetCustomerInput
@@ -581,6 +788,7 @@ ALL_TOOLS = [
 
     StructuredTool.from_function(
         create_popup,
+        coroutine=create_popup.acall,
         name="create_popup",
         description="Create a new Popup Maker popup with title and content.",
         args_schema=CreatePopupInput
@@ -588,6 +796,7 @@ ALL_TOOLS = [
 
     StructuredTool.from_function(
         list_popups,
+        coroutine=list_popups.acall,
         name="list_popups",
         description="List all Popup Maker popups for a store.",
         args_schema=ListPopupsInput
@@ -595,6 +804,7 @@ ALL_TOOLS = [
 
     StructuredTool.from_function(
         update_popup,
+        coroutine=update_popup.acall,
         name="update_popup",
         description="Update an existing Popup Maker popup's title, content, or status.",
         args_schema=UpdatePopupInput
@@ -602,6 +812,7 @@ ALL_TOOLS = [
 
     StructuredTool.from_function(
         delete_popup,
+        coroutine=delete_popup.acall,
         name="delete_popup",
         description="Delete a Popup Maker popup permanently by ID.",
         args_schema=DeletePopupInput
@@ -609,6 +820,7 @@ ALL_TOOLS = [
 
     StructuredTool.from_function(
         set_popup_settings,
+        coroutine=set_popup_settings.acall,
         name="set_popup_settings",
         description="Update advanced settings for a Popup Maker popup such as triggers or display conditions.",
         args_schema=SetPopupSettingsInput
@@ -618,6 +830,7 @@ ALL_TOOLS = [
 
     StructuredTool.from_function(
         urumi_create_banner,
+        coroutine=urumi_create_banner.acall,
         name="urumi_create_banner",
         description="Create or update a store-wide Urumi announcement banner.",
         args_schema=CreateBannerInput
@@ -627,6 +840,7 @@ ALL_TOOLS = [
 
     StructuredTool.from_function(
         catcher_list_emails,
+        coroutine=catcher_list_emails.acall,
         name="catcher_list_emails",
         description="List recently captured outgoing emails from the store email logging system.",
         args_schema=CatcherListEmailsInput
@@ -636,6 +850,7 @@ ALL_TOOLS = [
 
     StructuredTool.from_function(
         mailpoet_list_subscribers,
+        coroutine=mailpoet_list_subscribers.acall,
         name="mailpoet_list_subscribers",
         description="Retrieve MailPoet subscriber statistics for the store.",
         args_schema=MailpoetListSubscribersInput
@@ -643,6 +858,7 @@ ALL_TOOLS = [
 
     StructuredTool.from_function(
         mailpoet_create_campaign,
+        coroutine=mailpoet_create_campaign.acall,
         name="mailpoet_create_campaign",
         description="Create a new MailPoet email campaign with subject and HTML body.",
         args_schema=MailpoetCreateCampaignInput
@@ -652,6 +868,7 @@ ALL_TOOLS = [
 
     StructuredTool.from_function(
         flush_css,
+        coroutine=flush_css.acall,
         name="flush_css",
         description="Flush Elementor generated CSS cache.",
         args_schema=FlushCssInput
@@ -659,6 +876,7 @@ ALL_TOOLS = [
 
     StructuredTool.from_function(
         replace_urls,
+        coroutine=replace_urls.acall,
         name="replace_urls",
         description="Replace old URLs with new URLs inside Elementor content.",
         args_schema=ReplaceUrlsInput
@@ -666,6 +884,7 @@ ALL_TOOLS = [
 
     StructuredTool.from_function(
         library_sync,
+        coroutine=library_sync.acall,
         name="library_sync",
         description="Synchronize the Elementor template library with the remote source.",
         args_schema=LibrarySyncInput
@@ -673,9 +892,110 @@ ALL_TOOLS = [
 
     StructuredTool.from_function(
         system_info,
+        coroutine=system_info.acall,
         name="system_info",
         description="Retrieve Elementor system information and configuration details.",
         args_schema=SystemInfoInput
     ),
 ]
 
+
+# ============================================================
+# BATCH
+# ============================================================
+
+class BatchOperation(BaseModel):
+    tool: str = Field(..., description="Name of a single-store tool, e.g. create_coupon or update_product.")
+    args: Dict[str, Any] = Field(default_factory=dict, description="Arguments for that tool, without store_name.")
+
+class RunBatchInput(BaseModel):
+    store_name: str
+    operations: List[BatchOperation]
+    stop_on_error: bool = True
+
+# WooCommerce and post commands whose output the in-process runner captures
+# (wp_session.RUNNER_PHP). `db query` and `eval` tools write past it or may call
+# exit, and plugin commands print tables, so they run as separate tool calls.
+BATCH_ALLOWED_TOOLS = (
+    "list_products", "get_product", "create_product", "update_product", "delete_product",
+    "list_orders", "get_order", "update_order",
+    "list_coupons", "create_coupon", "delete_coupon",
+    "list_customers", "get_customer",
+    "create_popup", "list_popups", "update_popup", "delete_popup",
+)
+BATCHABLE_TOOLS = {
+    tool.name: tool for tool in ALL_TOOLS if tool.name in BATCH_ALLOWED_TOOLS and hasattr(tool.func, "build")
+}
+
+def _batch_plan(store_name: str, operations: list) -> tuple[list[str], list[list[str]]]:
+    # Checked here so a bad batch is reported before the store or pod is resolved.
+    check_batch_size(len(operations))
+    names, plan = [], []
+    for n, op in enumerate(operations):
+        op = op if isinstance(op, BatchOperation) else BatchOperation(**op)
+        tool = BATCHABLE_TOOLS.get(op.tool)
+        if tool is None:
+            raise ValueError(
+                f"operation {n}: {op.tool} cannot be batched; call it on its own. "
+                f"Batchable tools: {', '.join(BATCH_ALLOWED_TOOLS)}"
+            )
+        try:
+            params = tool.args_schema(**{**op.args, "store_name": store_name})
+        except ValidationError as exc:
+            raise ValueError(f"operation {n} ({op.tool}): {exc.errors()[0].get('msg')}") from exc
+        args = tool.func.build(**params.model_dump())
+        if not runner_can_capture(args):
+            raise ValueError(f"operation {n} ({op.tool}): its output cannot be captured in a batch; call it on its own")
+        names.append(op.tool)
+        plan.append(args)
+    return names, plan
+
+def _batch_report(names: list[str], results: list[dict]) -> str:
+    entries = []
+    for name, result in zip(names, results):
+        postprocess = BATCHABLE_TOOLS[name].func.postprocess
+        output = result["output"]
+        if postprocess and result["ok"]:
+            output = postprocess(output)
+        entry = {"tool": name, "ok": result["ok"], "output": output, "error": result["error"]}
+        if result.get("skipped"):
+            entry["skipped"] = True
+        entries.append(entry)
+    return json.dumps({"ok": all(e["ok"] for e in entries), "results": entries})
+
+def run_batch(store_name: str, operations: list, stop_on_error: bool = True):
+    try:
+        names, plan = _batch_plan(store_name, operations)
+    except ValueError as exc:
+        return json.dumps({"ok": False, "error": str(exc)})
+    ns, pod = resolve_store(store_name)
+    return _batch_report(names, run_wp_cli_batch(ns, pod, plan, stop_on_error=stop_on_error))
+
+async def _arun_batch(store_name: str, operations: list, stop_on_error: bool = True):
+    try:
+        names, plan = _batch_plan(store_name, operations)
+    except ValueError as exc:
+        return json.dumps({"ok": False, "error": str(exc)})
+    ns, pod = await aresolve_store(store_name)
+    return _batch_report(names, await arun_wp_cli_batch(ns, pod, plan, stop_on_error=stop_on_error))
+
+run_batch.acall = _arun_batch
+
+ALL_TOOLS.append(
+    StructuredTool.from_function(
+        run_batch,
+        coroutine=run_batch.acall,
+        name="run_batch",
+        description=(
+            "Run several product, order, coupon, customer or popup tools (e.g. create 3 coupons "
+            "and update 10 product prices) in one round trip. Each operation is {tool, args}; "
+            "set stop_on_error=false to continue past failures."
+        ),
+        args_schema=RunBatchInput
+    )
+)
+
+
+# Read-only inspection tools are served from tool_cache; mutations invalidate it.
+for _tool in ALL_TOOLS:
+    tool_cache.install(_tool)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Store-aware tool scheduling for AI Orchestrator.
+Runs the tool calls of one AIMessage concurrently, except that calls on the same
+store keep reader/writer order: a mutation waits for every earlier call on its
+store, and a read waits for the earlier mutations on its store. Store aliases
+are resolved with store_directory.store_key, so "nike" and "store-nike" match.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import get_config_list, get_executor_for_config
+from langgraph.prebuilt import ToolNode
+
+from metrics import observe_tool_call, tool_outcome
+from tracing import span
+from store_directory import store_key
+from tool_cache import is_mutating_tool
+
+
+def schedule(tool_calls: list[dict]) -> list[list[int]]:
+    """For each call, the indices of earlier calls it must wait for."""
+    last_write: dict[str, int] = {}
+    reads_since_write: dict[str, list[int]] = {}
+    deps: list[list[int]] = []
+    for n, call in enumerate(tool_calls):
+        store = store_key(str((call.get("args") or {}).get("store_name") or ""))
+        previous = [last_write[store]] if store in last_write else []
+        if is_mutating_tool(call.get("name") or ""):
+            deps.append(previous + reads_since_write.pop(store, []))
+            last_write[store] = n
+        else:
+            deps.append(previous)
+            reads_since_write.setdefault(store, []).append(n)
+    return deps
+
+
+@contextmanager
+def observed(call: dict) -> Iterator[dict]:
+    """Tool span and latency metric around one call; the caller stores the ToolMessage in result["output"]."""
+    store = store_key(str((call.get("args") or {}).get("store_name") or ""))
+    with span("tool", tool=str(call.get("name") or ""), store=store) as tool_span:
+        started = time.perf_counter()
+        result: dict = {}
+        try:
+            yield result
+        except Exception:
+            observe_tool_call(call, time.perf_counter() - started, error=True)
+            raise
+        observe_tool_call(call, time.perf_counter() - started, result.get("output"))
+        tool_span.set(outcome=tool_outcome(result.get("output")))
+
+
+class StoreScheduledToolNode(ToolNode):
+    """ToolNode that orders mutations per store; results keep the tool_call order."""
+
+    def _func(self, input: Any, config: RunnableConfig, *, store) -> Any:
+        tool_calls, output_type = self._parse_input(input, store)
+        config_list = get_config_list(config, len(tool_calls))
+        deps = schedule(tool_calls)
+        with get_executor_for_config(config) as executor:
+            # Calls are submitted in emission order and only wait on earlier ones,
+            # so a bounded pool cannot deadlock.
+            futures: list = []
+
+            def run(n: int):
+                for d in deps[n]:
+                    futures[d].exception()
+                with observed(tool_calls[n]) as result:
+                    result["output"] = self._run_one(tool_calls[n], config_list[n])
+                return result["output"]
+
+            for n in range(len(tool_calls)):
+                futures.append(executor.submit(run, n))
+            outputs = [f.result() for f in futures]
+        return outputs if output_type == "list" else {"messages": outputs}
+
+    async def _afunc(self, input: Any, config: RunnableConfig, *, store) -> Any:
+        tool_calls, output_type = self._parse_input(input, store)
+        config_list = get_config_list(config, len(tool_calls))
+        deps = schedule(tool_calls)
+        tasks: list[asyncio.Task] = []
+
+        async def run(n: int):
+            if deps[n]:
+                await asyncio.gather(*(tasks[d] for d in deps[n]), return_exceptions=True)
+            with observed(tool_calls[n]) as result:
+                result["output"] = await self._arun_one(tool_calls[n], config_list[n])
+            return result["output"]
+
+        for n in range(len(tool_calls)):
+            tasks.append(asyncio.ensure_future(run(n)))
+        outputs = await asyncio.gather(*tasks)
+        return outputs if output_type == "list" else {"messages": outputs}
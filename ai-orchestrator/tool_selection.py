@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Per-turn tool selection for AI Orchestrator.
+Scores the conversation against keyword lists of tool groups and binds only the
+matching groups to the model. `request_tools` lets the model widen the set.
+A session's groups are only ever widened, so the tools block at the head of the
+provider request stays the same from turn to turn and keeps hitting the prompt cache.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import StructuredTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import BaseModel, Field
+
+from tool_registry import ALL_TOOLS
+
+# ---- Config ----
+TOOL_SELECTION_ENABLED = os.getenv("TOOL_SELECTION_ENABLED", "1").strip().lower() in {"1", "true", "yes"}
+# How many of the latest user messages are scored; older ones count half.
+TOOL_SELECTION_HISTORY = int(os.getenv("TOOL_SELECTION_HISTORY", "3"))
+
+
+@dataclass(frozen=True)
+class ToolGroup:
+    description: str
+    tools: tuple[str, ...]
+    keywords: tuple[str, ...]
+
+
+TOOL_GROUPS = {
+    "products": ToolGroup(
+        "WooCommerce products: list, get, create, update, delete, CSV import",
+        ("list_products", "get_product", "create_product", "update_product", "delete_product", "import_products_csv"),
+        ("product", "catalog", "sku", "price", "stock", "inventory", "csv", "import", "item", "variation", "category"),
+    ),
+    "orders": ToolGroup(
+        "WooCommerce orders: list, get, update status or note",
+        ("list_orders", "get_order", "update_order"),
+        ("order", "refund", "shipping", "purchase", "sale", "revenue", "fulfil", "fulfill", "delivery", "paid"),
+    ),
+    "coupons": ToolGroup(
+        "WooCommerce coupons: list, create, delete",
+        ("list_coupons", "create_coupon", "delete_coupon"),
+        ("coupon", "discount", "promo", "code", "sale", "offer", "deal", "off", "percent"),
+    ),
+    "customers": ToolGroup(
+        "WooCommerce customers: list, get",
+        ("list_customers", "get_customer"),
+        ("customer", "buyer", "shopper", "user", "client", "account"),
+    ),
+    "popups": ToolGroup(
+        "Popup Maker popups: create, list, update, delete, settings",
+        ("create_popup", "list_popups", "update_popup", "delete_popup", "set_popup_settings"),
+        ("popup", "modal", "lightbox", "trigger", "overlay", "cookie"),
+    ),
+    "banner": ToolGroup(
+        "Urumi store-wide announcement banner",
+        ("urumi_create_banner",),
+        ("banner", "announcement", "announce", "notice", "urumi", "sale"),
+    ),
+    "email": ToolGroup(
+        "MailPoet subscribers and campaigns, captured outgoing emails",
+        ("catcher_list_emails", "mailpoet_list_subscribers", "mailpoet_create_campaign"),
+        ("email", "mail", "newsletter", "campaign", "subscriber", "mailpoet", "inbox", "announce"),
+    ),
+    "elementor": ToolGroup(
+        "Elementor: flush CSS, replace URLs, sync library, system info",
+        ("flush_css", "replace_urls", "library_sync", "system_info"),
+        ("elementor", "css", "url", "domain", "template", "library", "design", "layout", "style", "system"),
+    ),
+}
+# Bound whenever any group is.
+ALWAYS_TOOLS = ("run_batch",)
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _stem(word: str) -> str:
+    return word[:-1] if len(word) > 3 and word.endswith("s") else word
+
+
+def _words(text: str) -> set[str]:
+    return {_stem(w) for w in _WORD_RE.findall(text.lower())}
+
+
+# Keyword -> groups, including the nouns in each group's tool names.
+_KEYWORDS: dict[str, set[str]] = {}
+_GROUP_OF_TOOL: dict[str, str] = {}
+for _group, _spec in TOOL_GROUPS.items():
+    for _tool in _spec.tools:
+        _GROUP_OF_TOOL[_tool] = _group
+        for _part in _tool.split("_"):
+            if _part not in {"list", "get", "create", "update", "delete", "set", "run", "info"}:
+                _KEYWORDS.setdefault(_stem(_part), set()).add(_group)
+    for _keyword in _spec.keywords:
+        _KEYWORDS.setdefault(_stem(_keyword), set()).add(_group)
+
+
+class RequestToolsInput(BaseModel):
+    groups: List[str] = Field(description="Tool groups to enable: " + ", ".join(TOOL_GROUPS))
+
+def request_tools(groups: List[str]):
+    unknown = [g for g in groups if g not in TOOL_GROUPS]
+    if unknown:
+        return json.dumps({"ok": False, "error": f"Unknown tool groups: {', '.join(unknown)}", "groups": list(TOOL_GROUPS)})
+    return json.dumps({"ok": True, "enabled": groups})
+
+REQUEST_TOOLS = StructuredTool.from_function(
+    request_tools,
+    name="request_tools",
+    description=(
+        "Only some tools are enabled for this request. Call this to enable more tool groups, then use them. "
+        "Groups: " + "; ".join(f"{name} ({group.description})" for name, group in TOOL_GROUPS.items())
+    ),
+    args_schema=RequestToolsInput,
+)
+
+
+class ToolSelector:
+    def __init__(self, tools: Optional[list] = None):
+        self._tools = tools if tools is not None else ALL_TOOLS
+        self._schema_tokens: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.turns = 0
+        self.fallbacks = 0
+        self.widened = 0
+        self.calls = 0
+        self.tokens_bound = 0
+        self.tokens_saved = 0
+
+    def select(self, messages: list, previous: Iterable[str] = ()) -> list[str]:
+        """Tool groups for a new turn: the session's `previous` groups plus any scored
+        from the latest user messages and recent tool calls."""
+        scores = dict.fromkeys(TOOL_GROUPS, 0.0)
+        seen = 0
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                weight = 1.0 if seen == 0 else 0.5
+                for word in _words(str(message.content)):
+                    for group in _KEYWORDS.get(word, ()):
+                        scores[group] += weight
+                seen += 1
+                if seen >= TOOL_SELECTION_HISTORY:
+                    break
+            elif isinstance(message, AIMessage):
+                # Keep what the conversation was just working with ("yes, do it").
+                for call in message.tool_calls or []:
+                    group = _GROUP_OF_TOOL.get(call["name"])
+                    if group:
+                        scores[group] += 0.5
+        groups = [g for g in previous if g in TOOL_GROUPS]
+        groups += [g for g, score in scores.items() if score > 0 and g not in groups]
+        with self._lock:
+            self.turns += 1
+            if not groups:
+                self.fallbacks += 1
+        return groups or list(TOOL_GROUPS)
+
+    def widen(self, groups: Iterable[str], messages: list) -> list[str]:
+        """`groups` plus any the model asked for since the last user message."""
+        selected = list(groups)
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                break
+            if not isinstance(message, AIMessage):
+                continue
+            for call in message.tool_calls or []:
+                if call["name"] == REQUEST_TOOLS.name:
+                    wanted = [g for g in (call.get("args") or {}).get("groups") or [] if g in TOOL_GROUPS]
+                else:
+                    wanted = [_GROUP_OF_TOOL[call["name"]]] if call["name"] in _GROUP_OF_TOOL else []
+                for group in wanted:
+                    if group not in selected:
+                        selected.append(group)
+        if len(selected) > len(list(groups)):
+            with self._lock:
+                self.widened += 1
+        return selected
+
+    def tools_for(self, groups: Iterable[str]) -> list:
+        """Tools to bind, in ALL_TOOLS order; request_tools is added while some groups are left out."""
+        groups = set(groups)
+        names = {t for g in groups for t in TOOL_GROUPS[g].tools} | set(ALWAYS_TOOLS)
+        tools = [t for t in self._tools if t.name in names]
+        if groups != set(TOOL_GROUPS):
+            tools.append(REQUEST_TOOLS)
+        return tools
+
+    def record(self, tools: list) -> None:
+        """Counts the schema tokens bound for one model call against binding every tool."""
+        bound = self._tokens(tools)
+        full = self._tokens(self._tools)
+        with self._lock:
+            self.calls += 1
+            self.tokens_bound += bound
+            self.tokens_saved += max(full - bound, 0)
+
+    def _tokens(self, tools: list) -> int:
+        total = 0
+        for tool in tools:
+            tokens = self._schema_tokens.get(tool.name)
+            if tokens is None:
+                tokens = len(json.dumps(convert_to_openai_tool(tool))) // 4
+                self._schema_tokens[tool.name] = tokens
+            total += tokens
+        return total
+
+    def stats(self) -> dict:
+        narrow = self.turns - self.fallbacks
+        return {
+            "enabled": TOOL_SELECTION_ENABLED,
+            "turns": self.turns,
+            "fallbacks": self.fallbacks,
+            "widened": self.widened,
+            # Share of narrowed turns the model finished without asking for more tools.
+            "hit_rate": round(1 - self.widened / narrow, 4) if narrow else None,
+            "model_calls": self.calls,
+            "schema_tokens_bound": self.tokens_bound,
+            "schema_tokens_saved": self.tokens_saved,
+        }
+
+
+TOOL_SELECTOR = ToolSelector()
@@ -6,64 +6,260 @@ Core infrastructure for Model Context Protocol (MCP) dynamic binding.
 
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 import re
 import subprocess
-import requests
+import threading
 import time
 import shlex
 from pathlib import Path
 from typing import Any, Dict, Optional
 
+import catalog_import
+import pod_registry
+import wp_session
+from metrics import KUBECTL_RETRIES, KUBECTL_TIMEOUTS
+from tracing import span
+from store_directory import STORE_DIRECTORY, normalize_store_name as _normalize_store_name
+
 # ---- Config ----
 KUBECTL_BIN = os.getenv("KUBECTL_BIN", "kubectl")
 KUBECONFIG = os.getenv("KUBECONFIG", "") or os.getenv("ORCH_KUBECONFIG", "")
 KUBECTL_CONTEXT = os.getenv("KUBECTL_CONTEXT", "")
-ORCH_API_BASE = os.getenv("ORCH_API_BASE", "http://localhost:8080")
 WAIT_TIMEOUT_SECONDS = int(os.getenv("WAIT_TIMEOUT_SECONDS", "900"))
 WAIT_POLL_SECONDS = int(os.getenv("WAIT_POLL_SECONDS", "5"))
 DEFAULT_WP_CLI_USER = os.getenv("WC_CLI_USER") or os.getenv("WP_ADMIN_USER") or "admin"
 WP_CLI_BIN = os.getenv("WP_CLI_BIN", "wp")
 WP_CLI_PHP_ARGS = os.getenv("WP_CLI_PHP_ARGS", "")
+# "kubectl" forks the CLI per call; "native" reuses an in-process API client (kube_exec.py).
+WP_EXEC_BACKEND = os.getenv("WP_EXEC_BACKEND", "kubectl").strip().lower()
+WP_CLI_BATCH_MAX_OPS = int(os.getenv("WP_CLI_BATCH_MAX_OPS", "50"))
+WP_CLI_BATCH_OP_SECONDS = int(os.getenv("WP_CLI_BATCH_OP_SECONDS", "10"))
 
 # Cache resolved context ("" means no context).
 _RESOLVED_CONTEXT: str | None = None
+# namespace -> pod; kept current by the pod watch (pod_registry.py) when it is running.
 _POD_CACHE: Dict[str, str] = {}
+_POD_REGISTRY: Optional[pod_registry.PodRegistry] = None
+_POD_REGISTRY_LOCK = threading.Lock()
 
 def get_store_pod_info(store_name: str) -> tuple[str, str]:
     """Returns (namespace, pod_name) for the store, cached to avoid K8s API churn."""
-    stores = _fetch_stores()
-    match = _match_store_record(store_name, stores or [])
-    if not match:
-        raise RuntimeError(f"Store {store_name} not found")
-    
-    namespace = match.get("namespace") or _resolve_store_namespace(store_name, stores)
-    pod = _wait_for_wp_pod(namespace)
-    return namespace, pod
+    with span("pod.resolve", store=store_name) as resolve_span:
+        match = STORE_DIRECTORY.match(store_name)
+        if not match:
+            raise RuntimeError(f"Store {store_name} not found")
 
-def run_wp_cli_command(namespace: str, pod: str, wp_args: list[str]) -> str:
+        namespace = match.get("namespace") or _store_namespace(store_name)
+        pod = _wait_for_wp_pod(namespace)
+        resolve_span.set(namespace=namespace, pod=pod)
+        return namespace, pod
+
+def run_wp_cli_command(namespace: str, pod: str, wp_args: list[str], timeout: int = 30) -> str:
     """
     Executes a WP-CLI command safely inside the target pod.
     Automatically adds --allow-root and --user=admin if not present.
     """
-    cmd = ["-n", namespace, "exec", pod, "--", *_wp_base_cmd()] + wp_args
+    with span("wp_cli", command=_command_name(wp_args), pod=pod):
+        return _run_wp_cli_command(namespace, pod, wp_args, timeout)
+
+def _run_wp_cli_command(namespace: str, pod: str, wp_args: list[str], timeout: int) -> str:
+    command, has_user = _wp_exec_command(wp_args)
+
+    if wp_session.WP_CLI_SESSIONS and not has_user and wp_session.runner_can_capture(wp_args):
+        output = _session_exec(namespace, pod, wp_args, timeout=timeout)
+        if output is not None:
+            return output
+
+    if WP_EXEC_BACKEND == "native":
+        output = _native_exec(namespace, pod, command, timeout=timeout)
+    else:
+        output = _kubectl(["-n", namespace, "exec", pod, "--", *command], timeout=timeout)
+    _forget_pod_if_gone(namespace, pod, output)
+    return output
+
+def run_wp_cli_batch(
+    namespace: str, pod: str, operations: list[list[str]], stop_on_error: bool = True
+) -> list[dict]:
+    """
+    Runs several WP-CLI commands in one exec and one WordPress bootstrap.
+    Returns one {"args", "ok", "output", "error"} entry per operation; operations
+    after a failure are marked "skipped" when stop_on_error is set.
+    """
+    script, timeout = _batch_script(operations, stop_on_error)
+    output = run_wp_cli_command(namespace, pod, ["eval", script], timeout=timeout)
+    return _batch_results(operations, output)
+
+def import_products(
+    namespace: str, pod: str, products, on_progress=None, images: bool = True
+) -> dict:
+    """
+    Streams product dicts (see catalog_import.product_from_row) to a pod-side
+    importer over exec stdin. Returns totals; on_progress gets each batch report.
+    """
+    command = [*_wp_base_cmd(), "--allow-root", "--user=admin", "eval", catalog_import.import_php(images=images)]
+    try:
+        channel = _open_exec_channel(namespace, pod, command)
+    except Exception as exc:
+        return {"ok": False, "error": f"Could not start import: {exc}"}
+    try:
+        totals = catalog_import.run_import(channel, products, on_progress=on_progress)
+    except Exception as exc:
+        # A broken pipe or closed websocket surfaces here as well as importer errors.
+        _forget_pod_if_gone(namespace, pod, f"Error: {exc}")
+        return {"ok": False, "error": str(exc)}
+    finally:
+        channel.close()
+    return {"ok": totals.get("failed", 0) == 0, **totals}
+
+# Async Execution Path
+# Coroutine twins of the public helpers; retries and pod waits yield to the
+# event loop instead of pinning an executor thread.
+
+async def aget_store_pod_info(store_name: str) -> tuple[str, str]:
+    """Async version of get_store_pod_info."""
+    with span("pod.resolve", store=store_name) as resolve_span:
+        match = await STORE_DIRECTORY.amatch(store_name)
+        if not match:
+            raise RuntimeError(f"Store {store_name} not found")
+
+        namespace = match.get("namespace") or _store_namespace(store_name)
+        pod = await _await_wp_pod(namespace)
+        resolve_span.set(namespace=namespace, pod=pod)
+        return namespace, pod
+
+async def arun_wp_cli_command(namespace: str, pod: str, wp_args: list[str], timeout: int = 30) -> str:
+    """Async version of run_wp_cli_command."""
+    with span("wp_cli", command=_command_name(wp_args), pod=pod):
+        return await _arun_wp_cli_command(namespace, pod, wp_args, timeout)
+
+async def _arun_wp_cli_command(namespace: str, pod: str, wp_args: list[str], timeout: int) -> str:
+    command, has_user = _wp_exec_command(wp_args)
+
+    if wp_session.WP_CLI_SESSIONS and not has_user and wp_session.runner_can_capture(wp_args):
+        # Sessions use blocking pipes; hand the round trip to a worker thread.
+        output = await asyncio.to_thread(_session_exec, namespace, pod, wp_args, timeout)
+        if output is not None:
+            return output
+
+    if WP_EXEC_BACKEND == "native":
+        output = await _anative_exec(namespace, pod, command, timeout=timeout)
+    else:
+        output = await _akubectl(["-n", namespace, "exec", pod, "--", *command], timeout=timeout)
+    _forget_pod_if_gone(namespace, pod, output)
+    return output
+
+async def aimport_products(
+    namespace: str, pod: str, products, on_progress=None, images: bool = True
+) -> dict:
+    """Async version of import_products; the stream runs on a worker thread."""
+    report = None
+    if on_progress:
+        loop = asyncio.get_running_loop()
+        report = lambda progress: loop.call_soon_threadsafe(on_progress, progress)
+    return await asyncio.to_thread(import_products, namespace, pod, products, report, images)
+
+async def arun_wp_cli_batch(
+    namespace: str, pod: str, operations: list[list[str]], stop_on_error: bool = True
+) -> list[dict]:
+    """Async version of run_wp_cli_batch."""
+    script, timeout = _batch_script(operations, stop_on_error)
+    output = await arun_wp_cli_command(namespace, pod, ["eval", script], timeout=timeout)
+    return _batch_results(operations, output)
+
+# Internal Helper Functions
+
+def _command_name(wp_args: list[str]) -> str:
+    """Leading subcommand words ("wc product list") for span attributes."""
+    return " ".join(a for a in wp_args[:3] if not a.startswith("-"))
+
+def _wp_exec_command(wp_args: list[str]) -> tuple[list[str], bool]:
+    command = [*_wp_base_cmd()] + wp_args
     
     # Ensure safety flags
     if "--allow-root" not in wp_args:
-        cmd.append("--allow-root")
+        command.append("--allow-root")
     
     # Ensure user context for write operations or capability checks
     # We check if it's already there to avoid duplication
     has_user = any(arg.startswith("--user=") for arg in wp_args)
     if not has_user:
-        cmd.append("--user=admin")
-        
-    return _kubectl(cmd)
+        command.append("--user=admin")
+    return command, has_user
 
-# Internal Helper Functions
+def check_batch_size(count: int) -> None:
+    """Raises ValueError for an empty batch or one over WP_CLI_BATCH_MAX_OPS."""
+    if not count:
+        raise ValueError("Batch has no operations")
+    if count > WP_CLI_BATCH_MAX_OPS:
+        raise ValueError(f"Batch has {count} operations; the limit is {WP_CLI_BATCH_MAX_OPS}")
+
+def _batch_script(operations: list[list[str]], stop_on_error: bool) -> tuple[str, int]:
+    check_batch_size(len(operations))
+    timeout = 30 + WP_CLI_BATCH_OP_SECONDS * len(operations)
+    return wp_session.batch_php(operations, stop_on_error), timeout
+
+def _batch_results(operations: list[list[str]], output: str) -> list[dict]:
+    results = wp_session.parse_batch_output(output)
+    if results is None:
+        # The exec itself failed, so it is unknown which operations ran.
+        error = output if output.startswith("Error:") else f"Error: Unexpected batch output: {output[:200]}"
+        return [{"args": args, "ok": False, "output": "", "error": error} for args in operations]
+
+    entries = []
+    for n, args in enumerate(operations):
+        if n >= len(results):
+            entries.append({"args": args, "ok": False, "skipped": True, "output": "", "error": ""})
+            continue
+        result = results[n] or {}
+        ok = int(result.get("code") or 0) == 0
+        output = (result.get("stdout") or "").strip()
+        if ok and wp_session.runner_request(args)[1]:
+            output = wp_session.json_to_csv(output)
+        entries.append({
+            "args": args,
+            "ok": ok,
+            "output": output,
+            "error": "" if ok else f"Error: {(result.get('stderr') or '').strip()}",
+        })
+    return entries
 
 def _kubectl(args: list[str], timeout: int = 30) -> str:
+    cmd, env = _kubectl_cmd(args)
+
+    def attempt() -> tuple[int, str, str]:
+        result = subprocess.run(cmd, capture_output=True, text=True, env=env, timeout=timeout)
+        return result.returncode, result.stdout, result.stderr
+
+    return _run_with_retries(attempt, timeout)
+
+async def _akubectl(args: list[str], timeout: int = 30) -> str:
+    if _RESOLVED_CONTEXT is None:
+        # First call may shell out to list contexts; keep that off the loop.
+        cmd, env = await asyncio.to_thread(_kubectl_cmd, args)
+    else:
+        cmd, env = _kubectl_cmd(args)
+
+    async def attempt() -> tuple[int, str, str]:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=env,
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise
+        return proc.returncode, stdout.decode(errors="replace"), stderr.decode(errors="replace")
+
+    return await _arun_with_retries(attempt, timeout)
+
+def _kubectl_cmd(args: list[str]) -> tuple[list[str], dict]:
     env = os.environ.copy()
     if KUBECONFIG:
         env["KUBECONFIG"] = KUBECONFIG
@@ -72,35 +268,133 @@ def _kubectl(args: list[str], timeout: int = 30) -> str:
     resolved_ctx = _resolve_kube_context(env)
     if resolved_ctx:
         cmd.extend(["--context", resolved_ctx])
-    cmd += args
+    return cmd + args, env
+
+def _native_exec(namespace: str, pod: str, command: list[str], timeout: int = 30) -> str:
+    from kube_exec import ApiException
+
+    def attempt() -> tuple[int, str, str]:
+        try:
+            result = _native_transport().exec(namespace, pod, command, timeout=timeout)
+        except ApiException as exc:
+            # Surface connection failures as stderr so the transient checks apply.
+            return 1, "", str(exc.reason or exc)
+        return result.returncode, result.stdout, result.stderr
+
+    return _run_with_retries(attempt, timeout)
+
+async def _anative_exec(namespace: str, pod: str, command: list[str], timeout: int = 30) -> str:
+    from kube_exec import ApiException
+
+    async def attempt() -> tuple[int, str, str]:
+        try:
+            result = await asyncio.to_thread(
+                lambda: _native_transport().exec(namespace, pod, command, timeout=timeout)
+            )
+        except ApiException as exc:
+            return 1, "", str(exc.reason or exc)
+        return result.returncode, result.stdout, result.stderr
+
+    return await _arun_with_retries(attempt, timeout)
+
+def _session_exec(namespace: str, pod: str, wp_args: list[str], timeout: int = 30) -> Optional[str]:
+    """Runs the command on the pod's persistent WP-CLI session; None means fall back to a one-shot exec."""
+    base_cmd = [*_wp_base_cmd(), "--allow-root", "--user=admin"]
+    try:
+        returncode, stdout, stderr = _WP_SESSIONS.run(namespace, pod, base_cmd, wp_args, timeout=timeout)
+    except wp_session.SessionError as exc:
+        if exc.sent:
+            return f"Error: {exc}"
+        return None
+    if returncode == 0:
+        return stdout.strip()
+    return f"Error: {stderr.strip()}"
+
+def _open_exec_channel(namespace: str, pod: str, command: list[str]):
+    if WP_EXEC_BACKEND == "native":
+        return _native_transport().open_stream(namespace, pod, command)
+    cmd, env = _kubectl_cmd(["-n", namespace, "exec", "-i", pod, "--", *command])
+    return wp_session.ProcessChannel(cmd, env)
+
+_WP_SESSIONS = wp_session.SessionManager(_open_exec_channel)
+
+def _native_transport():
+    from kube_exec import get_transport
+    env = os.environ.copy()
+    if KUBECONFIG:
+        env["KUBECONFIG"] = KUBECONFIG
+    return get_transport(KUBECONFIG or None, _resolve_kube_context(env))
+
+def _is_transient_error(stderr: str) -> bool:
+    text = stderr.lower()
+    return "connection refused" in text or "timeout" in text or "eof" in text
 
+def _run_with_retries(attempt, timeout: int) -> str:
     retries = 3
     last_err = ""
     
-    for attempt in range(retries):
+    for n in range(retries):
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, env=env, timeout=timeout)
-            if result.returncode == 0:
-                return result.stdout.strip()
+            with span("kubectl.attempt", attempt=n + 1) as attempt_span:
+                returncode, stdout, stderr = attempt()
+                attempt_span.set(returncode=returncode)
+            if returncode == 0:
+                return stdout.strip()
             
-            stderr = result.stderr.strip()
+            stderr = stderr.strip()
             # Retry on specific transient errors
-            if "connection refused" in stderr or "timeout" in stderr or "EOF" in stderr:
+            if _is_transient_error(stderr):
                 last_err = stderr
-                time.sleep(2 ** attempt) # Exponential backoff: 1s, 2s, 4s
+                KUBECTL_RETRIES.labels("transient").inc()
+                time.sleep(2 ** n) # Exponential backoff: 1s, 2s, 4s
                 continue
             
             return f"Error: {stderr}"
             
-        except subprocess.TimeoutExpired:
+        except (subprocess.TimeoutExpired, TimeoutError):
             last_err = f"Command timed out after {timeout}s"
-            time.sleep(2 ** attempt)
+            KUBECTL_TIMEOUTS.inc()
+            KUBECTL_RETRIES.labels("timeout").inc()
+            time.sleep(2 ** n)
             continue
         except Exception as e:
             return f"Error: System failure: {str(e)}"
             
     return f"Error: {last_err or 'Command failed after retries'}"
 
+async def _arun_with_retries(attempt, timeout: int) -> str:
+    retries = 3
+    last_err = ""
+
+    for n in range(retries):
+        try:
+            with span("kubectl.attempt", attempt=n + 1) as attempt_span:
+                returncode, stdout, stderr = await attempt()
+                attempt_span.set(returncode=returncode)
+            if returncode == 0:
+                return stdout.strip()
+
+            stderr = stderr.strip()
+            if _is_transient_error(stderr):
+                last_err = stderr
+                KUBECTL_RETRIES.labels("transient").inc()
+                await asyncio.sleep(2 ** n)
+                continue
+
+            return f"Error: {stderr}"
+
+        # asyncio.wait_for (kubectl) and kube_exec (native) time out differently before 3.11.
+        except (asyncio.TimeoutError, TimeoutError):
+            last_err = f"Command timed out after {timeout}s"
+            KUBECTL_TIMEOUTS.inc()
+            KUBECTL_RETRIES.labels("timeout").inc()
+            await asyncio.sleep(2 ** n)
+            continue
+        except Exception as e:
+            return f"Error: System failure: {str(e)}"
+
+    return f"Error: {last_err or 'Command failed after retries'}"
+
 def _resolve_kube_context(env: dict) -> str | None:
     global _RESOLVED_CONTEXT
     if _RESOLVED_CONTEXT is not None:
@@ -129,14 +423,6 @@ def _list_kube_contexts(env: dict) -> list[str]:
         return []
     return [line.strip() for line in result.stdout.splitlines() if line.strip()]
 
-def _normalize_store_name(text: str) -> str:
-    name = (text or "").strip().lower()
-    if name.startswith("store "):
-        name = name[len("store "):]
-    if name.endswith(" store"):
-        name = name[: -len(" store")]
-    return name.strip()
-
 def _store_namespace(store_name: str) -> str:
     text = _normalize_store_name(store_name)
     text = re.sub(r"[^a-z0-9\s-]", "", text)
@@ -146,49 +432,145 @@ def _store_namespace(store_name: str) -> str:
     return f"store-{slug}"
 
 def _fetch_stores() -> Optional[list[dict]]:
-    try:
-        resp = requests.get(f"{ORCH_API_BASE}/api/stores", timeout=10)
-        if resp.status_code != 200:
-            return None
-        data = resp.json()
-        return data if isinstance(data, list) else data.get("stores", [])
-    except:
-        return None
-
-def _match_store_record(store_name: str, stores: list[dict]) -> Optional[dict]:
-    needle = _normalize_store_name(store_name)
-    for store in stores:
-        if not isinstance(store, dict): continue
-        if needle in {str(store.get("name", "")).lower(), str(store.get("id", "")).lower(), str(store.get("namespace", "")).lower()}:
-            return store
-    return None
-
-def _resolve_store_namespace(store_name: str, stores: Optional[list[dict]] = None) -> str:
-    if stores:
-        match = _match_store_record(store_name, stores)
-        if match: return match.get("namespace") or _store_namespace(store_name)
-    return _store_namespace(store_name)
+    return STORE_DIRECTORY.stores()
 
 def _wait_for_wp_pod(namespace: str) -> str:
     if namespace in _POD_CACHE:
         return _POD_CACHE[namespace]
 
+    registry = _pod_registry_for(namespace)
+    if registry is not None:
+        pod = registry.wait_for(namespace, WAIT_TIMEOUT_SECONDS)
+        if pod:
+            return pod
+        if registry.healthy:
+            raise RuntimeError(f"Timeout waiting for pod in {namespace}")
+
     start = time.time()
     while time.time() - start < WAIT_TIMEOUT_SECONDS:
-        raw = _kubectl(["-n", namespace, "get", "pods", "-l", "app.kubernetes.io/component=wordpress", "-o", "json"])
-        if not raw.startswith("Error:"):
-            try:
-                data = json.loads(raw)
-                for pod in data.get("items", []):
-                    if pod.get("status", {}).get("phase") == "Running":
-                        name = pod.get("metadata", {}).get("name", "")
-                        if name:
-                            _POD_CACHE[namespace] = name
-                            return name
-            except: pass
+        name = _running_pod_name(_list_wp_pods(namespace))
+        if name:
+            _POD_CACHE[namespace] = name
+            return name
         time.sleep(WAIT_POLL_SECONDS)
     raise RuntimeError(f"Timeout waiting for pod in {namespace}")
 
+async def _await_wp_pod(namespace: str) -> str:
+    if namespace in _POD_CACHE:
+        return _POD_CACHE[namespace]
+
+    registry = _pod_registry_for(namespace)
+    if registry is not None:
+        pod = await registry.await_ready(namespace, WAIT_TIMEOUT_SECONDS)
+        if pod:
+            return pod
+        if registry.healthy:
+            raise RuntimeError(f"Timeout waiting for pod in {namespace}")
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    while loop.time() - start < WAIT_TIMEOUT_SECONDS:
+        name = _running_pod_name(await _alist_wp_pods(namespace))
+        if name:
+            _POD_CACHE[namespace] = name
+            return name
+        await asyncio.sleep(WAIT_POLL_SECONDS)
+    raise RuntimeError(f"Timeout waiting for pod in {namespace}")
+
+def _pod_registry() -> Optional[pod_registry.PodRegistry]:
+    """Starts the pod watch on first use; None when it is disabled."""
+    global _POD_REGISTRY
+    if _POD_REGISTRY is None and pod_registry.POD_WATCH_ENABLED:
+        with _POD_REGISTRY_LOCK:
+            if _POD_REGISTRY is None:
+                _POD_REGISTRY = pod_registry.PodRegistry(_watch_wp_pods, on_change=_on_pod_change).start()
+    return _POD_REGISTRY
+
+def _pod_registry_for(namespace: str) -> Optional[pod_registry.PodRegistry]:
+    # The watch only tracks STORE_NAMESPACE_PREFIX namespaces; others are polled.
+    if not namespace.startswith(pod_registry.STORE_NAMESPACE_PREFIX):
+        return None
+    return _pod_registry()
+
+def _on_pod_change(namespace: str, pod: Optional[str]) -> None:
+    previous = _POD_CACHE.get(namespace)
+    if pod:
+        _POD_CACHE[namespace] = pod
+    else:
+        _POD_CACHE.pop(namespace, None)
+    if previous and previous != pod:
+        _WP_SESSIONS.invalidate(namespace)
+
+def _forget_pod_if_gone(namespace: str, pod: str, output: str) -> None:
+    # Safety net for when the watch is disabled or lagging.
+    if output.startswith("Error:") and f'pods "{pod}" not found' in output:
+        if _POD_CACHE.get(namespace) == pod:
+            _POD_CACHE.pop(namespace, None)
+        _WP_SESSIONS.invalidate(namespace)
+
+def _watch_wp_pods():
+    selector = pod_registry.POD_WATCH_SELECTOR
+    if WP_EXEC_BACKEND == "native":
+        yield from _native_transport().watch_pods(selector)
+        return
+
+    raw = _kubectl(["get", "pods", "-A", "-l", selector, "-o", "json"])
+    if raw.startswith("Error:"):
+        raise RuntimeError(raw)
+    yield "RESET", json.loads(raw).get("items", [])
+
+    cmd, env = _kubectl_cmd(["get", "pods", "-A", "-l", selector, "-o", "json", "--watch", "--output-watch-events"])
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, env=env)
+    decoder = json.JSONDecoder()
+    buffer = ""
+    try:
+        for line in proc.stdout:
+            buffer += line
+            # kubectl pretty-prints each event; an object ends on a bare "}" line.
+            if line.rstrip() != "}":
+                continue
+            try:
+                event, _ = decoder.raw_decode(buffer.strip())
+            except ValueError:
+                continue
+            buffer = ""
+            yield event.get("type", ""), event.get("object") or {}
+    finally:
+        proc.kill()
+        proc.wait()
+
+def _running_pod_name(raw: str) -> Optional[str]:
+    if raw.startswith("Error:"):
+        return None
+    try:
+        data = json.loads(raw)
+        for pod in data.get("items", []):
+            if pod.get("status", {}).get("phase") == "Running":
+                name = pod.get("metadata", {}).get("name", "")
+                if name:
+                    return name
+    except: pass
+    return None
+
+def _list_wp_pods(namespace: str) -> str:
+    selector = "app.kubernetes.io/component=wordpress"
+    if WP_EXEC_BACKEND == "native":
+        try:
+            return json.dumps(_native_transport().list_pods(namespace, selector))
+        except Exception as e:
+            return f"Error: {e}"
+    return _kubectl(["-n", namespace, "get", "pods", "-l", selector, "-o", "json"])
+
+async def _alist_wp_pods(namespace: str) -> str:
+    selector = "app.kubernetes.io/component=wordpress"
+    if WP_EXEC_BACKEND == "native":
+        try:
+            pods = await asyncio.to_thread(lambda: _native_transport().list_pods(namespace, selector))
+            return json.dumps(pods)
+        except Exception as e:
+            return f"Error: {e}"
+    return await _akubectl(["-n", namespace, "get", "pods", "-l", selector, "-o", "json"])
+
 def _wp_base_cmd() -> list[str]:
     if WP_CLI_PHP_ARGS:
         return ["php", *shlex.split(WP_CLI_PHP_ARGS), "/usr/local/bin/wp"]
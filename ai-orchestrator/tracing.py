@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Per-turn tracing for AI Orchestrator.
+Each /chat turn is one trace. Its spans (agent, LLM call, store-directory fetch,
+pod resolution, each kubectl attempt, each tool) nest through a contextvar, so
+they follow the turn across awaits, tasks and worker threads. Finished traces
+go to a JSONL file and/or an OTLP/HTTP JSON collector on a background thread.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# ---- Config ----
+AI_TRACE_FILE = os.getenv("AI_TRACE_FILE", "")
+# OTLP/HTTP JSON traces endpoint, e.g. http://otel-collector:4318/v1/traces
+AI_TRACE_OTLP_ENDPOINT = os.getenv("AI_TRACE_OTLP_ENDPOINT", "")
+AI_TRACE_SERVICE_NAME = os.getenv("AI_TRACE_SERVICE_NAME", "ai-orchestrator")
+AI_TRACE_QUEUE_SIZE = int(os.getenv("AI_TRACE_QUEUE_SIZE", "1000"))
+
+_CURRENT: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("trace_span", default=None)
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attributes", "start_ns", "end_ns", "error")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: dict):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def set_error(self, exc: BaseException | str) -> None:
+        self.error = str(exc)[:500]
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.trace.spans.append(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_unix_nano": self.start_ns,
+            "end_unix_nano": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoSpan:
+    """Stands in for a span when no trace is active (tools run outside a turn, tests)."""
+
+    def set(self, **attributes) -> None:
+        pass
+
+    def set_error(self, exc) -> None:
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Trace:
+    def __init__(self, name: str, attributes: dict):
+        self.trace_id = uuid.uuid4().hex
+        self.spans: list[Span] = []
+        self.root = Span(self, name, None, attributes)
+        self._token = _CURRENT.set(self.root)
+        self._finished = False
+
+    def finish(self) -> None:
+        """Ends the root span and hands the trace to the exporter; later calls do nothing."""
+        if self._finished:
+            return
+        self._finished = True
+        self.root.end()
+        try:
+            _CURRENT.reset(self._token)
+        except ValueError:
+            # Finalized from another context (e.g. a client disconnect); nothing to restore.
+            pass
+        EXPORTER.submit(self)
+
+    def timing_event(self) -> dict:
+        """Per-turn breakdown for the optional `timing` NDJSON event."""
+        breakdown: dict[str, float] = {}
+        for span in self.spans:
+            if span is not self.root:
+                breakdown[span.name] = breakdown.get(span.name, 0.0) + span.duration_ms
+        return {
+            "type": "timing",
+            "total_ms": round(self.root.duration_ms, 3),
+            # Summed per span name; concurrent tool calls can add up to more than the total.
+            "breakdown_ms": {name: round(ms, 3) for name, ms in sorted(breakdown.items(), key=lambda kv: -kv[1])},
+            "spans": [
+                {
+                    "name": span.name,
+                    "span_id": span.span_id,
+                    "parent_id": span.parent_id,
+                    "start_ms": round((span.start_ns - self.root.start_ns) / 1e6, 3),
+                    "duration_ms": round(span.duration_ms, 3),
+                    "attributes": span.attributes,
+                    **({"error": span.error} if span.error else {}),
+                }
+                for span in sorted(self.spans, key=lambda s: s.start_ns)
+            ],
+        }
+
+
+def start_trace(name: str, **attributes) -> Trace:
+    """Opens a trace whose root span is current until `finish()`."""
+    return Trace(name, attributes)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Span | _NoSpan]:
+    """Child span of the current one; a no-op outside a trace."""
+    parent = _CURRENT.get()
+    if parent is None:
+        yield _NO_SPAN
+        return
+    current = Span(parent.trace, name, parent.span_id, attributes)
+    token = _CURRENT.set(current)
+    try:
+        yield current
+    except BaseException as exc:
+        current.set_error(exc)
+        raise
+    finally:
+        _CURRENT.reset(token)
+        current.end()
+
+
+def current_trace_id() -> Optional[str]:
+    current = _CURRENT.get()
+    return current.trace.trace_id if current is not None else None
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_payload(traces: list[Trace]) -> dict:
+    """OTLP/HTTP JSON (ExportTraceServiceRequest) for finished traces."""
+    spans = []
+    for trace in traces:
+        for s in trace.spans:
+            spans.append({
+                "traceId": trace.trace_id,
+                "spanId": s.span_id,
+                **({"parentSpanId": s.parent_id} if s.parent_id else {}),
+                "name": s.name,
+                "kind": 2 if s is trace.root else 1,
+                "startTimeUnixNano": str(s.start_ns),
+                "endTimeUnixNano": str(s.end_ns),
+                "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+                "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+            })
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": AI_TRACE_SERVICE_NAME}}]},
+        "scopeSpans": [{"scope": {"name": "ai-orchestrator.tracing"}, "spans": spans}],
+    }]}
+
+
+class TraceExporter:
+    """Writes finished traces from a daemon thread; drops them when the queue is full."""
+
+    def __init__(self, path: str = "", endpoint: str = "", max_queue: int = AI_TRACE_QUEUE_SIZE):
+        self.path = path
+        self.endpoint = endpoint
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.traces = 0
+        self.exported = 0
+        self.dropped = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path or self.endpoint)
+
+    def submit(self, trace: Trace) -> None:
+        self.traces += 1
+        if not self.enabled:
+            return
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        client = httpx.Client(timeout=5) if self.endpoint else None
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < 100:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.export(batch, client)
+                self.exported += len(batch)
+            except Exception as exc:
+                self.errors += 1
+                logger.warning(f"Trace export failed: {exc}")
+
+    def export(self, traces: list[Trace], client: Optional[httpx.Client] = None) -> None:
+        if self.path:
+            with open(self.path, "a") as handle:
+                for trace in traces:
+                    for s in trace.spans:
+                        handle.write(json.dumps(s.to_dict(), default=str) + "\n")
+        if self.endpoint:
+            response = (client or httpx).post(self.endpoint, json=otlp_payload(traces))
+            response.raise_for_status()
+
+    def stats(self) -> dict:
+        return {
+            "file": self.path or None,
+            "otlp_endpoint": self.endpoint or None,
+            "traces": self.traces,
+            "exported": self.exported,
+            "queued": self._queue.qsize(),
+            "dropped": self.dropped,
+            "errors": self.errors,
+        }
+
+
+EXPORTER = TraceExporter(AI_TRACE_FILE, AI_TRACE_OTLP_ENDPOINT)
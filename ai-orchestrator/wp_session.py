@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Persistent WP-CLI sessions for AI Orchestrator.
+Keeps one bootstrapped WordPress process per pod and feeds it commands over stdin,
+so only the first command pays for loading WordPress, WooCommerce and plugins.
+"""
+
+from __future__ import annotations
+
+import base64
+import csv
+import io
+import itertools
+import json
+import os
+import queue
+import subprocess
+import threading
+import time
+from typing import Callable, Dict, Optional, Protocol
+
+# ---- Config ----
+WP_CLI_SESSIONS = os.getenv("WP_CLI_SESSIONS", "0").strip().lower() in {"1", "true", "yes"}
+WP_CLI_SESSION_IDLE_SECONDS = int(os.getenv("WP_CLI_SESSION_IDLE_SECONDS", "300"))
+WP_CLI_SESSION_START_SECONDS = int(os.getenv("WP_CLI_SESSION_START_SECONDS", "60"))
+
+RESPONSE_MARKER = "__URUMI_WPCLI__"
+
+# In-process command runner shared by the session loop and batches. Runs one
+# {"args", "assoc"} request through WP_CLI::run_command and captures its output.
+RUNNER_PHP = r"""
+$capture = new ReflectionProperty('WP_CLI', 'capture_exit');
+$capture->setAccessible(true);
+$capture->setValue(null, true);
+$urumi_run = function ($req) {
+    wp_cache_flush();
+    $logger = new WP_CLI\Loggers\Execution();
+    WP_CLI::set_logger($logger);
+    ob_start();
+    $code = 0;
+    try {
+        WP_CLI::run_command($req['args'], (array) ($req['assoc'] ?? []));
+    } catch (WP_CLI\ExitException $e) {
+        $code = $e->getCode();
+    } catch (Throwable $e) {
+        $code = 1;
+        $logger->stderr .= 'Error: ' . $e->getMessage() . "\n";
+    }
+    $out = ob_get_clean();
+    return ['code' => $code, 'stdout' => $out . $logger->stdout, 'stderr' => $logger->stderr];
+};
+"""
+
+# Request loop run with `wp eval`. Each stdin line is {"id", "args", "assoc"};
+# each reply is one marker-prefixed JSON line so stray plugin output is ignored.
+SESSION_LOOP_PHP = RUNNER_PHP + r"""
+$marker = '__URUMI_WPCLI__';
+echo $marker . json_encode(['ready' => true]) . "\n";
+while (($line = fgets(STDIN)) !== false) {
+    $req = json_decode($line, true);
+    if (!is_array($req) || !isset($req['args'])) {
+        continue;
+    }
+    $reply = $urumi_run($req);
+    $reply['id'] = $req['id'];
+    echo $marker . json_encode($reply) . "\n";
+}
+"""
+
+# One-shot batch: runs every request in a single bootstrap and prints one
+# marker-prefixed JSON array of results.
+BATCH_PHP = RUNNER_PHP + r"""
+$marker = '__URUMI_WPCLI__';
+$ops = json_decode(base64_decode('%(ops)s'), true);
+$stop_on_error = %(stop_on_error)s;
+$results = [];
+foreach ($ops as $op) {
+    $result = $urumi_run($op);
+    $results[] = $result;
+    if ($stop_on_error && $result['code'] !== 0) {
+        break;
+    }
+}
+echo $marker . json_encode($results) . "\n";
+"""
+
+# Global flags the session process is started with; they are not per-command.
+SESSION_GLOBAL_FLAGS = {"allow-root", "user"}
+
+# Commands RUNNER_PHP cannot run in a shared process: `db` execs the mysql client,
+# which writes to the process STDOUT, and `eval` code may call exit.
+UNCAPTURED_COMMANDS = {"db", "eval", "eval-file", "shell"}
+# Formats WP-CLI prints with echo; table writes to the STDOUT stream (csv is run as json).
+CAPTURED_FORMATS = {"json", "csv", "ids", "count", "yaml"}
+
+
+class SessionError(RuntimeError):
+    """Raised when a session cannot be used; `sent` tells whether the command reached the pod."""
+
+    def __init__(self, message: str, sent: bool = False):
+        super().__init__(message)
+        self.sent = sent
+
+
+class ExecChannel(Protocol):
+    def send(self, line: str) -> None: ...
+
+    def readline(self, timeout: float) -> Optional[str]: ...
+
+    def alive(self) -> bool: ...
+
+    def close(self) -> None: ...
+
+
+class ProcessChannel:
+    """Line-oriented stdin/stdout channel over a `kubectl exec -i` subprocess."""
+
+    def __init__(self, cmd: list[str], env: dict):
+        self._proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            env=env,
+            bufsize=1,
+        )
+        self._lines: queue.Queue[str] = queue.Queue()
+        threading.Thread(target=self._pump, daemon=True).start()
+
+    def _pump(self) -> None:
+        for line in self._proc.stdout:
+            self._lines.put(line)
+        self._lines.put("")
+
+    def send(self, line: str) -> None:
+        self._proc.stdin.write(line + "\n")
+        self._proc.stdin.flush()
+
+    def readline(self, timeout: float) -> Optional[str]:
+        try:
+            return self._lines.get(timeout=max(timeout, 0))
+        except queue.Empty:
+            return None
+
+    def alive(self) -> bool:
+        return self._proc.poll() is None
+
+    def close(self) -> None:
+        try:
+            self._proc.stdin.close()
+        except Exception:
+            pass
+        try:
+            self._proc.terminate()
+            self._proc.wait(timeout=5)
+        except Exception:
+            self._proc.kill()
+
+
+def runner_can_capture(wp_args: list[str]) -> bool:
+    """Whether RUNNER_PHP returns the command's full output; others need a one-shot exec."""
+    args, assoc = split_wp_args(wp_args)
+    if not args or args[0] in UNCAPTURED_COMMANDS:
+        return False
+    format = assoc.get("format")
+    if format is None:
+        # List commands default to a table.
+        return "list" not in args
+    return format in CAPTURED_FORMATS
+
+
+def runner_request(wp_args: list[str]) -> tuple[dict, bool]:
+    """RUNNER_PHP request for a command, and whether its JSON output must be turned into CSV.
+
+    --format=csv writes straight to the STDOUT stream, which the runner's
+    ob_start() cannot capture, so such commands run as json instead.
+    """
+    args, assoc = split_wp_args(wp_args)
+    for flag in SESSION_GLOBAL_FLAGS:
+        assoc.pop(flag, None)
+    as_csv = assoc.get("format") == "csv"
+    if as_csv:
+        assoc["format"] = "json"
+    return {"args": args, "assoc": assoc}, as_csv
+
+
+def json_to_csv(output: str) -> str:
+    """WP-CLI style CSV (header row, one line per item) for a JSON list; other output is returned as is."""
+    try:
+        items = json.loads(output)
+    except ValueError:
+        return output
+    if isinstance(items, dict):
+        items = [{"Field": key, "Value": value} for key, value in items.items()]
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        return output
+    buffer = io.StringIO()
+    if items:
+        writer = csv.writer(buffer, lineterminator="\n")
+        fields = list(items[0])
+        writer.writerow(fields)
+        for item in items:
+            writer.writerow([_csv_value(item.get(field)) for field in fields])
+    return buffer.getvalue().strip()
+
+
+def _csv_value(value) -> str:
+    # Same as WP-CLI's write_csv: nested values are JSON, booleans 1/"".
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, bool):
+        return "1" if value else ""
+    return "" if value is None else str(value)
+
+
+def batch_php(operations: list[list[str]], stop_on_error: bool = True) -> str:
+    """PHP for `wp eval` that runs all operations in one WordPress bootstrap."""
+    requests = [runner_request(wp_args)[0] for wp_args in operations]
+    encoded = base64.b64encode(json.dumps(requests).encode()).decode()
+    return BATCH_PHP % {"ops": encoded, "stop_on_error": "true" if stop_on_error else "false"}
+
+
+def parse_batch_output(output: str) -> Optional[list[dict]]:
+    """Extracts the result array printed by BATCH_PHP; None if it is missing."""
+    for line in reversed(output.splitlines()):
+        line = line.strip()
+        if line.startswith(RESPONSE_MARKER):
+            try:
+                results = json.loads(line[len(RESPONSE_MARKER):])
+            except ValueError:
+                return None
+            return results if isinstance(results, list) else None
+    return None
+
+
+def split_wp_args(wp_args: list[str]) -> tuple[list[str], dict]:
+    """Splits CLI-style arguments into WP-CLI positional and associative args."""
+    args: list[str] = []
+    assoc: dict = {}
+    for arg in wp_args:
+        if not arg.startswith("--"):
+            args.append(arg)
+            continue
+        key, sep, value = arg[2:].partition("=")
+        if sep:
+            assoc[key] = value
+        elif key.startswith("no-"):
+            assoc[key[3:]] = False
+        else:
+            assoc[key] = True
+    return args, assoc
+
+
+class WpCliSession:
+    """One long-lived `wp eval` request loop inside a WordPress pod."""
+
+    def __init__(self, namespace: str, pod: str, channel: ExecChannel):
+        self.namespace = namespace
+        self.pod = pod
+        self.channel = channel
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._ready = False
+
+    def run(self, wp_args: list[str], timeout: int = 30) -> tuple[int, str, str]:
+        with self.lock:
+            self.last_used = time.monotonic()
+            if not self._ready:
+                self._read_reply(None, WP_CLI_SESSION_START_SECONDS, sent=False)
+                self._ready = True
+            request, as_csv = runner_request(wp_args)
+            request_id = next(self._ids)
+            try:
+                self.channel.send(json.dumps({"id": request_id, **request}))
+            except Exception as exc:
+                raise SessionError(f"WP-CLI session write failed: {exc}") from exc
+            reply = self._read_reply(request_id, timeout, sent=True)
+            self.last_used = time.monotonic()
+            code, stdout = int(reply.get("code") or 0), reply.get("stdout") or ""
+            if as_csv and code == 0:
+                stdout = json_to_csv(stdout)
+            return code, stdout, reply.get("stderr") or ""
+
+    def _read_reply(self, request_id: Optional[int], timeout: float, sent: bool) -> dict:
+        deadline = time.monotonic() + timeout
+        while True:
+            line = self.channel.readline(deadline - time.monotonic())
+            if line is None:
+                raise SessionError(f"Command timed out after {timeout}s", sent=sent)
+            if line == "":
+                raise SessionError("WP-CLI session ended unexpectedly", sent=sent)
+            if not line.startswith(RESPONSE_MARKER):
+                continue
+            try:
+                reply = json.loads(line[len(RESPONSE_MARKER):])
+            except ValueError:
+                continue
+            if request_id is None and reply.get("ready"):
+                return reply
+            if reply.get("id") == request_id:
+                return reply
+
+    def close(self) -> None:
+        self.channel.close()
+
+
+class SessionManager:
+    """Hands out one session per (namespace, pod) and evicts idle or stale ones."""
+
+    def __init__(self, opener: Callable[[str, str, list[str]], ExecChannel], idle_seconds: int = WP_CLI_SESSION_IDLE_SECONDS):
+        self._opener = opener
+        self._idle_seconds = idle_seconds
+        self._sessions: Dict[tuple[str, str], WpCliSession] = {}
+        # Keys whose channel is being opened; set once it is stored or the open failed.
+        self._opening: Dict[tuple[str, str], threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def run(self, namespace: str, pod: str, base_cmd: list[str], wp_args: list[str], timeout: int = 30) -> tuple[int, str, str]:
+        session = self._acquire(namespace, pod, base_cmd)
+        try:
+            return session.run(wp_args, timeout=timeout)
+        except SessionError:
+            self._discard((namespace, pod), session)
+            raise
+
+    def _acquire(self, namespace: str, pod: str, base_cmd: list[str]) -> WpCliSession:
+        key = (namespace, pod)
+        while True:
+            with self._lock:
+                self._evict_locked(namespace, pod)
+                session = self._sessions.get(key)
+                if session is not None and session.channel.alive():
+                    return session
+                opening = self._opening.get(key)
+                if opening is None:
+                    # Reserve the key; the exec channel is opened without holding the lock,
+                    # so other stores' sessions are not held up by a slow kubectl exec.
+                    if session is not None:
+                        self._sessions.pop(key, None)
+                        session.close()
+                    opening = self._opening[key] = threading.Event()
+                    break
+            opening.wait()
+        try:
+            command = [*base_cmd, "eval", SESSION_LOOP_PHP]
+            try:
+                channel = self._opener(namespace, pod, command)
+            except Exception as exc:
+                raise SessionError(f"Could not start WP-CLI session: {exc}") from exc
+            session = WpCliSession(namespace, pod, channel)
+            with self._lock:
+                self._sessions[key] = session
+            return session
+        finally:
+            with self._lock:
+                self._opening.pop(key, None)
+            opening.set()
+
+    def _evict_locked(self, namespace: str, pod: str) -> None:
+        now = time.monotonic()
+        for key, session in list(self._sessions.items()):
+            restarted = key[0] == namespace and key[1] != pod
+            idle = now - session.last_used > self._idle_seconds and not session.lock.locked()
+            if restarted or idle:
+                self._sessions.pop(key, None)
+                session.close()
+
+    def _discard(self, key: tuple[str, str], session: WpCliSession) -> None:
+        with self._lock:
+            if self._sessions.get(key) is session:
+                self._sessions.pop(key, None)
+        session.close()
+
+    def invalidate(self, namespace: str) -> None:
+        """Closes every session for a namespace (e.g. after its pod went away)."""
+        with self._lock:
+            for key, session in list(self._sessions.items()):
+                if key[0] == namespace:
+                    self._sessions.pop(key, None)
+                    session.close()
+
+    def close_all(self) -> None:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+    def __len__(self) -> int:
+        return len(self._sessions)